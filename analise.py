@@ -0,0 +1,340 @@
+"""Cálculos do dashboard (períodos, comparação e resumo por conta) sem dependência do Streamlit."""
+import numpy as np
+import pandas as pd
+
+from metricas import COLUNAS_RESUMO, METRICAS_BASE, avaliar
+
+PERIODOS = ["Mês atual", "Últimos 30 dias", "Últimos 15 dias", "Últimos 7 dias"]
+CRITERIOS_ORDENACAO = ["Atingimento (%)", "Receita total (R$)", "Sessões", "Nome da conta (A-Z)"]
+# Níveis da hierarquia dos cards: rótulo → coluna que identifica o card
+NIVEIS = {"Propriedade": "property_display", "Conta": "account_display"}
+# Uma propriedade é identificada pela conta e pelo nome: contas diferentes podem repetir o nome
+CHAVE_PROPRIEDADE = ["account_display", "property_display"]
+METRICAS_COMPARADAS = METRICAS_BASE
+META_GERAL = 100000
+
+
+def calcular_periodo(tipo_periodo: str, hoje=None):
+    """Calcula datas de início e fim do período atual e anterior."""
+    hoje = pd.Timestamp(hoje if hoje is not None else pd.Timestamp.today()).normalize()
+
+    if tipo_periodo == "Mês atual":
+        inicio_atual = hoje.replace(day=1)
+        fim_atual = hoje
+        inicio_anterior = inicio_atual - pd.offsets.MonthBegin(1)
+        fim_anterior = inicio_atual - pd.Timedelta(days=1)
+
+    elif tipo_periodo == "Últimos 30 dias":
+        fim_atual = hoje
+        inicio_atual = fim_atual - pd.Timedelta(days=29)
+        fim_anterior = inicio_atual - pd.Timedelta(days=1)
+        inicio_anterior = fim_anterior - pd.Timedelta(days=29)
+
+    elif tipo_periodo == "Últimos 15 dias":
+        fim_atual = hoje
+        inicio_atual = fim_atual - pd.Timedelta(days=14)
+        fim_anterior = inicio_atual - pd.Timedelta(days=1)
+        inicio_anterior = fim_anterior - pd.Timedelta(days=14)
+
+    elif tipo_periodo == "Últimos 7 dias":
+        fim_atual = hoje
+        inicio_atual = fim_atual - pd.Timedelta(days=6)
+        fim_anterior = inicio_atual - pd.Timedelta(days=1)
+        inicio_anterior = fim_anterior - pd.Timedelta(days=6)
+
+    else:
+        raise ValueError("Tipo de período inválido")
+
+    return {
+        "inicio_atual": inicio_atual,
+        "fim_atual": fim_atual,
+        "inicio_anterior": inicio_anterior,
+        "fim_anterior": fim_anterior
+    }
+
+
+def filtrar_periodos(df, periodo):
+    """Recorta as linhas do período atual e do anterior (métricas do anterior com sufixo ``_prev``)."""
+    # Filtro de período aplicado ao DataFrame
+    df_periodo = df[
+        (df["date"] >= periodo["inicio_atual"]) &
+        (df["date"] <= periodo["fim_atual"])
+    ]
+
+    # Cria a versão anterior para comparação
+    df_periodo_prev = df[
+        (df["date"] >= periodo["inicio_anterior"]) &
+        (df["date"] <= periodo["fim_anterior"])
+    ]
+
+    # Marca as colunas com sufixo "_prev" para comparação
+    df_periodo_prev = df_periodo_prev.rename(
+        columns={col: f"{col}_prev" for col in METRICAS_COMPARADAS if col in df.columns}
+    )
+
+    return df_periodo, df_periodo_prev
+
+
+def chave_propriedade(df):
+    """Colunas de ``CHAVE_PROPRIEDADE`` presentes em ``df`` (bases antigas não têm a conta)."""
+    return [c for c in CHAVE_PROPRIEDADE if c in df.columns]
+
+
+def juntar_periodos(df_periodo, df_periodo_prev):
+    """Faz merge dos dois períodos (baseado na conta, em property_display e na data relativa)."""
+    return pd.merge(
+        df_periodo,
+        df_periodo_prev,
+        on=[*chave_propriedade(df_periodo), "date"],
+        how="left"
+    )
+
+
+def comparar_periodos(df, periodo):
+    """Filtra o período atual e junta as métricas do anterior com sufixo ``_prev``."""
+    return juntar_periodos(*filtrar_periodos(df, periodo))
+
+
+def resumo_contas(df_filtrado, meta_geral, criterio_ordenacao="Atingimento (%)"):
+    """Totais de cada card (uma linha por propriedade de cada conta), já na ordem do critério escolhido.
+
+    Colunas: account_display (vazia em bases sem conta), property_display, total_sessions, total_transactions, total_revenue,
+    var_revenue (média das variações diárias da receita, em %), atingimento,
+    progresso_meta (atingimento limitado a 9999%) e as métricas derivadas de
+    ``metricas`` (razões das somas do card).
+    """
+    chave = chave_propriedade(df_filtrado)
+    grupos = df_filtrado.groupby(chave, observed=True, sort=False)
+    resumo = pd.DataFrame({
+        "total_sessions": grupos["sessions"].sum(),
+        "total_transactions": grupos["transactions"].sum(),
+        "total_revenue": grupos["purchaseRevenue"].sum(),
+        "n_dias": grupos.size(),
+    })
+
+    # Variação média dia a dia da receita, na ordem das linhas de cada conta
+    rev = df_filtrado["purchaseRevenue"].fillna(0)
+    colunas_chave = [df_filtrado[c] for c in chave]
+    pct = rev.groupby(colunas_chave, observed=True, sort=False).pct_change()
+    with np.errstate(invalid="ignore"):
+        var = pct.groupby(colunas_chave, observed=True, sort=False).mean() * 100
+    resumo["var_revenue"] = var.reindex(resumo.index).where(resumo["n_dias"] > 1, 0.0)
+
+    resumo["atingimento"] = (resumo["total_revenue"] / meta_geral) * 100
+    resumo["progresso_meta"] = resumo["atingimento"].clip(upper=9999)
+    resumo = avaliar(resumo.drop(columns="n_dias"), colunas=COLUNAS_RESUMO).reset_index()
+    resumo["property_display"] = resumo["property_display"].astype(str)
+    resumo["account_display"] = resumo["account_display"].astype(str) if "account_display" in chave else np.nan
+    return ordenar_resumo(resumo, criterio_ordenacao)
+
+
+def ordenar_resumo(resumo, criterio_ordenacao="Atingimento (%)", coluna="property_display"):
+    """Ordena o resumo pelo critério do dashboard (``coluna`` é o nome do card, para A-Z)."""
+    # === aplicação da ordenação ===
+    if criterio_ordenacao == "Atingimento (%)":
+        resumo = resumo.sort_values("atingimento", ascending=False)
+    elif criterio_ordenacao == "Receita total (R$)":
+        resumo = resumo.sort_values("total_revenue", ascending=False)
+    elif criterio_ordenacao == "Sessões":
+        resumo = resumo.sort_values("total_sessions", ascending=False)
+    elif criterio_ordenacao == "Nome da conta (A-Z)":
+        resumo = resumo.sort_values(coluna, ascending=True)
+
+    # garante ordem estável e índice limpo
+    return resumo.reset_index(drop=True)
+
+
+def listar_contas_ativas(df_config):
+    """Contas com status "Ativo" no ``contas_config.csv`` (``None`` se o arquivo não tem as colunas)."""
+    if not {"property_display", "status"}.issubset(df_config.columns):
+        return None
+    return df_config[df_config["status"].str.lower() == "ativo"]["property_display"].unique()
+
+
+def links_conta(row):
+    """Links configurados de uma linha do ``contas_config.csv`` (``[{"titulo", "url"}]``, só os preenchidos)."""
+    links = []
+    for i in range(1, 7):
+        titulo = row.get(f"t_link{i}", "")
+        url = row.get(f"link{i}", "")
+        if pd.notna(url) and str(url).strip():
+            titulo_exibicao = titulo if pd.notna(titulo) and str(titulo).strip() else f"Link {i}"
+            links.append({"titulo": titulo_exibicao, "url": url})
+    return links
+
+
+def resumo_periodo(df, tipo_periodo, meta_geral=META_GERAL, criterio_ordenacao="Atingimento (%)",
+                   selecionadas=None, ativas=None, hoje=None):
+    """Os totais dos cards do dashboard para um período, a partir da base comparativa.
+
+    Mesmo caminho do app: contas ativas → período atual e anterior → dias com
+    sessões → seleção → ``resumo_contas``.
+    """
+    if ativas is not None:
+        df = df[df["property_display"].isin(ativas)]
+    df_comparado = comparar_periodos(df, calcular_periodo(tipo_periodo, hoje))
+    df_validas = df_comparado[df_comparado["sessions"] > 0]
+    if selecionadas:
+        df_validas = df_validas[df_validas["property_display"].isin(selecionadas)]
+    return resumo_contas(df_validas, meta_geral, criterio_ordenacao)
+
+
+# ============================================================
+# ⚡ PERÍODOS PRÉ-CALCULADOS
+# ============================================================
+def precalcular_periodos(df, meta_geral=META_GERAL, hoje=None):
+    """Tudo que o dashboard mostra para cada período de ``PERIODOS``, calculado de uma vez.
+
+    A base só muda quando o pipeline roda, então o app calcula isto uma vez por
+    versão (e por dia, já que os períodos são relativos a hoje) e trocar de
+    período vira uma consulta a dicionário. Para cada período:
+
+    - ``periodo``: as datas de ``calcular_periodo``;
+    - ``resumo``: ``resumo_contas`` de todas as propriedades com sessões, em ordem alfabética
+      (com ``account_display``, para ``agregar_nivel``);
+    - ``dia_final``: sessões e receita do último dia (hoje) por conta, para ``mesclar_hoje``.
+    """
+    precalculados = {}
+    fim = calcular_periodo(PERIODOS[0], hoje)["fim_atual"]
+    dia_final = totais_do_dia(df, fim)
+    for tipo_periodo in PERIODOS:
+        periodo = calcular_periodo(tipo_periodo, hoje)
+        df_comparado = comparar_periodos(df, periodo)
+        df_validas = df_comparado[df_comparado["sessions"] > 0]
+        precalculados[tipo_periodo] = {
+            "periodo": periodo,
+            "resumo": resumo_contas(df_validas, meta_geral, "Nome da conta (A-Z)"),
+            "dia_final": dia_final,
+        }
+    return precalculados
+
+
+def precalcular_series(serie, hoje=None):
+    """Linhas diárias do período atual de cada período de ``PERIODOS`` para a série de uma conta.
+
+    Calculado sob demanda, uma vez por conta (a página de detalhes não paga o
+    pré-cálculo de todas as contas); trocar de período nos gráficos vira uma
+    consulta a dicionário. As colunas ``_prev`` ausentes já saem preenchidas
+    com NaN.
+    """
+    faltando = {f"{m}_prev": np.nan for m in METRICAS_COMPARADAS if f"{m}_prev" not in serie.columns}
+    serie = serie.assign(**faltando)
+    series = {}
+    for tipo_periodo in PERIODOS:
+        periodo = calcular_periodo(tipo_periodo, hoje)
+        series[tipo_periodo] = serie[
+            (serie["date"] >= periodo["inicio_atual"]) & (serie["date"] <= periodo["fim_atual"])
+        ].reset_index(drop=True)
+    return series
+
+
+def consultar_resumo(precalculado, criterio_ordenacao="Atingimento (%)", selecionadas=None, ativas=None):
+    """Resumo de um período pré-calculado, restrito às contas ativas/selecionadas e ordenado."""
+    resumo = precalculado["resumo"]
+    if ativas is not None:
+        resumo = resumo[resumo["property_display"].isin(ativas)]
+    if selecionadas:
+        resumo = resumo[resumo["property_display"].isin(selecionadas)]
+    return ordenar_resumo(resumo, criterio_ordenacao)
+
+
+# ============================================================
+# 🏢 HIERARQUIA: PORTFÓLIO → CONTA → PROPRIEDADE
+# ============================================================
+def agregar_nivel(resumo, coluna="account_display", meta_geral=META_GERAL, criterio_ordenacao="Atingimento (%)"):
+    """Sobe o resumo um nível da hierarquia somando os totais do nível de baixo (sem voltar às linhas).
+
+    As contagens são somadas; atingimento e métricas derivadas são recalculados
+    sobre as somas. A variação média diária não é aditiva: a do nível de cima é
+    a média das variações de baixo ponderada pela receita (média simples se não
+    houve receita), sem as variações infinitas de quem partiu de receita zero.
+    ``n_itens`` conta os itens agregados em cada card.
+    """
+    resumo = resumo[resumo[coluna].notna()]
+    grupos = resumo.groupby(coluna, sort=False)
+    chave = resumo[coluna]
+    finitas = np.isfinite(resumo["var_revenue"])
+    variacao = resumo["var_revenue"].where(finitas)
+    peso = resumo["total_revenue"].where(finitas, 0.0)
+    soma_pesos = peso.groupby(chave, sort=False).sum()
+    with np.errstate(invalid="ignore", divide="ignore"):
+        ponderada = (variacao.fillna(0.0) * peso).groupby(chave, sort=False).sum() / soma_pesos
+    agregado = pd.DataFrame({
+        "total_sessions": grupos["total_sessions"].sum(),
+        "total_transactions": grupos["total_transactions"].sum(),
+        "total_revenue": grupos["total_revenue"].sum(),
+        "var_revenue": ponderada.where(soma_pesos > 0, variacao.groupby(chave, sort=False).mean()).fillna(0.0),
+        "n_itens": grupos.size(),
+    })
+    if "usuarios_ativos" in resumo.columns:
+        agregado["usuarios_ativos"] = grupos["usuarios_ativos"].sum(min_count=1)
+    agregado["atingimento"] = (agregado["total_revenue"] / meta_geral) * 100
+    agregado["progresso_meta"] = agregado["atingimento"].clip(upper=9999)
+    agregado = avaliar(agregado, colunas=COLUNAS_RESUMO).reset_index()
+    return ordenar_resumo(agregado, criterio_ordenacao, coluna)
+
+
+def resumo_hierarquico(resumo, meta_geral=META_GERAL, criterio_ordenacao="Atingimento (%)"):
+    """Os três níveis de uma vez, cada um a partir do de baixo: propriedades → contas → portfólio."""
+    contas = agregar_nivel(resumo, "account_display", meta_geral, criterio_ordenacao)
+    portfolio = agregar_nivel(contas.assign(portfolio="Portfólio"), "portfolio", meta_geral, criterio_ordenacao)
+    return {
+        "property_display": resumo,
+        "account_display": contas,
+        "portfolio": portfolio,
+    }
+
+
+# ============================================================
+# ⚡ HOJE EM TEMPO REAL
+# ============================================================
+def totais_do_dia(df, dia):
+    """Contagens de ``dia`` por propriedade de cada conta, só das linhas com sessões (como ``resumo_contas``)."""
+    linhas = df[(df["date"] == pd.Timestamp(dia)) & (df["sessions"] > 0)]
+    chave = chave_propriedade(linhas)
+    totais = linhas.groupby(chave, observed=True)[METRICAS_BASE].sum()
+    totais = totais.reset_index()
+    totais[chave] = totais[chave].astype(str)
+    return totais
+
+
+def mesclar_hoje(resumo, hoje, base_hoje, meta_geral=META_GERAL, criterio_ordenacao="Atingimento (%)"):
+    """Troca, nos totais dos cards, o dia de hoje da base pelo retrato intraday (``tempo_real``).
+
+    ``hoje`` e ``base_hoje`` têm a chave da propriedade (``CHAVE_PROPRIEDADE``)
+    e as contagens de ``METRICAS_BASE`` (``hoje`` também ``usuarios_ativos``).
+    O cruzamento usa as colunas da chave presentes nos três, então nomes
+    repetidos em contas diferentes não se confundem. Só propriedades que já
+    estão no resumo e que vieram no retrato mudam; a variação média continua
+    a da base.
+    """
+    if hoje is None or hoje.empty or resumo.empty:
+        return resumo
+    chave = [c for c in chave_propriedade(resumo) if c in hoje.columns
+             and (base_hoje is None or c in base_hoje.columns)]
+    contas = pd.MultiIndex.from_frame(resumo[chave].astype(str))
+    atual = hoje.set_index(pd.MultiIndex.from_frame(hoje[chave].astype(str)))
+    base = (base_hoje.set_index(pd.MultiIndex.from_frame(base_hoje[chave].astype(str)))
+            if base_hoje is not None else atual.iloc[0:0])
+    no_retrato = contas.isin(atual.index)
+
+    def valores(origem, coluna):
+        return origem[coluna].reindex(contas).to_numpy(dtype="float64")
+
+    def ajuste(coluna):
+        if coluna not in atual.columns:
+            return 0
+        novo = valores(atual, coluna)
+        antigo = np.nan_to_num(valores(base, coluna)) if coluna in base.columns else 0
+        return np.where(no_retrato, novo - antigo, 0)
+
+    total_revenue = resumo["total_revenue"] + ajuste("purchaseRevenue")
+    resumo = resumo.assign(
+        total_sessions=resumo["total_sessions"] + ajuste("sessions"),
+        total_transactions=resumo["total_transactions"] + ajuste("transactions"),
+        total_revenue=total_revenue,
+        atingimento=total_revenue / meta_geral * 100,
+        progresso_meta=(total_revenue / meta_geral * 100).clip(upper=9999),
+        usuarios_ativos=valores(atual, "usuarios_ativos"),
+    )
+    return ordenar_resumo(avaliar(resumo, colunas=COLUNAS_RESUMO), criterio_ordenacao)
@@ -0,0 +1,189 @@
+"""Resumo por conta (os totais dos cards) fora do Streamlit: função importável e endpoint HTTP local.
+
+Uso em scripts::
+
+    from api_resumo import ServicoResumo
+    ServicoResumo().resumo("Últimos 7 dias")          # DataFrame, uma linha por conta
+
+Servidor::
+
+    python api_resumo.py --porta 8765
+    curl 'http://localhost:8765/resumo?periodo=Últimos%207%20dias&formato=csv'
+
+Parâmetros de ``/resumo``: ``periodo`` (um de ``analise.PERIODOS``),
+``ordenacao`` (um de ``analise.CRITERIOS_ORDENACAO``), ``contas`` (repetido ou
+separado por vírgula), ``meta`` e ``formato`` (``json`` ou ``csv``).
+
+A base e o config são lidos uma vez por versão em disco, e cada combinação de
+parâmetros é calculada uma única vez por versão — consultas repetidas saem do
+cache sem tocar nas linhas diárias.
+"""
+import argparse
+import io
+import json
+import math
+import os
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+
+from analise import CRITERIOS_ORDENACAO, META_GERAL, PERIODOS, calcular_periodo, listar_contas_ativas, resumo_periodo
+from arquivos import versao_arquivo
+from dados import DADOS_PATH, ler_base
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "contas_config.csv")
+PORTA_PADRAO = 8765
+MAX_RESUMOS = 128
+
+
+class ServicoResumo:
+    """Base, contas ativas e resumos em cache, renovados quando os arquivos mudam."""
+
+    def __init__(self, dados_path=DADOS_PATH, config_path=CONFIG_PATH):
+        self.dados_path = dados_path
+        self.config_path = config_path
+        self._lock = threading.Lock()
+        self._versao = None
+        self._df = None
+        self._ativas = None
+        self._resumos = OrderedDict()
+
+    def _atualizar(self):
+        """Relê base e config se algum dos dois mudou em disco (descarta os resumos antigos)."""
+        versao = (versao_arquivo(self.dados_path), versao_arquivo(self.config_path))
+        if versao == self._versao:
+            return versao
+        df = ler_base(self.dados_path)
+        ativas = None
+        if os.path.exists(self.config_path):
+            ativas = listar_contas_ativas(pd.read_csv(self.config_path, sep=";"))
+        self._df, self._ativas, self._versao = df, ativas, versao
+        self._resumos.clear()
+        return versao
+
+    def resumo(self, tipo_periodo="Mês atual", criterio_ordenacao="Atingimento (%)", selecionadas=None,
+               meta_geral=META_GERAL, hoje=None):
+        """Os mesmos totais dos cards do dashboard (ver ``analise.resumo_contas``)."""
+        if tipo_periodo not in PERIODOS:
+            raise ValueError(f"Período inválido: {tipo_periodo!r}")
+        if criterio_ordenacao not in CRITERIOS_ORDENACAO:
+            raise ValueError(f"Critério de ordenação inválido: {criterio_ordenacao!r}")
+
+        hoje = pd.Timestamp(hoje if hoje is not None else pd.Timestamp.today()).normalize()
+        selecionadas = tuple(sorted(selecionadas)) if selecionadas else None
+        with self._lock:
+            versao = self._atualizar()
+            chave = (versao, tipo_periodo, criterio_ordenacao, selecionadas, float(meta_geral), hoje)
+            if chave in self._resumos:
+                self._resumos.move_to_end(chave)
+                return self._resumos[chave]
+            df, ativas = self._df, self._ativas
+
+        resumo = resumo_periodo(df, tipo_periodo, meta_geral, criterio_ordenacao, selecionadas, ativas, hoje)
+        with self._lock:
+            if self._versao == versao:
+                self._resumos[chave] = resumo
+                while len(self._resumos) > MAX_RESUMOS:
+                    self._resumos.popitem(last=False)
+        return resumo
+
+
+def para_json(resumo, tipo_periodo, hoje=None):
+    """Documento JSON do resumo (infinito/NaN viram ``null``)."""
+    periodo = calcular_periodo(tipo_periodo, hoje)
+    contas = [
+        {k: (None if isinstance(v, float) and not math.isfinite(v) else v) for k, v in linha.items()}
+        for linha in resumo.to_dict(orient="records")
+    ]
+    return {
+        "periodo": tipo_periodo,
+        "inicio": periodo["inicio_atual"].date().isoformat(),
+        "fim": periodo["fim_atual"].date().isoformat(),
+        "contas": contas,
+    }
+
+
+def para_csv(resumo):
+    buffer = io.StringIO()
+    resumo.to_csv(buffer, sep=";", index=False)
+    return buffer.getvalue()
+
+
+# ============================================================
+# 🌐 ENDPOINT HTTP
+# ============================================================
+def criar_servidor(servico=None, host="127.0.0.1", porta=PORTA_PADRAO, hoje=pd.Timestamp.today):
+    """``ThreadingHTTPServer`` com ``GET /resumo`` e ``GET /saude``.
+
+    ``hoje`` é lido uma vez por requisição e vale para os totais e para as
+    datas do documento, que assim nunca discordam perto da meia-noite.
+    """
+    servico = servico or ServicoResumo()
+
+    class Handler(BaseHTTPRequestHandler):
+        def _responder(self, status, corpo, tipo):
+            dados = corpo.encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", f"{tipo}; charset=utf-8")
+            self.send_header("Content-Length", str(len(dados)))
+            self.end_headers()
+            self.wfile.write(dados)
+
+        def _erro(self, status, mensagem):
+            self._responder(status, json.dumps({"erro": mensagem}, ensure_ascii=False), "application/json")
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == "/saude":
+                return self._responder(200, '{"ok": true}', "application/json")
+            if url.path != "/resumo":
+                return self._erro(404, "rota não encontrada")
+
+            params = parse_qs(url.query)
+            tipo_periodo = params.get("periodo", ["Mês atual"])[0]
+            criterio = params.get("ordenacao", ["Atingimento (%)"])[0]
+            formato = params.get("formato", ["json"])[0].lower()
+            contas = [c for valor in params.get("contas", []) for c in valor.split(",") if c.strip()]
+            try:
+                meta = float(params.get("meta", [META_GERAL])[0])
+                dia = hoje()
+                resumo = servico.resumo(tipo_periodo, criterio, contas or None, meta, hoje=dia)
+            except ValueError as erro:
+                return self._erro(400, str(erro))
+            except FileNotFoundError as erro:
+                return self._erro(503, f"base indisponível: {erro.filename}")
+
+            if formato == "csv":
+                return self._responder(200, para_csv(resumo), "text/csv")
+            corpo = json.dumps(para_json(resumo, tipo_periodo, dia), ensure_ascii=False, allow_nan=False)
+            return self._responder(200, corpo, "application/json")
+
+        def log_message(self, formato, *args):
+            pass
+
+    return ThreadingHTTPServer((host, porta), Handler)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Endpoint local com o resumo por conta do dashboard")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=PORTA_PADRAO)
+    parser.add_argument("--dados", default=DADOS_PATH)
+    parser.add_argument("--config", default=CONFIG_PATH)
+    args = parser.parse_args(argv)
+
+    servidor = criar_servidor(ServicoResumo(args.dados, args.config), args.host, args.porta)
+    print(f"🌐 Resumo disponível em http://{args.host}:{args.porta}/resumo")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+
+
+if __name__ == "__main__":
+    main()
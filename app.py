@@ -9,16 +9,33 @@ import streamlit as st
 from datetime import date, datetime, timedelta
 from calendar import monthrange
 
+from analise import (CRITERIOS_ORDENACAO, META_GERAL, NIVEIS, PERIODOS, calcular_periodo, consultar_resumo,
+                     links_conta, listar_contas_ativas, mesclar_hoje, precalcular_periodos, precalcular_series,
+                     resumo_hierarquico)
+from dados import ObservadorArquivo, VersaoAlterada, ativar_copy_on_write, ler_base_versao
+from graficos import GRAFICOS_DETALHES, montar_grafico_combinado
+from metricas import METRICAS_DERIVADAS, formatar
+from motor_sql import criar_motor
+from perfil import criar_perfilador
+from tempo_real import criar_camada
+
 
 # ============================================================
 # ⚙️ CONFIGURAÇÕES INICIAIS
 # ============================================================
 st.set_page_config(page_title="Dashboard GA4 – WN7", page_icon="📊", layout="wide")
 
+# Instrumentação opcional (?perfil=1 ou AGENGY_PERFIL=1): tempo de cada seção neste rerun
+perfil = criar_perfilador(st.query_params.to_dict())
+
 CSV_PATH = os.path.join(os.path.dirname(__file__), "contas_config.csv")
 BASE_DIR = os.path.dirname(__file__)
+DADOS_PATH = "base_comparativa.csv"
 LOGO_PATH = os.path.join(BASE_DIR, "assents", "logo.png")
 
+# A base é compartilhada entre sessões: derivados são views, nunca cópias da base inteira
+ativar_copy_on_write()
+
 # ============================================================
 # 🎨 FUNÇÃO PARA CARREGAR CSS
 # ============================================================
@@ -32,78 +49,94 @@ load_css("style.css")
 # ============================================================
 # 🧮 FUNÇÕES AUXILIARES
 # ============================================================
-@st.cache_data
-def carregar_dados():
-    """Carrega e prepara o DataFrame principal."""
-    df = pd.read_csv("base_comparativa.csv", sep=";")
-    df.columns = df.columns.str.strip()
-    df["date"] = pd.to_datetime(df["date"], errors="coerce")
-    return df
-
-def calcular_periodo(tipo_periodo: str):
-    """Calcula datas de início e fim do período atual e anterior."""
-    hoje = pd.Timestamp.today().normalize()
-
-    if tipo_periodo == "Mês atual":
-        inicio_atual = hoje.replace(day=1)
-        fim_atual = hoje
-        inicio_anterior = inicio_atual - pd.offsets.MonthBegin(1)
-        fim_anterior = inicio_atual - pd.Timedelta(days=1)
-
-    elif tipo_periodo == "Últimos 30 dias":
-        fim_atual = hoje
-        inicio_atual = fim_atual - pd.Timedelta(days=29)
-        fim_anterior = inicio_atual - pd.Timedelta(days=1)
-        inicio_anterior = fim_anterior - pd.Timedelta(days=29)
-
-    elif tipo_periodo == "Últimos 15 dias":
-        fim_atual = hoje
-        inicio_atual = fim_atual - pd.Timedelta(days=14)
-        fim_anterior = inicio_atual - pd.Timedelta(days=1)
-        inicio_anterior = fim_anterior - pd.Timedelta(days=14)
-
-    elif tipo_periodo == "Últimos 7 dias":
-        fim_atual = hoje
-        inicio_atual = fim_atual - pd.Timedelta(days=6)
-        fim_anterior = inicio_atual - pd.Timedelta(days=1)
-        inicio_anterior = fim_anterior - pd.Timedelta(days=6)
-
-    else:
-        raise ValueError("Tipo de período inválido")
-
-    return {
-        "inicio_atual": inicio_atual,
-        "fim_atual": fim_atual,
-        "inicio_anterior": inicio_anterior,
-        "fim_anterior": fim_anterior
-    }
-
-def grafico_combinado(df, metric, titulo):
-    """Cria gráfico combinado de barras e linhas (período atual vs anterior)."""
-    metric_prev = f"{metric}_prev"
-    if metric_prev not in df.columns:
-        st.warning(f"Coluna '{metric_prev}' não encontrada no DataFrame.")
+@st.cache_resource(max_entries=2)
+def carregar_dados(versao):
+    """Carrega e prepara o DataFrame principal, mantido uma única vez por processo.
+
+    ``versao`` é o hash do conteúdo e a chave do cache: a leitura confere o
+    hash dos mesmos bytes que interpreta, então nunca guarda um arquivo trocado
+    no meio do caminho sob a versão antiga. Cada versão é lida uma única vez e
+    as antigas saem do cache sozinhas.
+    Diferente de ``st.cache_data``, o objeto não é copiado para cada sessão —
+    por isso ele é tratado como somente leitura (nunca altere ``df`` in-place).
+    """
+    return ler_base_versao(versao, DADOS_PATH)
+
+def aquecer_dados(versao):
+    """Lê a nova versão e já pré-calcula os períodos, antes de qualquer sessão pedir."""
+    periodos_precalculados(versao, date.today())
+
+@st.cache_resource
+def observador_dados():
+    """Observador único por processo que pré-carrega novas versões da base em segundo plano."""
+    return ObservadorArquivo(DADOS_PATH, aquecer=aquecer_dados).iniciar()
+
+@st.cache_resource
+def motor_dados(pedido):
+    """Motor DuckDB único por processo (``?motor=duckdb``); ``None`` mantém o pandas."""
+    return criar_motor(DADOS_PATH, {"motor": pedido} if pedido else None)
+
+@st.cache_resource
+def camada_tempo_real():
+    """Retrato de hoje compartilhado por todas as sessões (``AGENGY_TEMPO_REAL=1``); ``None`` se desligado."""
+    return criar_camada(config_path=CSV_PATH)
+
+def grafico_combinado(df, metric, titulo, perfil_rerun):
+    """Exibe o gráfico combinado de barras e linhas (período atual vs anterior)."""
+    with perfil_rerun.secao("gráficos"):
+        chart = montar_grafico_combinado(df, metric, titulo)
+    if chart is None:
+        st.warning(f"Coluna '{metric}_prev' não encontrada no DataFrame.")
         return
 
-    df_long = pd.DataFrame({
-        "dia_mes": pd.to_datetime(df["date"]).dt.strftime("%d/%m"),
-        "Atual": df[metric],
-        "Anterior": df[metric_prev]
-    }).melt(id_vars="dia_mes", var_name="Periodo", value_name="Valor")
+    st.altair_chart(chart, use_container_width=True)
 
-    bar = alt.Chart(df_long[df_long["Periodo"] == "Atual"]).mark_bar(color="#4C78A8").encode(
-        x=alt.X('dia_mes:N', title='Dia'),
-        y=alt.Y('Valor:Q', title=titulo),
-        tooltip=['dia_mes', 'Valor']
-    )
+def exibir_perfil(perfil_rerun, trecho, area=st):
+    """Mostra e grava os tempos de um rerun da página ou de um fragmento (só com o perfil ligado).
 
-    line = alt.Chart(df_long[df_long["Periodo"] == "Anterior"]).mark_line(color="#F2B701", point=True).encode(
-        x='dia_mes:N',
-        y='Valor:Q',
-        tooltip=['dia_mes', 'Valor']
+    Fragmentos não podem escrever na sidebar: eles passam ``area=st`` e a
+    tabela aparece ao fim do próprio fragmento.
+    """
+    if not perfil_rerun.ativo:
+        return
+    with area.expander(f"⏱️ Tempo por seção – {trecho}", expanded=area is st.sidebar):
+        st.dataframe(
+            pd.DataFrame(
+                [{"Seção": k, "ms": round(v, 1)} for k, v in perfil_rerun.tempos.items()]
+            ),
+            hide_index=True,
+        )
+        st.caption(f"Total do rerun: {perfil_rerun.total_ms():.0f} ms")
+    perfil_rerun.gravar(pagina=pagina.url_path or "dashboard", trecho=trecho,
+                        periodo=st.session_state.get("opcao_periodo"))
+
+def seletor_periodo(prefixo_chave):
+    """Botões de período na mesma linha do título; devolve as datas do período ativo."""
+    col_titulo, col1, col2, col3, col4 = st.columns([1.5, 1, 1, 1, 1])
+
+    with col_titulo:
+        st.markdown("### 📅 Período de análise")
+
+    # Inicializa o período padrão (mantém ao navegar)
+    if "opcao_periodo" not in st.session_state:
+        st.session_state.opcao_periodo = "Mês atual"
+
+    # Renderiza os botões na horizontal; o clique já vale nesta execução (sem st.rerun)
+    for i, col in enumerate([col1, col2, col3, col4]):
+        with col:
+            if st.button(PERIODOS[i], key=f"{prefixo_chave}{i}"):
+                st.session_state.opcao_periodo = PERIODOS[i]
+
+    # Define o período ativo
+    opcao_periodo = st.session_state.opcao_periodo
+    periodo = calcular_periodo(opcao_periodo)
+
+    # Feedback visual do filtro ativo
+    st.markdown(
+        f"📆 **Filtro ativo:** `{opcao_periodo}` — "
+        f"de {periodo['inicio_atual'].strftime('%d/%m/%Y')} até {periodo['fim_atual'].strftime('%d/%m/%Y')}"
     )
-
-    st.altair_chart(alt.layer(bar, line).properties(title=titulo), use_container_width=True)
+    return periodo
 
 # ============================================================
 # ✏️ FUNÇÃO DE EDIÇÃO DE CONTA
@@ -181,224 +214,216 @@ def edit(conta):
 # ============================================================
 # 📊 CARREGAMENTO DE DADOS E CONFIGURAÇÃO
 # ============================================================
-df = carregar_dados()
-
-if os.path.exists(CSV_PATH):
-    df_config = pd.read_csv(CSV_PATH, sep=";")
-    if {"property_display", "status"}.issubset(df_config.columns):
-        contas_ativas = df_config[df_config["status"].str.lower() == "ativo"]["property_display"].unique()
-        df = df[df["property_display"].isin(contas_ativas)]
-    else:
+# Com o motor DuckDB a base não é carregada no pandas: as consultas leem o arquivo
+motor = motor_dados(str(st.query_params.get("motor", "")))
+meta_geral = META_GERAL
+
+@st.cache_resource(max_entries=2)
+def data_extracao(versao):
+    """Última data da base (por versão), para o cabeçalho."""
+    return (motor.data_maxima() if motor else carregar_dados(versao)["date"].max()).strftime("%d/%m/%Y")
+
+@st.cache_resource(max_entries=2)
+def periodos_precalculados(versao, dia):
+    """Resumos de todos os períodos, uma vez por versão da base e por dia.
+
+    ``dia`` entra na chave porque os períodos são relativos a hoje.
+    """
+    return precalcular_periodos(carregar_dados(versao), meta_geral, hoje=dia)
+
+@st.cache_resource(max_entries=32)
+def serie_conta(versao, conta):
+    """Linhas de uma única conta (o que a página de detalhes precisa), recortadas uma vez por versão."""
+    df = carregar_dados(versao)
+    return df[df["property_display"] == conta].reset_index(drop=True)
+
+@st.cache_resource(max_entries=32)
+def series_conta(versao, conta, dia):
+    """Série da conta já recortada em cada período, uma vez por versão, conta e dia."""
+    return precalcular_series(serie_conta(versao, conta), hoje=dia)
+
+def na_versao_atual(consulta, *args):
+    """``consulta(versao, *args)`` na versão publicada agora, para os fragmentos.
+
+    Um fragmento pode reexecutar sozinho muito depois do último rerun do app,
+    então não usa a versão daquele rerun. Se a base for trocada entre a
+    publicação e a leitura, publica a nova e reexecuta o app inteiro.
+    """
+    try:
+        return consulta(observador_dados().versao(), *args)
+    except VersaoAlterada:
+        observador_dados().verificar()
+        st.rerun(scope="app")
+
+@st.cache_resource
+def logo_base64():
+    with open(LOGO_PATH, "rb") as f:
+        return base64.b64encode(f.read()).decode()
+
+def carregar_config():
+    """Contas ativas do contas_config.csv (``None`` se não houver config válido)."""
+    if not os.path.exists(CSV_PATH):
+        st.warning("⚠️ Arquivo de configuração de contas não encontrado.")
+        return None
+    contas_ativas = listar_contas_ativas(pd.read_csv(CSV_PATH, sep=";"))
+    if contas_ativas is None:
         st.warning("⚠️ Colunas 'property_display' e/ou 'status' não encontradas no arquivo de configuração.")
-else:
-    st.warning("⚠️ Arquivo de configuração de contas não encontrado.")
-
-# ============================================================
-# 🧭 CONTROLE DE NAVEGAÇÃO
-# ============================================================
-if "page" not in st.session_state:
-    st.session_state["page"] = "dashboard"
+    return contas_ativas
 
 # ============================================================
 # 🧾 CABEÇALHO FIXO
 # ============================================================
-meta_geral = 100000
-hoje = pd.Timestamp.today()
-data_extracao = max(df['date']).strftime("%d/%m/%Y")
-
-st.markdown(
-    f"""
-    <div class="fixed-header">
-        <div class="header-left">
-            <img src="data:image/png;base64,{base64.b64encode(open(LOGO_PATH, 'rb').read()).decode()}" alt="Logo">
-            <div class="titulo">
-                <h1>Dashboard de Contas – Google Analytics 4</h1>
-                <p>🕒 Dados extraídos em: <b>{data_extracao}</b></p>
+def cabecalho(versao):
+    st.markdown(
+        f"""
+        <div class="fixed-header">
+            <div class="header-left">
+                <img src="data:image/png;base64,{logo_base64()}" alt="Logo">
+                <div class="titulo">
+                    <h1>Dashboard de Contas – Google Analytics 4</h1>
+                    <p>🕒 Dados extraídos em: <b>{data_extracao(versao)}</b></p>
+                </div>
             </div>
         </div>
-    </div>
-    """,
-    unsafe_allow_html=True
-)
+        """,
+        unsafe_allow_html=True
+    )
 
 # ======================
 # ========== DASHBOARD PRINCIPAL ==========
 # ======================
-if True:
-    if st.session_state["page"] == "dashboard":
-
-        # ======================
-        # 📅 Botões de período na mesma linha do título
-        # ======================
-        col_titulo, col1, col2, col3, col4 = st.columns([1.5, 1, 1, 1, 1])
-
-        with col_titulo:
-            st.markdown("### 📅 Período de análise")
-
-        # Inicializa o período padrão (mantém ao navegar)
-        if "opcao_periodo" not in st.session_state:
-            st.session_state.opcao_periodo = "Mês atual"
-
-        periodos = ["Mês atual", "Últimos 30 dias", "Últimos 15 dias", "Últimos 7 dias"]
-
-        # Renderiza os botões na horizontal
-        for i, col in enumerate([col1, col2, col3, col4]):
-            with col:
-                ativo = st.session_state.opcao_periodo == periodos[i]
-                if st.button(periodos[i], key=f"btn_dash_{i}"):
-                    st.session_state.opcao_periodo = periodos[i]
-                    st.rerun()
-
-        # Define o período ativo
-        opcao_periodo = st.session_state.opcao_periodo
-        periodo = calcular_periodo(opcao_periodo)
-
-        # Feedback visual (opcional)
-        st.markdown(
-            f"📆 **Filtro ativo:** `{opcao_periodo}` — "
-            f"de {periodo['inicio_atual'].strftime('%d/%m/%Y')} até {periodo['fim_atual'].strftime('%d/%m/%Y')}"
-        )
+@st.fragment
+def painel_contas(contas_ativas):
+    """Período, seleção, ordenação e cards.
+
+    É um fragmento: trocar o período, a seleção ou a ordenação reexecuta só
+    este trecho (cabeçalho, config e gerenciamento de contas não são refeitos).
+    "Ver detalhes" ainda reexecuta o app inteiro, porque troca de página.
+    """
+    perfil_painel = perfil.fragmento()
+    periodo = seletor_periodo("btn_dash_")
+
+    with perfil_painel.secao("filtro de período"):
+        if motor:
+            contas_disponiveis = motor.contas_disponiveis(periodo, contas_ativas)
+        else:
+            # Período já calculado nesta versão da base: só uma consulta ao dicionário
+            precalculado = na_versao_atual(periodos_precalculados, date.today())[st.session_state.opcao_periodo]
+            contas_disponiveis = consultar_resumo(precalculado, "Nome da conta (A-Z)",
+                                                  ativas=contas_ativas)["property_display"].tolist()
 
-        # Filtro de período aplicado ao DataFrame
-        df_periodo = df[
-            (df["date"] >= periodo["inicio_atual"]) &
-            (df["date"] <= periodo["fim_atual"])
-        ]
+    # === seleção e controle (colunas) ===
+    c1, c2 = st.columns([2, 1])
 
-        # Cria a versão anterior para comparação
-        df_periodo_prev = df[
-            (df["date"] >= periodo["inicio_anterior"]) &
-            (df["date"] <= periodo["fim_anterior"])
-        ].copy()
+    with c1:
+        st.markdown("### Selecione as contas que deseja visualizar no dashboard:",
+            unsafe_allow_html=True
+        )
+        selecionadas = st.multiselect(
+            label="",  # <---- vazio
+            options=contas_disponiveis,
+            placeholder="Escolha as contas que deseja visualizar..."
+        )
 
-        # Marca as colunas com sufixo "_prev" para comparação
-        for col in ["purchaseRevenue", "sessions", "transactions", "conversion_rate"]:
-            if col in df.columns:
-                df_periodo_prev = df_periodo_prev.rename(columns={col: f"{col}_prev"})
-
-        # Faz merge dos dois períodos (baseado em property_display e data relativa)
-        df_comparado = pd.merge(
-            df_periodo,
-            df_periodo_prev,
-            on=["property_display", "date"],
-            how="left"
+    with c2:
+        st.markdown("### Critério de ordenação:",
+            unsafe_allow_html=True
+        )
+        criterio_ordenacao = st.selectbox(
+            label="",  # <---- vazio
+            options=CRITERIOS_ORDENACAO,
+            index=0
         )
-        # ======================
-        # 🔹 Dados do dashboard
-        # ======================
-        df_validas = df_comparado[df_comparado['sessions'] > 0]
-        contas_disponiveis = sorted(df_validas['property_display'].unique())
-
-        # === seleção e controle (colunas) ===
-        c1, c2 = st.columns([2, 1])
-
-        with c1:
-            st.markdown("### Selecione as contas que deseja visualizar no dashboard:",
-                unsafe_allow_html=True
-            )
-            selecionadas = st.multiselect(
-                label="",  # <---- vazio
-                options=contas_disponiveis,
-                placeholder="Escolha as contas que deseja visualizar..."
-            )
-
-        with c2:
-            st.markdown("### Critério de ordenação:",
-                unsafe_allow_html=True
-            )
-            criterio_ordenacao = st.selectbox(
-                label="",  # <---- vazio
-                options=[
-                    "Atingimento (%)",
-                    "Receita total (R$)",
-                    "Sessões",
-                    "Nome da conta (A-Z)"
-                ],
-                index=0
-            )
-
-        # === aplica filtro conforme seleção ===
-        if selecionadas:
-            df_filtrado = df_validas[df_validas['property_display'].isin(selecionadas)]
+        nivel = st.segmented_control("Cards por", options=list(NIVEIS), default="Propriedade",
+                                     key="nivel_cards") or "Propriedade"
+
+    # === totais por conta, já ordenados (IMPORTANTE: feito ANTES do loop) ===
+    with perfil_painel.secao("agregação"):
+        if motor:
+            df_resumo = motor.resumo_contas(periodo, meta_geral, criterio_ordenacao,
+                                            contas_ativas, selecionadas)
         else:
-            df_filtrado = df_validas
-
-        # === monta df_atingimento base (receita total por conta) ===
-        df_atingimento = df_filtrado.groupby('property_display')['purchaseRevenue'].sum().reset_index()
-        df_atingimento['atingimento'] = (df_atingimento['purchaseRevenue'] / meta_geral) * 100
-
-        # === aplicação da ordenação (IMPORTANTE: feito ANTES do loop) ===
-        if criterio_ordenacao == "Atingimento (%)":
-            df_atingimento = df_atingimento.sort_values("atingimento", ascending=False)
-
-        elif criterio_ordenacao == "Receita total (R$)":
-            df_atingimento = df_atingimento.sort_values("purchaseRevenue", ascending=False)
-
-        elif criterio_ordenacao == "Sessões":
-            # soma de sessões por conta
-            df_sessoes = df_filtrado.groupby("property_display")["sessions"].sum().reset_index().rename(columns={"sessions": "total_sessions"})
-            # junta para ordenar por total_sessions (se houver contas sem sessões, ficarão NaN -> 0)
-            df_atingimento = df_atingimento.merge(df_sessoes, on="property_display", how="left")
-            df_atingimento["total_sessions"] = df_atingimento["total_sessions"].fillna(0)
-            df_atingimento = df_atingimento.sort_values("total_sessions", ascending=False)
-
-        elif criterio_ordenacao == "Nome da conta (A-Z)":
-            df_atingimento = df_atingimento.sort_values("property_display", ascending=True)
-
-        # garante ordem estável e índice limpo
-        df_atingimento = df_atingimento.reset_index(drop=True)
-
-        # === gera cards na ordem definida ===
-        st.markdown("---")
-        colunas = st.columns(3)
-
-        for idx, conta in enumerate(df_atingimento['property_display'].unique()):
-            conta_df = df_filtrado[df_filtrado['property_display'] == conta]
-            total_sessions = conta_df['sessions'].sum()
-            total_revenue = conta_df['purchaseRevenue'].sum()
-            rev_series = conta_df['purchaseRevenue'].fillna(0)
-            var_revenue = rev_series.pct_change().mean() * 100 if len(rev_series) > 1 else 0.0
-            progresso_meta = (total_revenue / meta_geral) * 100
-            progresso_meta = min(progresso_meta, 9999)
-            cor_meta = "#16a34a" if progresso_meta >= 100 else "#F39200"
-
-            col = colunas[idx % 3]
-            with col:
-                with st.container():
-                    # Card visual
-                    st.markdown(
-                        f"""
-                        <div class="card custom">
-                            <h4 title="{conta}">{conta}</h4>
-                            <div class="card-grid">
-                                <div>
-                                    <b>Receita:</b><br>
-                                    <span class="receita-valor">R$ {total_revenue:,.2f}</span><br>
-                                    <span style="font-size:16px;"><b>Variação:</b>
-                                    <span class="{ 'var-positivo' if var_revenue >= 0 else 'var-negativo' }">{var_revenue:+.1f}%</span></span>
-                                </div>
-                                <div>
-                                    <b>Sessões:</b><br>{total_sessions:,.0f}
-                                </div>
+            df_resumo = consultar_resumo(precalculado, criterio_ordenacao, selecionadas, contas_ativas)
+
+        # Hoje em tempo real: só lê o último retrato da camada, nunca chama a API daqui
+        tempo_real = camada_tempo_real()
+        retrato = tempo_real.retrato() if tempo_real else None
+        if retrato is not None:
+            base_hoje = (motor.totais_dia(periodo["fim_atual"], contas_ativas) if motor
+                         else precalculado["dia_final"])
+            df_resumo = mesclar_hoje(df_resumo, retrato, base_hoje, meta_geral, criterio_ordenacao)
+            st.caption(f"⚡ Números de hoje em tempo real (atualizados às {tempo_real.atualizado_em:%H:%M})")
+
+        # Contas e portfólio somados a partir dos totais por propriedade (já com o tempo real)
+        coluna_card = NIVEIS[nivel]
+        if coluna_card != "property_display":
+            niveis = resumo_hierarquico(df_resumo, meta_geral, criterio_ordenacao)
+            df_resumo = niveis[coluna_card]
+            portfolio = niveis["portfolio"]
+            if not portfolio.empty:
+                total = portfolio.iloc[0]
+                st.markdown(
+                    f"**🏢 Portfólio:** {len(df_resumo)} contas · Receita R$ {total.total_revenue:,.2f} · "
+                    f"Sessões {total.total_sessions:,.0f}"
+                )
+
+    # === gera cards na ordem definida ===
+    st.markdown("---")
+    perfil_painel.iniciar("cards")
+    colunas = st.columns(3)
+
+    for idx, linha in enumerate(df_resumo.itertuples(index=False)):
+        conta = getattr(linha, coluna_card)
+        total_sessions = linha.total_sessions
+        total_revenue = linha.total_revenue
+        var_revenue = linha.var_revenue
+        progresso_meta = linha.progresso_meta
+        ativos = getattr(linha, "usuarios_ativos", np.nan)
+        agora = "" if pd.isna(ativos) else f'<br><span style="font-size:14px;">👥 {ativos:,.0f} agora</span>'
+        cor_meta = "#16a34a" if progresso_meta >= 100 else "#F39200"
+        derivadas = " · ".join(f"{m['titulo']}: <b>{formatar(nome, getattr(linha, nome, None))}</b>"
+                               for nome, m in METRICAS_DERIVADAS.items())
+        n_itens = getattr(linha, "n_itens", None)
+        itens = "" if n_itens is None else f'<br><span style="font-size:14px;">🧩 {n_itens} propriedades</span>'
+
+        col = colunas[idx % 3]
+        with col:
+            with st.container():
+                # Card visual
+                st.markdown(
+                    f"""
+                    <div class="card custom">
+                        <h4 title="{conta}">{conta}</h4>
+                        <div class="card-grid">
+                            <div>
+                                <b>Receita:</b><br>
+                                <span class="receita-valor">R$ {total_revenue:,.2f}</span><br>
+                                <span style="font-size:16px;"><b>Variação:</b>
+                                <span class="{ 'var-positivo' if var_revenue >= 0 else 'var-negativo' }">{var_revenue:+.1f}%</span></span>
                             </div>
-                            <div class="meta-row">
-                                <span style="color:{cor_meta};"><b>Atingimento previsto:</b> {progresso_meta:.2f}%</span>
-                                <span style="color:{cor_meta};"><b>Meta total:</b> R$ {meta_geral:,.0f}</span>
+                            <div>
+                                <b>Sessões:</b><br>{total_sessions:,.0f}{agora}{itens}
                             </div>
                         </div>
-                        """,
-                        unsafe_allow_html=True
-                    )
+                        <div style="font-size:14px;margin-top:6px;">{derivadas}</div>
+                        <div class="meta-row">
+                            <span style="color:{cor_meta};"><b>Atingimento previsto:</b> {progresso_meta:.2f}%</span>
+                            <span style="color:{cor_meta};"><b>Meta total:</b> R$ {meta_geral:,.0f}</span>
+                        </div>
+                    </div>
+                    """,
+                    unsafe_allow_html=True
+                )
 
-                    # 🔹 Botões reais dentro do card
-                    st.markdown('<div class="card-buttons">', unsafe_allow_html=True)
+                # 🔹 Botões reais dentro do card
+                st.markdown('<div class="card-buttons">', unsafe_allow_html=True)
 
+                # Detalhes e edição são por propriedade; cards de conta só somam
+                if n_itens is None:
                     col_btn1, col_btn2 = st.columns(2)
                     with col_btn1:
                         if st.button("🕵️ Ver detalhes", key=f"detalhes_{conta}"):
-                            st.session_state["conta_selecionada"] = conta
-                            st.session_state["page"] = "detalhes"
-                            st.rerun()
+                            st.switch_page(PAGINA_DETALHES, query_params={"conta": conta})
 
                     with col_btn2:
                         if st.button("✏️ Editar conta", key=f"editar_{conta}"):
@@ -406,10 +431,16 @@ if True:
                             st.session_state["editar_conta"] = conta
                             st.session_state["abrir_card_edicao"] = True
 
-                    st.markdown('</div>', unsafe_allow_html=True)
-    # ======================
-    # ⚙️ Gerenciamento de Contas (no final do dashboard)
-    # ======================
+                st.markdown('</div>', unsafe_allow_html=True)
+    perfil_painel.encerrar("cards")
+    exibir_perfil(perfil_painel, "painel de contas")
+
+# ======================
+# ⚙️ Gerenciamento de Contas (no final do dashboard)
+# ======================
+@st.fragment
+def gerenciar_contas():
+    """Tabela de contas. Editar metas reexecuta só a tabela; ativar/inativar recarrega o app (muda os cards)."""
     with st.expander("🧩 Gerenciar Contas", expanded=False):
         st.markdown("### Lista de Contas – Configurações e Status")
 
@@ -488,7 +519,7 @@ if True:
                                 df_config.loc[df_config["property_display"] == conta, "meta"] = nova_meta
                                 df_config.to_csv(CSV_PATH, sep=";", index=False)
                                 st.success(f"Meta da conta **{conta}** atualizada para R$ {nova_meta:,.0f}!")
-                                st.rerun()
+                                st.rerun(scope="fragment")
                         with c2:
                             # Alterna status
                             if str(status_atual).lower() == "ativo":
@@ -505,138 +536,145 @@ if True:
                                     st.rerun()
 
 
+def pagina_dashboard():
+    """Painel com todas as contas ativas: base inteira, config, cards e gerenciamento."""
+    # Link antigo/compartilhado com ?conta= abre direto a página de detalhes
+    if st.query_params.get("conta"):
+        st.switch_page(PAGINA_DETALHES, query_params={"conta": st.query_params["conta"]})
+
+    versao = observador_dados().versao()
+    with perfil.secao("carga de dados"):
+        if not motor:
+            periodos_precalculados(versao, date.today())
+
+    with perfil.secao("config"):
+        contas_ativas = carregar_config()
+
+    cabecalho(versao)
+    painel_contas(contas_ativas)
+    gerenciar_contas()
+
+
 # ======================
 # ========== PÁGINA DE DETALHES ==========
 # ======================
-if True:
-    if st.session_state["page"] == "detalhes":
-
-        conta = st.session_state["conta_selecionada"]
-        st.title(f"📊 Detalhes da conta: {conta}")
-
-        # -----------------------------
-        # 🔹 Filtro de período
-        # -----------------------------
-        # ======================
-        # 📅 Botões de período na mesma linha do título
-        # ======================
-        col_titulo, col1, col2, col3, col4 = st.columns([1.5, 1, 1, 1, 1])
-
-        with col_titulo:
-            st.markdown("### 📅 Período de análise")
-
-        # Inicializa período na sessão
-        if "opcao_periodo" not in st.session_state:
-            st.session_state.opcao_periodo = "Mês atual"
-
-        periodos = ["Mês atual", "Últimos 30 dias", "Últimos 15 dias", "Últimos 7 dias"]
-
-        # Renderiza os botões lado a lado, após o título
-        for i, col in enumerate([col1, col2, col3, col4]):
-            with col:
-                ativo = st.session_state.opcao_periodo == periodos[i]
-                if st.button(periodos[i], key=f"btn_{i}"):
-                    st.session_state.opcao_periodo = periodos[i]
-                    st.rerun()
-
-        # Define o período ativo
-        opcao_periodo = st.session_state.opcao_periodo
-        periodo = calcular_periodo(opcao_periodo)
-
-        # aplica o período selecionado
-        opcao_periodo = st.session_state.opcao_periodo
-        periodo = calcular_periodo(opcao_periodo)
-
-        # feedback visual do filtro ativo
-        st.markdown(
-            f"📆 **Filtro ativo:** `{opcao_periodo}` — "
-            f"de {periodo['inicio_atual'].strftime('%d/%m/%Y')} até {periodo['fim_atual'].strftime('%d/%m/%Y')}"
-        )
+@st.fragment
+def graficos_conta(conta):
+    """Período e gráficos da conta: trocar o período reexecuta só este trecho."""
+    perfil_graficos = perfil.fragmento()
+    periodo = seletor_periodo("btn_")
+
+    # -----------------------------
+    # 🔹 Filtra os dados da conta e do período selecionado
+    # -----------------------------
+    perfil_graficos.iniciar("filtro de período")
+    if motor:
+        df_conta = motor.linhas_conta(conta, periodo["inicio_atual"], periodo["fim_atual"])
+    else:
+        # Período já recortado para esta conta: só uma consulta ao dicionário
+        df_conta = na_versao_atual(series_conta, conta, date.today())[st.session_state.opcao_periodo]
+    perfil_graficos.encerrar("filtro de período")
+
+    # Garante que as colunas *_prev* existam (caso alguma esteja ausente)
+    colunas_prev = ["purchaseRevenue_prev", "sessions_prev", "transactions_prev"]
+    faltando = [c for c in colunas_prev if c not in df_conta.columns]
+    if faltando:
+        # assign devolve um novo DataFrame: a série vem do cache e não pode ser alterada
+        df_conta = df_conta.assign(**{c: np.nan for c in faltando})
+
+    # -----------------------------
+    # 📊 Gráficos comparativos
+    # -----------------------------
+    st.markdown("---")
+    st.subheader("📈 Desempenho – Atual vs Período anterior")
+
+    # Os gráficos vêm do mesmo registro dos relatórios em lote, alternando entre as duas colunas
+    colunas_graficos = st.columns(2)
+    for idx, (metrica, titulo) in enumerate(GRAFICOS_DETALHES):
+        with colunas_graficos[idx % 2]:
+            grafico_combinado(df_conta, metrica, titulo, perfil_graficos)
+
+    exibir_perfil(perfil_graficos, "gráficos da conta")
+
+
+def pagina_detalhes():
+    """Uma conta (``?conta=``): só a série dela é recortada; nada do painel é montado."""
+    conta = st.query_params.get("conta")
+    if not conta:
+        st.switch_page(PAGINA_DASHBOARD)
+
+    versao = observador_dados().versao()
+    with perfil.secao("carga de dados"):
+        # Só a série desta conta: o pré-cálculo de todos os períodos é do painel
+        if not motor:
+            series_conta(versao, conta, date.today())
+
+    cabecalho(versao)
+    st.title(f"📊 Detalhes da conta: {conta}")
+
+    graficos_conta(conta)
+
+    # -----------------------------
+    # 🔹 Botões de navegação
+    # -----------------------------
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button("⬅️ Voltar para o painel principal"):
+            st.switch_page(PAGINA_DASHBOARD)
+    with col2:
+        if st.button("✏️ Editar conta", key=f"editar_{conta}"):
+            edit(conta)
+            st.session_state["editar_conta"] = conta
+            st.session_state["abrir_card_edicao"] = True
+
+    # -----------------------------
+    # 🔗 Card de links da conta
+    # -----------------------------
+    if os.path.exists(CSV_PATH):
+        df_config = pd.read_csv(CSV_PATH, sep=";")
+        df_config_conta = df_config[df_config["property_display"] == conta]
+
+        if not df_config_conta.empty:
+            links = links_conta(df_config_conta.iloc[0])
+
+            if links:
+                html_links = "<ul style='margin:0; padding-left:20px;'>"
+                for link in links:
+                    html_links += f"<li><a href='{link['url']}' target='_blank' style='color:#005B82; text-decoration:none;'>{link['titulo']}</a></li>"
+                html_links += "</ul>"
+
+                st.markdown(
+                    f"""
+                    <div class="card links-card">
+                        <h4>🔗 Links da conta</h4>
+                        {html_links}
+                    </div>
+                    """,
+                    unsafe_allow_html=True
+                )
+            else:
+                st.info("Nenhum link configurado para esta conta.")
+        else:
+            st.warning("Conta não encontrada no arquivo de configuração.")
+    else:
+        st.error("⚠️ Arquivo de configuração não encontrado.")
 
-        periodo = calcular_periodo(opcao_periodo)
-
-        # -----------------------------
-        # 🔹 Filtra os dados da conta e do período selecionado
-        # -----------------------------
-        df_conta = df[
-            (df["property_display"] == conta) &
-            (df["date"] >= periodo["inicio_atual"]) &
-            (df["date"] <= periodo["fim_atual"])
-        ].copy()
-
-        # Garante que as colunas *_prev* existam (caso alguma esteja ausente)
-        colunas_prev = ["purchaseRevenue_prev", "sessions_prev", "transactions_prev", "conversion_rate_prev"]
-        for c in colunas_prev:
-            if c not in df_conta.columns:
-                df_conta[c] = np.nan
-
-        # -----------------------------
-        # 📊 Gráficos comparativos
-        # -----------------------------
-        st.markdown("---")
-        st.subheader("📈 Desempenho – Atual vs Período anterior")
-
-        col1, col2 = st.columns(2)
-        with col1:
-            grafico_combinado(df_conta, "purchaseRevenue", "Receita – Atual vs Anterior")
-            grafico_combinado(df_conta, "sessions", "Sessões – Atual vs Anterior")
 
-        with col2:
-            grafico_combinado(df_conta, "transactions", "Transações – Atual vs Anterior")
-            grafico_combinado(df_conta, "conversion_rate", "Taxa de Conversão (%) – Atual vs Anterior")
+# ============================================================
+# 🧭 NAVEGAÇÃO
+# ============================================================
+PAGINA_DASHBOARD = st.Page(pagina_dashboard, title="Dashboard", icon="📊", url_path="dashboard", default=True)
+PAGINA_DETALHES = st.Page(pagina_detalhes, title="Detalhes da conta", icon="🕵️", url_path="detalhes")
 
-        # -----------------------------
-        # 🔹 Botões de navegação
-        # -----------------------------
-        col1, col2 = st.columns(2)
-        with col1:
-            if st.button("⬅️ Voltar para o painel principal"):
-                st.session_state["page"] = "dashboard"
-                st.session_state.pop("conta_selecionada", None)
-                st.query_params.clear()
-                st.rerun()
-        with col2:
-            if st.button("✏️ Editar conta", key=f"editar_{conta}"):
-                edit(conta)
-                st.session_state["editar_conta"] = conta
-                st.session_state["abrir_card_edicao"] = True
-
-        # -----------------------------
-        # 🔗 Card de links da conta
-        # -----------------------------
-        if os.path.exists(CSV_PATH):
-            df_config = pd.read_csv(CSV_PATH, sep=";")
-            df_config_conta = df_config[df_config["property_display"] == conta]
-
-            if not df_config_conta.empty:
-                row = df_config_conta.iloc[0]
-                links = []
-                for i in range(1, 7):
-                    titulo = row.get(f"t_link{i}", "")
-                    url = row.get(f"link{i}", "")
-                    if pd.notna(url) and str(url).strip():
-                        titulo_exibicao = titulo if pd.notna(titulo) and str(titulo).strip() else f"Link {i}"
-                        links.append({"titulo": titulo_exibicao, "url": url})
-
-                if links:
-                    html_links = "<ul style='margin:0; padding-left:20px;'>"
-                    for link in links:
-                        html_links += f"<li><a href='{link['url']}' target='_blank' style='color:#005B82; text-decoration:none;'>{link['titulo']}</a></li>"
-                    html_links += "</ul>"
-
-                    st.markdown(
-                        f"""
-                        <div class="card links-card">
-                            <h4>🔗 Links da conta</h4>
-                            {html_links}
-                        </div>
-                        """,
-                        unsafe_allow_html=True
-                    )
-                else:
-                    st.info("Nenhum link configurado para esta conta.")
-            else:
-                st.warning("Conta não encontrada no arquivo de configuração.")
-        else:
-            st.error("⚠️ Arquivo de configuração não encontrado.")
+pagina = st.navigation([PAGINA_DASHBOARD, PAGINA_DETALHES], position="hidden")
+try:
+    pagina.run()
+except VersaoAlterada:
+    # A base foi trocada entre a versão publicada e a leitura: publica a nova e refaz o rerun
+    observador_dados().verificar()
+    st.rerun()
 
+# ======================
+# ⏱️ PAINEL DE PERFIL (opcional)
+# ======================
+exibir_perfil(perfil, "página", area=st.sidebar)
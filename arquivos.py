@@ -0,0 +1,62 @@
+"""Utilitários de leitura/gravação de arquivos de dados compartilhados pelo pipeline e pelo app."""
+import hashlib
+import io
+import os
+import tempfile
+
+
+def hash_arquivo(caminho):
+    """SHA-256 do conteúdo de um arquivo (None se ele não existir)."""
+    if not os.path.exists(caminho):
+        return None
+    h = hashlib.sha256()
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(1 << 20), b''):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+def versao_arquivo(caminho):
+    """Identificador barato da versão em disco (mtime em ns + tamanho)."""
+    try:
+        st = os.stat(caminho)
+    except FileNotFoundError:
+        return None
+    return f"{st.st_mtime_ns}-{st.st_size}"
+
+
+def gravar_bytes_atomico(conteudo, caminho):
+    """Grava em um temporário no mesmo diretório e troca com os.replace.
+
+    Leitores nunca veem um arquivo pela metade: ou leem a versão antiga ou a nova.
+    """
+    diretorio = os.path.dirname(os.path.abspath(caminho))
+    fd, tmp = tempfile.mkstemp(dir=diretorio, prefix=".tmp_", suffix=os.path.basename(caminho))
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(conteudo)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, caminho)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def salvar_csv_atomico(df, caminho, somente_se_mudou=True, **kwargs):
+    """Salva o DataFrame como CSV de forma atômica.
+
+    Com ``somente_se_mudou`` o arquivo não é tocado quando o conteúdo é idêntico,
+    preservando o mtime (e, portanto, os caches do dashboard). Retorna True se gravou.
+    """
+    kwargs.setdefault('sep', ';')
+    kwargs.setdefault('index', False)
+    buffer = io.StringIO()
+    df.to_csv(buffer, **kwargs)
+    conteudo = buffer.getvalue().encode('utf-8')
+
+    if somente_se_mudou and hash_arquivo(caminho) == hashlib.sha256(conteudo).hexdigest():
+        return False
+    gravar_bytes_atomico(conteudo, caminho)
+    return True
@@ -0,0 +1,189 @@
+"""Carga retroativa do histórico (ex.: 2 anos de uma conta recém-chegada).
+
+A coleta normal só busca a janela de 100 dias. Aqui o intervalo pedido é
+quebrado em blocos mensais por propriedade — cada bloco corresponde a uma
+partição ``mes=AAAA-MM/<property_id>`` do ``historico.Historico`` — e os
+blocos são buscados em paralelo, no ritmo do ``cota.AgendadorCota``::
+
+    python backfill.py --inicio 2023-01-01 --workers 4
+    python backfill.py --meses 24 --contas "Loja X – GA4"
+
+Cada bloco concluído vai direto para o histórico (mesclado com o que já existe
+no mês, a coleta mais recente prevalece) e é marcado no arquivo de estado por
+propriedade e mês, com os dias cobertos. A chave não depende do intervalo
+pedido: rodar o comando de novo — mesmo num outro dia, com ``--fim`` padrão
+já diferente — busca só os blocos que faltam (e o mês corrente, se ele cresceu).
+``--refazer`` ignora o estado e busca tudo de novo.
+
+O estado fica dentro da raiz do histórico (``<raiz>/.backfill_estado``), já que
+descreve o que aquele histórico tem; ``--estado`` escolhe outro diretório.
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from datetime import date, timedelta
+
+import pandas as pd
+
+import coletar_dados
+from arquivos import gravar_bytes_atomico
+from clientes_ga4 import FabricaClientes
+from cota import AgendadorCota
+from historico import HISTORICO_DIR, Historico
+from telemetria import RelatorioColeta
+
+ESTADO_DIR = '.backfill_estado'
+ESTADO_FILE = 'concluidos.json'
+RELATORIO_FILE = 'relatorio_backfill.json'
+MESES_PADRAO = 24
+
+
+def blocos_mensais(inicio, fim):
+    """Divide [inicio, fim] em blocos (mes, início, fim) que não atravessam a virada do mês."""
+    blocos = []
+    for periodo in pd.period_range(pd.Timestamp(inicio), pd.Timestamp(fim), freq='M'):
+        blocos.append((
+            str(periodo),
+            max(inicio, periodo.start_time.date()),
+            min(fim, periodo.end_time.date()),
+        ))
+    return blocos
+
+
+def montar_tarefas(props, inicio, fim):
+    """Uma tarefa por (propriedade, mês), no formato aceito pelo ``AgendadorCota``."""
+    return [
+        {**prop, 'mes': mes, 'inicio': ini, 'fim': fim_bloco}
+        for prop in props
+        for mes, ini, fim_bloco in blocos_mensais(inicio, fim)
+    ]
+
+
+def chave_tarefa(tarefa):
+    return f"{tarefa['property_id']}|{tarefa['mes']}"
+
+
+class EstadoBackfill:
+    """Dias já gravados no histórico por ``propriedade|mês`` (arquivo JSON, gravação atômica).
+
+    Cada chave guarda o intervalo [início, fim] buscado naquele mês; um bloco
+    está concluído se o intervalo pedido cabe no guardado.
+    """
+
+    def __init__(self, raiz=ESTADO_DIR):
+        self.caminho = os.path.join(raiz, ESTADO_FILE)
+        self._lock = threading.Lock()
+        try:
+            with open(self.caminho, encoding='utf-8') as f:
+                self.concluidos = json.load(f).get('concluidos', {})
+        except (OSError, ValueError):
+            self.concluidos = {}
+
+    def concluido(self, tarefa):
+        coberto = self.concluidos.get(chave_tarefa(tarefa))
+        return (coberto is not None and coberto[0] <= tarefa['inicio'].isoformat()
+                and tarefa['fim'].isoformat() <= coberto[1])
+
+    def marcar(self, tarefa):
+        inicio, fim = tarefa['inicio'].isoformat(), tarefa['fim'].isoformat()
+        with self._lock:
+            coberto = self.concluidos.get(chave_tarefa(tarefa))
+            # Intervalos que se tocam (ex.: o mês corrente que cresceu) viram um só
+            if coberto is not None and coberto[0] <= fim and inicio <= coberto[1]:
+                inicio, fim = min(inicio, coberto[0]), max(fim, coberto[1])
+            self.concluidos[chave_tarefa(tarefa)] = [inicio, fim]
+            os.makedirs(os.path.dirname(self.caminho), exist_ok=True)
+            conteudo = json.dumps({'concluidos': self.concluidos}, indent=1, sort_keys=True)
+            gravar_bytes_atomico(conteudo.encode('utf-8'), self.caminho)
+
+    def limpar(self):
+        if os.path.exists(self.caminho):
+            os.remove(self.caminho)
+
+
+def executar_backfill(analytics_data, props, inicio, fim, historico=None, estado=None,
+                      relatorio=None, agendador=None, workers=1):
+    """Busca os blocos pendentes e grava cada um no histórico. Retorna os blocos que falharam."""
+    historico = historico or Historico()
+    estado = estado or EstadoBackfill()
+    tarefas = montar_tarefas(props, inicio, fim)
+    pendentes = [t for t in tarefas if not estado.concluido(t)]
+    if len(pendentes) < len(tarefas):
+        print(f"♻️  Retomando: {len(tarefas) - len(pendentes)} de {len(tarefas)} blocos já no histórico")
+
+    falhas = []
+
+    def coletar_bloco(tarefa):
+        try:
+            df = coletar_dados.run_ga_daily(analytics_data, tarefa['property_id'], tarefa['inicio'], tarefa['fim'],
+                                            relatorio, agendador, levantar_erros=True)
+        except Exception:
+            falhas.append(tarefa)
+            return
+        if not df.empty:
+            df['account_display'] = tarefa['account_display']
+            df['property_display'] = tarefa['property_display']
+            df['property_id'] = tarefa['property_id']
+            historico.acumular(df)
+        estado.marcar(tarefa)
+
+    if agendador is not None:
+        agendador.executar(pendentes, coletar_bloco, workers=workers)
+    else:
+        for tarefa in pendentes:
+            coletar_bloco(tarefa)
+    return falhas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Carga retroativa do histórico em blocos mensais")
+    parser.add_argument('--inicio', type=date.fromisoformat, help="primeiro dia (AAAA-MM-DD)")
+    parser.add_argument('--fim', type=date.fromisoformat, help="último dia (padrão: ontem)")
+    parser.add_argument('--meses', type=int, default=MESES_PADRAO,
+                        help=f"sem --inicio, quantos meses antes do fim (padrão: {MESES_PADRAO})")
+    parser.add_argument('--contas', nargs='+', help="limita a estas propriedades (property_display)")
+    parser.add_argument('--workers', type=int, default=coletar_dados.WORKERS_COLETA)
+    parser.add_argument('--config', default=coletar_dados.CONFIG_FILE)
+    parser.add_argument('--raiz', default=HISTORICO_DIR)
+    parser.add_argument('--estado', help=f"diretório do estado (padrão: <raiz>/{ESTADO_DIR})")
+    parser.add_argument('--refazer', action='store_true', help="ignora o estado e busca todos os blocos de novo")
+    args = parser.parse_args(argv)
+
+    fim = args.fim or date.today() - timedelta(days=1)
+    inicio = args.inicio or (pd.Timestamp(fim) - pd.DateOffset(months=args.meses) + pd.Timedelta(days=1)).date()
+    if inicio > fim:
+        parser.error("--inicio depois de --fim")
+
+    inicio_exec = time.perf_counter()
+    fabrica = FabricaClientes(coletar_dados.autenticar())
+    analytics_data, analytics_admin = coletar_dados.criar_clientes(fabrica)
+    props = coletar_dados.filtrar_propriedades_ativas(coletar_dados.listar_propriedades(analytics_admin),
+                                                      args.config)
+    if args.contas:
+        pedidas = set(args.contas)
+        props = [p for p in props if p['property_display'] in pedidas]
+
+    estado_dir = args.estado or os.path.join(args.raiz, ESTADO_DIR)
+    estado = EstadoBackfill(estado_dir)
+    if args.refazer:
+        estado.limpar()
+        estado = EstadoBackfill(estado_dir)
+    relatorio = RelatorioColeta()
+    print(f"📦 Backfill de {inicio:%d/%m/%Y} a {fim:%d/%m/%Y}: {len(props)} propriedades × "
+          f"{len(blocos_mensais(inicio, fim))} meses")
+    falhas = executar_backfill(analytics_data, props, inicio, fim, Historico(args.raiz), estado,
+                               relatorio, AgendadorCota(), workers=args.workers)
+
+    resumo = relatorio.salvar(RELATORIO_FILE)
+    print(f"📈 {resumo['requisicoes']} requisições, {resumo['linhas']} linhas em "
+          f"{time.perf_counter() - inicio_exec:.1f}s → {RELATORIO_FILE}")
+    if falhas:
+        raise coletar_dados.ColetaIncompleta(
+            f"{len(falhas)} blocos falharam; rode o comando de novo para buscar só eles.")
+    print("✅ Backfill concluído")
+
+
+if __name__ == "__main__":
+    main()
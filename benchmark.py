@@ -0,0 +1,200 @@
+"""Benchmark do pipeline coleta → montagem → carga → períodos → cards.
+
+Roda offline (API do GA4 substituída por ``fake_ga4``) com N propriedades × D
+dias, pelos mesmos caminhos da produção: coleta com checkpoint e publicação
+das partes, montagem a partir de ``ga4_partes/``, leitura da base e o
+pré-cálculo de períodos e a consulta dos cards do dashboard.
+
+Os tempos são comparados com um baseline em JSON em unidades relativas: cada
+etapa é dividida pelo tempo de uma carga de referência fixa (``calibrar``)
+medida na mesma execução (antes e depois das etapas, vale a mais rápida), então
+o baseline não depende da velocidade da máquina.
+
+Uso:
+    python benchmark.py                          # compara com benchmark_baseline.json
+    python benchmark.py --salvar-baseline        # grava os tempos atuais como baseline
+    python benchmark.py --tamanhos 10 100 --repeticoes 3 --tolerancia 0.3
+    python benchmark.py --ci --tamanhos 10 100   # no CI: sem baseline é falha, não aviso
+
+Sai com código 1 se alguma etapa ficar mais lenta que ``baseline × (1 + tolerância)``
+(em unidades relativas). Se o CI tiver um perfil muito diferente (ex.: disco
+lento), regere o baseline no próprio runner com ``--salvar-baseline`` e versione.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+import coletar_dados
+import montar_base
+from analise import consultar_resumo, precalcular_periodos
+from dados import ler_base
+from fake_ga4 import ClienteDataFalso, propriedades_falsas
+from sinteticos import gerar_base_bruta
+from staging import AreaStaging
+
+BASELINE_FILE = 'benchmark_baseline.json'
+TAMANHOS_PADRAO = [10, 100, 1000, 10000]
+DIAS = 100
+META = 100000
+# Diferenças abaixo disso (em segundos nesta máquina) são ruído de medição, não regressão
+MINIMO_ABSOLUTO = 0.05
+REPETICOES_CALIBRACAO = 5
+
+
+def cronometrar(funcao, repeticoes):
+    """Executa ``funcao`` ``repeticoes`` vezes e devolve (melhor tempo, último resultado)."""
+    melhor, resultado = float('inf'), None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        # As etapas imprimem progresso por propriedade; isso não faz parte da medição
+        with contextlib.redirect_stdout(io.StringIO()):
+            resultado = funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor, resultado
+
+
+def calibrar(repeticoes=REPETICOES_CALIBRACAO):
+    """Tempo (s) de uma carga de referência fixa: CSV de ida e volta e um ``groupby`` do pandas.
+
+    É a unidade dos tempos relativos; mede o mesmo tipo de trabalho das etapas
+    e não muda com o código do pipeline.
+    """
+    df = gerar_base_bruta(200, DIAS, fim='2026-01-01')
+
+    def referencia():
+        buffer = io.StringIO()
+        df.to_csv(buffer, sep=';', index=False)
+        buffer.seek(0)
+        lido = ler_base(buffer)
+        return lido.groupby('property_display', observed=True)[['sessions', 'purchaseRevenue']].sum()
+
+    return cronometrar(referencia, repeticoes)[0]
+
+
+def medir_tamanho(n_propriedades, repeticoes=1):
+    """Tempos (s) de cada etapa para ``n_propriedades`` × ``DIAS``."""
+    tempos = {}
+    inicio, fim = coletar_dados.periodo_coleta(dias=DIAS)
+    props = propriedades_falsas(n_propriedades)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        saida = os.path.join(tmp, 'ga4_100.csv')
+        partes = os.path.join(tmp, 'ga4_partes')
+
+        # 1. Coleta (API falsa, sem latência): páginas → staging → ga4_partes/ + CSV, como em ``main``
+        def coletar():
+            staging = AreaStaging('benchmark', raiz=os.path.join(tmp, 'staging'))
+            staging.limpar()
+            falhas = coletar_dados.coletar_com_checkpoint(ClienteDataFalso(), props, inicio, fim, staging)
+            coletar_dados.publicar_coleta(staging, falhas, saida, partes)
+        tempos['coleta'], _ = cronometrar(coletar, repeticoes)
+
+        # 2. Montagem da base comparativa a partir das partes publicadas
+        tempos['montagem'], base = cronometrar(
+            lambda: montar_base.montar_base(montar_base.carregar_base(saida, partes)), repeticoes)
+
+        # 3. Carga no formato do dashboard
+        caminho = os.path.join(tmp, 'base_comparativa.csv')
+        base.to_csv(caminho, sep=';', index=False)
+        tempos['carga'], df = cronometrar(lambda: ler_base(caminho), repeticoes)
+
+    # 4. Todos os períodos, uma vez por versão da base (``periodos_precalculados`` do app)
+    hoje = df['date'].max()
+    tempos['periodos'], precalculados = cronometrar(lambda: precalcular_periodos(df, META, hoje), repeticoes)
+
+    # 5. Cards de um clique: consulta ao período pré-calculado, filtrada e ordenada
+    ativas = df['property_display'].cat.categories[::2]
+    tempos['cards'], _ = cronometrar(
+        lambda: consultar_resumo(precalculados["Últimos 30 dias"], "Receita total (R$)", ativas=ativas),
+        repeticoes)
+
+    return tempos
+
+
+def relativos(tempos, unidade):
+    """Tempos em múltiplos da carga de referência."""
+    return {etapa: t / unidade for etapa, t in tempos.items()}
+
+
+def comparar_com_baseline(resultados, baseline, tolerancia, unidade):
+    """Lista de regressões: (tamanho, etapa, baseline, atual), em unidades relativas."""
+    regressoes = []
+    for tamanho, etapas in resultados.items():
+        for etapa, atual in etapas.items():
+            base = baseline.get(tamanho, {}).get(etapa)
+            if base is None:
+                continue
+            if atual > base * (1 + tolerancia) and (atual - base) * unidade > MINIMO_ABSOLUTO:
+                regressoes.append((tamanho, etapa, base, atual))
+    return regressoes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark do pipeline do dashboard GA4")
+    parser.add_argument('--tamanhos', type=int, nargs='+', default=TAMANHOS_PADRAO,
+                        help="números de propriedades a medir")
+    parser.add_argument('--repeticoes', type=int, default=1, help="execuções por etapa (vale a melhor)")
+    parser.add_argument('--tolerancia', type=float, default=0.5,
+                        help="folga relativa antes de acusar regressão (0.5 = 50%%)")
+    parser.add_argument('--baseline', default=BASELINE_FILE)
+    parser.add_argument('--salvar-baseline', action='store_true')
+    parser.add_argument('--ci', action='store_true', default=bool(os.environ.get('CI')),
+                        help="baseline ausente ou sem o tamanho medido é falha (padrão se CI estiver definido)")
+    args = parser.parse_args(argv)
+
+    antes = calibrar()
+    absolutos = {str(n): medir_tamanho(n, args.repeticoes) for n in args.tamanhos}
+    # Carga passageira na máquina só deixa a referência mais lenta: vale a melhor das duas medições
+    unidade = min(antes, calibrar())
+    print(f"📏 Carga de referência: {unidade:.3f}s (1 unidade)")
+    resultados = {}
+    for n, tempos in absolutos.items():
+        resultados[n] = relativos(tempos, unidade)
+        print(f"{n:>6} propriedades: " + "  ".join(
+            f"{k}={v:.3f}s ({v / unidade:.2f}u)" for k, v in tempos.items()))
+
+    if args.salvar_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding='utf-8') as f:
+                baseline = json.load(f)
+            if 'unidade' not in baseline:
+                baseline = {}  # baseline antigo, em segundos absolutos: não mistura
+        baseline.setdefault('resultados', {}).update(
+            {n: {etapa: round(t, 4) for etapa, t in tempos.items()} for n, tempos in resultados.items()})
+        baseline['unidade'] = 'múltiplos da carga de referência (calibrar)'
+        baseline['ambiente'] = {'python': platform.python_version(), 'maquina': platform.machine()}
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"💾 Baseline salvo em {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"{'❌' if args.ci else '⚠️'} Baseline {args.baseline} não encontrado; rode com --salvar-baseline.")
+        return 1 if args.ci else 0
+
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f).get('resultados', {})
+    sem_baseline = [n for n in resultados if n not in baseline]
+    if sem_baseline:
+        print(f"{'❌' if args.ci else '⚠️'} Sem baseline para {', '.join(sem_baseline)} propriedades")
+        if args.ci:
+            return 1
+
+    regressoes = comparar_com_baseline(resultados, baseline, args.tolerancia, unidade)
+    for tamanho, etapa, base, atual in regressoes:
+        print(f"❌ Regressão em {etapa} ({tamanho} propriedades): {base:.2f}u → {atual:.2f}u")
+    if regressoes:
+        return 1
+    print("✅ Nenhuma regressão em relação ao baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,138 @@
+"""Fábrica dos clientes das APIs do GA4 (Data e Admin).
+
+- Os documentos de discovery ficam em disco (``.cache_discovery/``): a partir da
+  segunda execução o ``build`` não baixa nem procura nada, só lê o JSON local.
+- O ``httplib2.Http`` não é seguro entre threads, então cada thread recebe o
+  seu próprio cliente, com uma sessão autorizada mantida viva (keep-alive) e
+  respostas comprimidas (gzip).
+- Os tempos de inicialização ficam em ``fabrica.tempos`` e vão para o relatório
+  da coleta.
+
+Nada aqui importa ``googleapiclient`` no carregamento do módulo, então a
+coleta com ``fake_ga4`` continua rodando sem as bibliotecas do Google.
+"""
+import json
+import os
+import threading
+import time
+
+from arquivos import gravar_bytes_atomico
+
+DISCOVERY_DIR = '.cache_discovery'
+APIS = {
+    'data': ('analyticsdata', 'v1beta'),
+    'admin': ('analyticsadmin', 'v1beta'),
+}
+TIMEOUT_S = 60
+# O Google só comprime a resposta quando o user-agent contém "gzip"
+USER_AGENT = 'dashboard-ga4-coleta (gzip)'
+
+
+def caminho_discovery(servico, versao, cache_dir=DISCOVERY_DIR):
+    return os.path.join(cache_dir, f"{servico}.{versao}.json")
+
+
+def carregar_discovery(servico, versao, cache_dir=DISCOVERY_DIR):
+    """Documento de discovery: cache em disco → cópia embutida no googleapiclient → download."""
+    caminho = caminho_discovery(servico, versao, cache_dir)
+    try:
+        with open(caminho, encoding='utf-8') as f:
+            return f.read()
+    except FileNotFoundError:
+        pass
+
+    from googleapiclient.discovery_cache import get_static_doc
+
+    documento = get_static_doc(servico, versao)
+    if documento is None:
+        documento = baixar_discovery(servico, versao)
+
+    json.loads(documento)  # não grava lixo no cache
+    os.makedirs(cache_dir, exist_ok=True)
+    gravar_bytes_atomico(documento.encode('utf-8'), caminho)
+    return documento
+
+
+def baixar_discovery(servico, versao):
+    """Baixa o documento como o ``build`` faz: URI v1 e, se ela não existir, a v2."""
+    import httplib2
+    from googleapiclient.discovery import DISCOVERY_URI, V2_DISCOVERY_URI
+
+    http = httplib2.Http(timeout=TIMEOUT_S)
+    status = None
+    for uri in (DISCOVERY_URI, V2_DISCOVERY_URI):
+        resposta, conteudo = http.request(uri.format(api=servico, apiVersion=versao))
+        if resposta.status < 400:
+            return conteudo.decode('utf-8')
+        status = resposta.status
+        if status != 404:
+            break
+    raise RuntimeError(f"Discovery de {servico} {versao} falhou: HTTP {status}")
+
+
+class FabricaClientes:
+    """Clientes por thread, construídos a partir dos documentos de discovery em cache."""
+
+    def __init__(self, creds, cache_dir=DISCOVERY_DIR, timeout=TIMEOUT_S):
+        self.creds = creds
+        self.cache_dir = cache_dir
+        self.timeout = timeout
+        self._documentos = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.tempos = {}
+
+    def _documento(self, api):
+        with self._lock:
+            if api not in self._documentos:
+                inicio = time.perf_counter()
+                self._documentos[api] = carregar_discovery(*APIS[api], self.cache_dir)
+                self.tempos[f'discovery_{api}_s'] = round(time.perf_counter() - inicio, 4)
+            return self._documentos[api]
+
+    def _sessao(self):
+        """Sessão autorizada da thread atual (uma conexão keep-alive por thread)."""
+        if getattr(self._local, 'sessao', None) is None:
+            import google_auth_httplib2
+            import httplib2
+            from googleapiclient.http import set_user_agent
+
+            http = set_user_agent(httplib2.Http(timeout=self.timeout), USER_AGENT)
+            self._local.sessao = google_auth_httplib2.AuthorizedHttp(self.creds, http=http)
+        return self._local.sessao
+
+    def cliente(self, api):
+        """Cliente ``api`` ('data' ou 'admin') da thread atual."""
+        clientes = getattr(self._local, 'clientes', None)
+        if clientes is None:
+            clientes = self._local.clientes = {}
+        if api not in clientes:
+            from googleapiclient.discovery import build_from_document
+
+            documento = self._documento(api)
+            inicio = time.perf_counter()
+            clientes[api] = build_from_document(documento, http=self._sessao())
+            with self._lock:
+                self.tempos.setdefault(f'build_{api}_s', round(time.perf_counter() - inicio, 4))
+        return clientes[api]
+
+    def data(self):
+        return self.cliente('data')
+
+    def admin(self):
+        return self.cliente('admin')
+
+
+class ClientePorThread:
+    """Repassa ``properties()`` ao cliente Data da thread que chamou.
+
+    Pode ser passado no lugar de ``analytics_data`` para ``run_ga_daily`` e
+    para as funções de coleta, inclusive com ``workers > 1``.
+    """
+
+    def __init__(self, fabrica, api='data'):
+        self.fabrica = fabrica
+        self.api = api
+
+    def properties(self):
+        return self.fabrica.cliente(self.api).properties()
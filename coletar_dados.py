@@ -0,0 +1,512 @@
+import os
+import time
+import numpy as np
+import pandas as pd
+from datetime import date, timedelta
+
+from arquivos import salvar_csv_atomico
+from clientes_ga4 import ClientePorThread, FabricaClientes
+from cota import AgendadorCota
+from credenciais import criar_credenciais
+from historico import Historico
+from metricas import somente_base
+from particoes import PARTES_DIR, ArmazemParticionado
+from staging import AreaStaging, limpar_execucoes_antigas
+from telemetria import RELATORIO_FILE, RelatorioColeta
+
+# ==========================
+# ⚙️ Configuração de autenticação
+# ==========================
+TOKEN_FILE = 'token.json'
+CONFIG_FILE = 'contas_config.csv'
+SAIDA_FILE = 'ga4_100.csv'
+DIAS_COLETA = 100
+
+class ColetaIncompleta(RuntimeError):
+    """Algumas propriedades falharam; as concluídas continuam no staging para a retomada."""
+
+
+# Propriedades coletadas em paralelo (cada worker tem seu próprio cliente HTTP)
+WORKERS_COLETA = 4
+
+# Só contagens: taxas (conversão, ticket médio...) vêm do registro em ``metricas``
+COLUNAS_DIARIAS = ["date", "sessions", "transactions", "purchaseRevenue"]
+# O GA4 ainda consolida os últimos dias; a coleta incremental sempre os busca de novo
+DIAS_REPROCESSAMENTO = 3
+
+
+def autenticar():
+    """Credenciais compartilhadas por todas as threads da coleta (ver ``credenciais``).
+
+    Conta de serviço/workload via ``GOOGLE_APPLICATION_CREDENTIALS``, ou o
+    ``token.json`` do usuário; o navegador só é aberto em terminal interativo.
+    """
+    creds = criar_credenciais(token_file=TOKEN_FILE).iniciar_renovacao()
+    print(f"🔑 Credenciais: {creds.provedor.nome}")
+    return creds
+
+
+def criar_clientes(fabrica):
+    """Clientes das APIs Data e Admin do GA4 a partir de uma ``clientes_ga4.FabricaClientes``.
+
+    O cliente Data devolvido resolve o cliente da thread que chama, então pode
+    ser usado pela coleta com vários workers.
+    """
+    analytics_data = ClientePorThread(fabrica)
+    analytics_admin = fabrica.admin()
+    print("✅ Autenticado com sucesso!")
+    return analytics_data, analytics_admin
+
+
+# ==========================
+# Listar contas e propriedades
+# ==========================
+def listar_propriedades(analytics_admin):
+    """Lista todas as propriedades de todas as contas acessíveis."""
+    accounts = []
+    request = analytics_admin.accounts().list()
+    while request:
+        response = request.execute()
+        accounts.extend(response.get('accounts', []))
+        request = analytics_admin.accounts().list_next(previous_request=request, previous_response=response)
+
+    all_properties = []
+    for acc in accounts:
+        account_name = acc['name']
+        account_display_name = acc['displayName']
+        props_response = analytics_admin.properties().list(filter=f"parent:{account_name}").execute()
+        props = props_response.get('properties', [])
+        for prop in props:
+            all_properties.append({
+                'account_display': account_display_name,
+                'property_display': prop['displayName'],
+                'property_id': prop['name']
+            })
+    return all_properties
+
+
+# ==========================
+# 📁 Lê o arquivo de configuração e filtra contas ativas
+# ==========================
+def filtrar_propriedades_ativas(all_properties, config_path=CONFIG_FILE):
+    """Mantém apenas as propriedades marcadas como ativas no arquivo de configuração."""
+    config = pd.read_csv(config_path, sep=';')
+
+    # Normaliza e filtra somente as ativas (True, true, 1, etc.)
+    config['ativa'] = config['ativa'].astype(str).str.lower().isin(['true', '1', 'sim'])
+    config_ativas = config[config['ativa'] == True]
+
+    # Filtra as propriedades do GA4 conforme o arquivo de configuração
+    chaves_ativas = {
+        (c['account_display'].strip(), c['property_display'].strip())
+        for _, c in config_ativas.iterrows()
+    }
+    return [
+        p for p in all_properties
+        if (p['account_display'].strip(), p['property_display'].strip()) in chaves_ativas
+    ]
+
+
+# ==========================
+# Período de extração: últimos 100 dias
+# ==========================
+def periodo_coleta(hoje=None, dias=DIAS_COLETA):
+    """Retorna (início, fim) da janela de coleta."""
+    today = hoje or date.today()
+    return today - timedelta(days=dias), today
+
+
+# ==========================
+# Função para coletar dados diários
+# ==========================
+MAX_TENTATIVAS = 3
+# Máximo de linhas por página aceito pelo runReport
+LIMITE_PAGINA = 250_000
+STATUS_RETENTAVEIS = {429, 500, 502, 503, 504}
+# Tamanho aproximado de uma linha diária no JSON do runReport (data + 3 métricas);
+# a telemetria estima os bytes por ele em vez de serializar a página de novo
+BYTES_POR_LINHA = 120
+
+
+def status_http(erro):
+    """Status HTTP de um erro do googleapiclient (None se não for um erro HTTP)."""
+    resp = getattr(erro, 'resp', None)
+    status = getattr(resp, 'status', None)
+    return int(status) if status is not None else None
+
+
+def _executar_pagina(analytics_data, property_id, body, agendador=None):
+    """Uma chamada ``runReport`` com retentativas; devolve (resposta, tentativas, erro)."""
+    tentativas = 0
+    erro = None
+    while tentativas < MAX_TENTATIVAS:
+        tentativas += 1
+        # Com agendador, a requisição só sai quando cabe na cota da propriedade e do projeto
+        reservado = agendador.reservar(property_id) if agendador else 0
+        try:
+            response = analytics_data.properties().runReport(property=property_id, body=body).execute()
+            if agendador:
+                agendador.concluir(property_id, reservado, response.get("propertyQuota"))
+            return response, tentativas, None
+        except Exception as e:
+            erro = e
+            status = status_http(e)
+            if agendador:
+                agendador.falhou(property_id, status)
+            if status not in STATUS_RETENTAVEIS or tentativas >= MAX_TENTATIVAS:
+                break
+            # Backoff exponencial antes de tentar de novo (1s, 2s, ...); num 429 com
+            # agendador a espera já vem do balde da propriedade, esvaziado em falhou()
+            if not (agendador and status == 429):
+                time.sleep(2 ** (tentativas - 1))
+    return None, tentativas, erro
+
+
+def linhas_para_frame(rows):
+    """Converte as linhas de uma página em DataFrame, coluna a coluna (sem laço por linha)."""
+    if not rows:
+        return pd.DataFrame(columns=COLUNAS_DIARIAS)
+    return pd.DataFrame({
+        "date": pd.to_datetime([r["dimensionValues"][0]["value"] for r in rows], format="%Y%m%d"),
+        "sessions": np.array([r["metricValues"][0]["value"] for r in rows]).astype(np.int64),
+        "transactions": np.array([r["metricValues"][1]["value"] for r in rows]).astype(np.int64),
+        "purchaseRevenue": np.array([r["metricValues"][2]["value"] for r in rows]).astype(np.float64),
+    })
+
+
+def paginas_ga_daily(analytics_data, property_id, start_date, end_date, relatorio=None, agendador=None,
+                     limite=LIMITE_PAGINA):
+    """Gera a série diária de uma propriedade página a página (``limit``/``offset`` até ``rowCount``).
+
+    Só uma página fica em memória por vez. Cada página tem suas próprias
+    retentativas e entra na telemetria como uma requisição; se uma página
+    falhar de vez o erro é levantado — nunca devolve um resultado truncado.
+    A primeira página é sempre gerada, mesmo vazia.
+    """
+    body = {
+        "dateRanges": [{"startDate": start_date.isoformat(), "endDate": end_date.isoformat()}],
+        "dimensions": [{"name": "date"}],
+        "metrics": [
+            {"name": "sessions"},
+            {"name": "transactions"},
+            {"name": "purchaseRevenue"}
+        ],
+        # Ordem estável entre páginas (e cada parte já sai ordenada por data)
+        "orderBys": [{"dimension": {"dimensionName": "date"}}],
+        "limit": limite,
+        "returnPropertyQuota": True
+    }
+
+    offset = 0
+    paginas = 0
+    while True:
+        inicio_req = time.perf_counter()
+        response, tentativas, erro = _executar_pagina(
+            analytics_data, property_id, {**body, "offset": offset}, agendador)
+        latencia = time.perf_counter() - inicio_req
+
+        if erro is not None:
+            print(f"❌ Erro ao coletar dados para {property_id} (offset {offset}): {erro}")
+            if relatorio is not None:
+                relatorio.registrar(property_id, tentativas=tentativas, latencia_s=latencia,
+                                    erro=f"{status_http(erro) or ''} {erro}".strip())
+            raise erro
+
+        rows = response.get("rows", [])
+        total = int(response.get("rowCount", 0))
+        if relatorio is not None:
+            relatorio.registrar(property_id, tentativas=tentativas, latencia_s=latencia, linhas=len(rows),
+                                bytes=len(rows) * BYTES_POR_LINHA, cota=response.get("propertyQuota"))
+        del response
+
+        paginas += 1
+        offset += len(rows)
+        yield linhas_para_frame(rows)
+        if not rows or offset >= total:
+            break
+
+    print(f"Propriedade {property_id} - Período {start_date} a {end_date} - "
+          f"Linhas retornadas: {offset}" + (f" em {paginas} páginas" if paginas > 1 else ""))
+
+
+def run_ga_daily(analytics_data, property_id, start_date, end_date, relatorio=None, agendador=None,
+                 levantar_erros=False, limite=LIMITE_PAGINA):
+    """Série diária completa de uma propriedade (todas as páginas) num único DataFrame."""
+    try:
+        paginas = [p for p in paginas_ga_daily(analytics_data, property_id, start_date, end_date,
+                                               relatorio, agendador, limite) if not p.empty]
+    except Exception:
+        if levantar_erros:
+            raise
+        return pd.DataFrame(columns=COLUNAS_DIARIAS)
+
+    if not paginas:
+        return pd.DataFrame(columns=COLUNAS_DIARIAS)
+    return pd.concat(paginas, ignore_index=True)
+
+
+# ==========================
+# Coleta de dados
+# ==========================
+def coletar(analytics_data, props_filtradas, inicio_total, fim_total, relatorio=None, agendador=None,
+            workers=1):
+    """Coleta a série diária de cada propriedade e devolve a base ordenada.
+
+    Com um ``cota.AgendadorCota`` as propriedades são atendidas na ordem e no
+    ritmo que as cotas do GA4 permitem.
+    """
+    total = len(props_filtradas)
+
+    def coletar_propriedade(prop):
+        print(f"Coletando dados da propriedade: {prop['property_display']} - {prop['property_id']} ({total} no total)")
+        df_total = run_ga_daily(analytics_data, prop['property_id'], inicio_total, fim_total, relatorio, agendador)
+
+        # Adiciona colunas de conta e propriedade
+        df_total['account_display'] = prop['account_display']
+        df_total['property_display'] = prop['property_display']
+        return df_total
+
+    if agendador is not None:
+        base_dados = agendador.executar(props_filtradas, coletar_propriedade, workers=workers)
+    else:
+        base_dados = [coletar_propriedade(prop) for prop in props_filtradas]
+
+    if not base_dados:
+        return pd.DataFrame(columns=COLUNAS_DIARIAS + ['account_display', 'property_display'])
+
+    df_final = pd.concat(base_dados, ignore_index=True)
+    return df_final.sort_values(['account_display', 'property_display', 'date'])
+
+
+# ==========================
+# Coleta com checkpoint por propriedade
+# ==========================
+def coletar_com_checkpoint(analytics_data, props_filtradas, inicio_total, fim_total, staging,
+                           relatorio=None, agendador=None, workers=1):
+    """Coleta gravando cada propriedade no staging assim que ela termina.
+
+    Propriedades que já têm parte no staging são puladas (retomada). Propriedades
+    com erro não são gravadas, para serem tentadas de novo na próxima retomada.
+    Retorna a lista de propriedades que falharam.
+    """
+    pendentes = [p for p in props_filtradas if not staging.concluida(p)]
+    if len(pendentes) < len(props_filtradas):
+        print(f"♻️  Retomando: {len(props_filtradas) - len(pendentes)} propriedades já concluídas no staging")
+
+    falhas = []
+
+    def coletar_propriedade(prop):
+        print(f"Coletando dados da propriedade: {prop['property_display']} - {prop['property_id']}")
+        # As páginas vão direto para a parte no staging, sem juntar a propriedade inteira em memória
+        paginas = (
+            pagina.assign(account_display=prop['account_display'], property_display=prop['property_display'])
+            for pagina in paginas_ga_daily(analytics_data, prop['property_id'], inicio_total, fim_total,
+                                           relatorio, agendador)
+        )
+        try:
+            staging.salvar_paginas(prop, paginas)
+        except Exception:
+            falhas.append(prop)
+
+    if agendador is not None:
+        agendador.executar(pendentes, coletar_propriedade, workers=workers)
+    else:
+        for prop in pendentes:
+            coletar_propriedade(prop)
+    return falhas
+
+
+def publicar_coleta(staging, falhas, saida=SAIDA_FILE, partes_dir=PARTES_DIR):
+    """Publica o staging em ``partes_dir`` e escreve o CSV de saída. Retorna True se o CSV mudou.
+
+    Numa coleta parcial as propriedades que falharam mantêm as linhas da coleta
+    anterior — a parte delas em ``partes_dir`` ou, sem ela, as linhas do CSV
+    antigo — e o staging continua retomável.
+    """
+    if not falhas:
+        mudou = staging.exportar_csv(saida)
+        if staging.partes():
+            staging.publicar(partes_dir)
+        return mudou
+
+    novo = f"{partes_dir}.novo"
+    if staging.partes():
+        combinado = staging.publicar(novo, manter=True)
+    else:
+        combinado = ArmazemParticionado(novo)
+        combinado.limpar()
+
+    anterior = ArmazemParticionado(partes_dir)
+    colunas = COLUNAS_DIARIAS + ['account_display', 'property_display']
+    csv_antigo = None
+    for prop in falhas:
+        if anterior.concluida(prop):
+            df = anterior.ler_parte(anterior.caminho(prop))
+        else:
+            if csv_antigo is None:
+                csv_antigo = (pd.read_csv(saida, sep=';', parse_dates=['date']) if os.path.exists(saida)
+                              else pd.DataFrame(columns=colunas))
+            df = csv_antigo[(csv_antigo['account_display'] == prop['account_display']) &
+                            (csv_antigo['property_display'] == prop['property_display'])]
+        if not df.empty:
+            combinado.salvar(prop, df[colunas].sort_values('date'))
+
+    mudou = combinado.exportar_csv(saida)
+    if combinado.partes():
+        combinado.promover(partes_dir)
+    else:
+        combinado.limpar()
+    return mudou
+
+
+def publicar_incremental(df_final, saida=SAIDA_FILE, partes_dir=PARTES_DIR):
+    """Regrava ``partes_dir`` e o CSV de saída a partir da base incremental. Retorna True se o CSV mudou.
+
+    As partes são chaveadas pelo ``property_id`` das linhas; linhas sem ele
+    usam o da parte anterior de mesma conta e propriedade. O CSV continua sem
+    o ``property_id``.
+    """
+    novo = ArmazemParticionado(f"{partes_dir}.novo")
+    novo.limpar()
+    novo.salvar_frame(df_final, ids=ArmazemParticionado(partes_dir).ids())
+    novo.promover(partes_dir)
+    return salvar_csv_atomico(df_final.drop(columns=['property_id'], errors='ignore'), saida)
+
+
+# ==========================
+# Coleta incremental
+# ==========================
+def coletar_incremental(analytics_data, props_filtradas, df_existente, inicio_total, fim_total,
+                        dias_reprocessamento=DIAS_REPROCESSAMENTO, relatorio=None, agendador=None):
+    """Busca só os dias novos de cada propriedade e mescla com a base existente.
+
+    Para cada propriedade a coleta começa alguns dias antes da última data já salva
+    (esses dias são substituídos); propriedades sem histórico recebem a janela inteira.
+    Uma propriedade cuja consulta falha mantém as linhas que já tinha.
+    O resultado é recortado à janela [inicio_total, fim_total] e traz o
+    ``property_id`` de cada linha — as antigas recebem o da propriedade ativa
+    de mesma conta e nome; as de propriedades que saíram da coleta ficam sem
+    ele (``publicar_incremental`` o busca nas partes anteriores).
+    """
+    ultimas = {}
+    if df_existente is not None and not df_existente.empty:
+        df_existente = somente_base(df_existente)
+        df_existente['date'] = pd.to_datetime(df_existente['date'])
+        # Por conta e propriedade: nomes iguais em contas diferentes têm datas próprias
+        ultimas = df_existente.groupby(['account_display', 'property_display'])['date'].max().dt.date.to_dict()
+
+    base_dados = [] if df_existente is None else [df_existente]
+    chaves_novas = []
+
+    for idx, prop in enumerate(props_filtradas, start=1):
+        chave = (prop['account_display'], prop['property_display'])
+        ultima = ultimas.get(chave)
+        inicio = max(inicio_total, ultima - timedelta(days=dias_reprocessamento)) if ultima else inicio_total
+        print(f"[{idx}/{len(props_filtradas)}] Coleta incremental: {prop['property_display']} a partir de {inicio}")
+        try:
+            df_novo = run_ga_daily(analytics_data, prop['property_id'], inicio, fim_total, relatorio, agendador,
+                                   levantar_erros=True)
+        except Exception:
+            print(f"⚠️ {prop['property_display']}: dias recentes mantidos da coleta anterior")
+            continue
+        df_novo['account_display'] = prop['account_display']
+        df_novo['property_display'] = prop['property_display']
+        df_novo['property_id'] = prop['property_id']
+        base_dados.append(df_novo)
+        chaves_novas.append((chave, pd.Timestamp(inicio)))
+
+    if not base_dados:
+        return pd.DataFrame(columns=COLUNAS_DIARIAS + ['account_display', 'property_display', 'property_id'])
+
+    df_final = pd.concat(base_dados, ignore_index=True)
+    df_final['date'] = pd.to_datetime(df_final['date'])
+    # Linhas antigas (o CSV não guarda o property_id) recebem o da propriedade de mesma conta e nome
+    ids = {(p['account_display'], p['property_display']): p['property_id'] for p in props_filtradas}
+    da_config = pd.Series([ids.get(c) for c in zip(df_final['account_display'], df_final['property_display'])],
+                          index=df_final.index, dtype=object)
+    df_final['property_id'] = df_final.get('property_id', da_config).fillna(da_config)
+
+    # Remove da base antiga os dias que acabaram de ser recoletados (a versão nova prevalece)
+    if df_existente is not None and not df_existente.empty and chaves_novas:
+        n_antigos = len(df_existente)
+        inicio_por_prop = pd.Series(dict(chaves_novas))
+        linhas = pd.MultiIndex.from_frame(df_final[['account_display', 'property_display']])
+        corte = pd.Series(inicio_por_prop.reindex(linhas).to_numpy(), index=df_final.index)
+        substituidos = (df_final.index < n_antigos) & corte.notna() & (df_final['date'] >= corte)
+        df_final = df_final[~substituidos]
+
+    df_final = df_final[
+        (df_final['date'] >= pd.Timestamp(inicio_total)) &
+        (df_final['date'] <= pd.Timestamp(fim_total))
+    ]
+    return df_final.sort_values(['account_display', 'property_display', 'date']).reset_index(drop=True)
+
+
+# ==========================
+# Concatena e salva CSV
+# ==========================
+def main(config_path=CONFIG_FILE, saida=SAIDA_FILE, incremental=False, relatorio_path=RELATORIO_FILE,
+         retomar=False, workers=WORKERS_COLETA):
+    """Executa a coleta (completa ou incremental), grava o CSV de saída e o relatório da execução.
+
+    A coleta completa grava cada propriedade no staging assim que ela termina;
+    com ``retomar`` as propriedades já gravadas para a mesma janela são puladas.
+    """
+    inicio = time.perf_counter()
+    creds = autenticar()
+    autenticacao_s = time.perf_counter() - inicio
+    fabrica = FabricaClientes(creds)
+    analytics_data, analytics_admin = criar_clientes(fabrica)
+    inicializacao = {'autenticacao_s': round(autenticacao_s, 4), **fabrica.tempos,
+                     'total_s': round(time.perf_counter() - inicio, 4)}
+    print(f"⏱️ Inicialização em {inicializacao['total_s']:.2f}s")
+
+    all_properties = listar_propriedades(analytics_admin)
+    props_filtradas = filtrar_propriedades_ativas(all_properties, config_path)
+
+    print(f"🔍 Total de propriedades encontradas: {len(all_properties)}")
+    print(f"✅ Propriedades ativas para coleta: {len(props_filtradas)}")
+
+    relatorio = RelatorioColeta()
+    relatorio.inicializacao = inicializacao
+    agendador = AgendadorCota()
+    inicio_total, fim_total = periodo_coleta()
+    falhas = []
+    if incremental and os.path.exists(saida):
+        df_existente = pd.read_csv(saida, sep=';')
+        df_final = coletar_incremental(analytics_data, props_filtradas, df_existente, inicio_total, fim_total,
+                                       relatorio=relatorio, agendador=agendador)
+        # As partes usam o property_id, como na coleta completa (o CSV continua sem ele)
+        mudou = publicar_incremental(df_final, saida)
+        print(f"✅ Relatório de 100 dias salvo: {len(df_final)} linhas" + ("" if mudou else " (sem alterações)"))
+    else:
+        execucao = f"{inicio_total.isoformat()}_{fim_total.isoformat()}"
+        limpar_execucoes_antigas(execucao)
+        staging = AreaStaging(execucao)
+        if not retomar:
+            staging.limpar()
+
+        falhas = coletar_com_checkpoint(analytics_data, props_filtradas, inicio_total, fim_total, staging,
+                                        relatorio, agendador, workers=workers)
+        # Publica as partes em ga4_partes/ e escreve o CSV parte a parte, já na ordem final
+        mudou = publicar_coleta(staging, falhas, saida)
+        print(f"✅ Relatório de 100 dias salvo a partir de {len(props_filtradas) - len(falhas)} propriedades"
+              + ("" if mudou else " (sem alterações)"))
+        if not falhas:
+            staging.limpar()
+
+    # O CSV guarda só a janela; o histórico acumula tudo, mês a mês
+    n = Historico().acumular_armazem(ArmazemParticionado(PARTES_DIR))
+    print(f"📚 Histórico atualizado: {n} partições (mês × propriedade)")
+
+    resumo = relatorio.salvar(relatorio_path)
+    print(f"📈 Telemetria: {resumo['requisicoes']} requisições, {resumo['retentativas']} retentativas, "
+          f"{resumo['erros']} erros, {len(resumo['perto_da_cota'])} propriedades perto da cota → {relatorio_path}")
+
+    if not incremental and falhas:
+        raise ColetaIncompleta(
+            f"{len(falhas)} propriedades falharam; rode novamente com --retomar para buscar só elas.")
+
+
+if __name__ == "__main__":
+    main()
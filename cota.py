@@ -0,0 +1,197 @@
+"""Agendamento de requisições ao GA4 respeitando as cotas de tokens.
+
+O GA4 Data API cobra tokens por requisição e limita o consumo por propriedade
+(``tokensPerHour``, ``concurrentRequests``) e o que um mesmo projeto do Cloud
+pode gastar em cada propriedade (``tokensPerProjectPerHour`` — não é um teto
+global do projeto: cada propriedade tem o seu). O ``AgendadorCota`` mantém,
+para cada propriedade, esses dois baldes, ressincroniza-os com o
+``propertyQuota`` devolvido pela resposta daquela propriedade e só libera uma
+requisição quando há tokens estimados suficientes nos dois.
+
+Relógio e ``dormir`` são injetáveis, então tudo roda com tempo simulado em
+testes (ver ``fake_ga4.ClienteDataFalso`` com cotas).
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Limites padrão de uma propriedade GA4 padrão (não 360)
+TOKENS_PROPRIEDADE_HORA = 40000
+# Tokens que este projeto pode gastar por hora em cada propriedade (não no total)
+TOKENS_PROJETO_HORA = 14000
+REQUISICOES_CONCORRENTES = 10
+# Custo inicial estimado de um runReport diário antes de observarmos o real
+CUSTO_INICIAL = 10
+
+
+class BaldeTokens:
+    """Balde de tokens com reposição linear (capacidade por hora → tokens por segundo)."""
+
+    def __init__(self, capacidade, periodo_s=3600.0, relogio=time.monotonic):
+        self.capacidade = float(capacidade)
+        self.taxa = self.capacidade / periodo_s
+        self.relogio = relogio
+        self.tokens = self.capacidade
+        self._ultimo = relogio()
+
+    def _repor(self):
+        agora = self.relogio()
+        self.tokens = min(self.capacidade, self.tokens + (agora - self._ultimo) * self.taxa)
+        self._ultimo = agora
+
+    def disponivel(self):
+        self._repor()
+        return self.tokens
+
+    def tempo_ate(self, n):
+        """Segundos até haver ``n`` tokens (0 se já houver)."""
+        falta = n - self.disponivel()
+        return 0.0 if falta <= 0 else falta / self.taxa
+
+    def consumir(self, n):
+        self._repor()
+        self.tokens -= n
+
+    def devolver(self, n):
+        self._repor()
+        self.tokens = min(self.capacidade, self.tokens + n)
+
+    def sincronizar(self, restante):
+        """Ajusta o saldo ao valor informado pelo servidor (a fonte da verdade)."""
+        self._repor()
+        self.tokens = min(self.capacidade, float(restante))
+
+    def esvaziar(self):
+        self._repor()
+        self.tokens = min(self.tokens, 0.0)
+
+
+class AgendadorCota:
+    """Ordena e cadencia requisições por propriedade sem exceder as cotas."""
+
+    def __init__(self, tokens_propriedade_hora=TOKENS_PROPRIEDADE_HORA,
+                 tokens_projeto_hora=TOKENS_PROJETO_HORA,
+                 concorrencia=REQUISICOES_CONCORRENTES,
+                 relogio=time.monotonic, dormir=time.sleep):
+        self.tokens_propriedade_hora = tokens_propriedade_hora
+        self.tokens_projeto_hora = tokens_projeto_hora
+        self.concorrencia = concorrencia
+        self.relogio = relogio
+        self.dormir = dormir
+        self._baldes = {}
+        self._baldes_projeto = {}
+        self._custos = {}
+        self._em_voo = {}
+        self._cond = threading.Condition()
+        self.espera_total_s = 0.0
+
+    # ---------- estado por propriedade ----------
+    def _balde(self, property_id):
+        if property_id not in self._baldes:
+            self._baldes[property_id] = BaldeTokens(self.tokens_propriedade_hora, relogio=self.relogio)
+        return self._baldes[property_id]
+
+    def _balde_projeto(self, property_id):
+        """Parte da propriedade que este projeto pode consumir (``tokensPerProjectPerHour``)."""
+        if property_id not in self._baldes_projeto:
+            self._baldes_projeto[property_id] = BaldeTokens(self.tokens_projeto_hora, relogio=self.relogio)
+        return self._baldes_projeto[property_id]
+
+    def custo_estimado(self, property_id):
+        """Média móvel dos tokens gastos pelas requisições da propriedade."""
+        return self._custos.get(property_id, CUSTO_INICIAL)
+
+    # ---------- ordenação ----------
+    def ordenar(self, props):
+        """Propriedades liberadas antes e, entre elas, as mais baratas primeiro.
+
+        Com as cotas como gargalo, atender primeiro as requisições de menor
+        custo maximiza o número de propriedades concluídas por hora.
+        """
+        with self._cond:
+            return sorted(props, key=lambda p: (self._espera(p['property_id']), self.custo_estimado(p['property_id'])))
+
+    def _espera(self, property_id):
+        custo = self.custo_estimado(property_id)
+        return max(self._balde(property_id).tempo_ate(custo), self._balde_projeto(property_id).tempo_ate(custo))
+
+    # ---------- ciclo de uma requisição ----------
+    def reservar(self, property_id):
+        """Bloqueia até a requisição caber nas cotas; retorna os tokens reservados."""
+        with self._cond:
+            while True:
+                custo = self.custo_estimado(property_id)
+                espera = self._espera(property_id)
+                livre = self._em_voo.get(property_id, 0) < self.concorrencia
+
+                if espera <= 0 and livre:
+                    self._balde(property_id).consumir(custo)
+                    self._balde_projeto(property_id).consumir(custo)
+                    self._em_voo[property_id] = self._em_voo.get(property_id, 0) + 1
+                    return custo
+
+                self.espera_total_s += espera
+                if espera > 0:
+                    # Libera o lock enquanto dorme para outras propriedades seguirem
+                    self._cond.release()
+                    try:
+                        self.dormir(espera)
+                    finally:
+                        self._cond.acquire()
+                else:
+                    self._cond.wait(timeout=1.0)
+
+    def concluir(self, property_id, reservado, cota=None):
+        """Reconcilia a reserva com o ``propertyQuota`` da resposta (se houver)."""
+        with self._cond:
+            self._em_voo[property_id] = max(0, self._em_voo.get(property_id, 0) - 1)
+            cota = cota or {}
+
+            hora = cota.get('tokensPerHour') or {}
+            if 'consumed' in hora:
+                consumido = hora['consumed']
+                anterior = self._custos.get(property_id)
+                self._custos[property_id] = consumido if anterior is None else 0.7 * anterior + 0.3 * consumido
+            if 'remaining' in hora:
+                self._balde(property_id).sincronizar(hora['remaining'])
+
+            projeto = cota.get('tokensPerProjectPerHour') or {}
+            if 'remaining' in projeto:
+                self._balde_projeto(property_id).sincronizar(projeto['remaining'])
+            elif 'consumed' in hora:
+                # Sem o saldo do projeto, corrige só a diferença entre o estimado e o real
+                self._balde_projeto(property_id).devolver(reservado - hora['consumed'])
+
+            concorrentes = cota.get('concurrentRequests') or {}
+            if 'consumed' in concorrentes and 'remaining' in concorrentes:
+                self.concorrencia = max(1, concorrentes['consumed'] + concorrentes['remaining'])
+            self._cond.notify_all()
+
+    def falhou(self, property_id, status=None):
+        """Libera a vaga; em 429 esvazia o balde da propriedade para forçar a espera da reposição."""
+        with self._cond:
+            self._em_voo[property_id] = max(0, self._em_voo.get(property_id, 0) - 1)
+            if status == 429:
+                self._balde(property_id).esvaziar()
+            self._cond.notify_all()
+
+    # ---------- execução ----------
+    def executar(self, props, tarefa, workers=1):
+        """Executa ``tarefa(prop)`` para cada propriedade, na ordem do agendador.
+
+        Devolve os resultados na ordem original de ``props``.
+        """
+        ordem = self.ordenar(props)
+        posicao = {id(p): i for i, p in enumerate(props)}
+        resultados = [None] * len(props)
+
+        if workers <= 1:
+            for p in ordem:
+                resultados[posicao[id(p)]] = tarefa(p)
+            return resultados
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futuros = {pool.submit(tarefa, p): p for p in ordem}
+            for futuro, p in futuros.items():
+                resultados[posicao[id(p)]] = futuro.result()
+        return resultados
@@ -0,0 +1,250 @@
+"""Provedores de credenciais para a coleta, sem navegador em execuções agendadas.
+
+Ordem de escolha em ``criar_credenciais``:
+
+1. ``AGENGY_CREDENCIAIS`` ou ``GOOGLE_APPLICATION_CREDENTIALS`` apontando para
+   um JSON de conta de serviço (``service_account``), de workload identity
+   federation (``external_account``) ou de usuário (``authorized_user``);
+2. o ``token.json`` do fluxo OAuth de usuário, renovado pelo refresh token;
+3. o fluxo no navegador — só em terminal interativo. Sem terminal (cron,
+   container) a coleta falha na hora com ``CredencialIndisponivel`` em vez de
+   ficar parada esperando um navegador.
+
+Todas as threads da coleta compartilham um único ``CredenciaisCompartilhadas``:
+o token é renovado uma vez só (sob lock) e antes de expirar — no acesso, se
+faltar menos que a margem, e opcionalmente por uma thread de fundo —, então uma
+coleta longa não para no meio para renovar. ``fake_ga4.ServidorTokenFalso``
+imita o endpoint de token para testar tudo isso localmente.
+"""
+import json
+import os
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from datetime import datetime, timezone
+
+from arquivos import gravar_bytes_atomico
+
+SCOPES = ['https://www.googleapis.com/auth/analytics.readonly']
+TOKEN_FILE = 'token.json'
+CLIENT_SECRETS_FILE = 'client_secret.json'
+TOKEN_URI = 'https://oauth2.googleapis.com/token'
+# Renova quando faltar menos que isto para expirar
+MARGEM_RENOVACAO_S = 300
+TIMEOUT_S = 30
+
+
+class CredencialIndisponivel(RuntimeError):
+    """Nenhuma credencial utilizável sem interação (token ausente/revogado e sem terminal)."""
+
+
+def _expiracao_epoch(expiry):
+    """``datetime`` do google-auth (UTC, sem fuso) → epoch; ``None`` se desconhecida."""
+    if expiry is None:
+        return None
+    if expiry.tzinfo is None:
+        expiry = expiry.replace(tzinfo=timezone.utc)
+    return expiry.timestamp()
+
+
+# ============================================================
+# 🔑 PROVEDORES (cada um sabe obter um token novo)
+# ============================================================
+class ProvedorUsuarioOAuth:
+    """Token de usuário (``token.json``) renovado direto no endpoint OAuth, sem google-auth.
+
+    Com ``persistir=False`` o token renovado fica só em memória: um
+    ``authorized_user`` externo (ex.: o ADC do gcloud) nunca é reescrito.
+    """
+
+    nome = 'usuario'
+
+    def __init__(self, token_file=TOKEN_FILE, timeout=TIMEOUT_S, persistir=True):
+        self.token_file = token_file
+        self.timeout = timeout
+        self.persistir = persistir
+        with open(token_file, encoding='utf-8') as f:
+            self.dados = json.load(f)
+        if not self.dados.get('refresh_token'):
+            raise CredencialIndisponivel(f"{token_file} não tem refresh_token")
+
+    def token_salvo(self):
+        """Token ainda válido gravado no arquivo, se houver: (token, expira_em)."""
+        token, expiry = self.dados.get('token'), self.dados.get('expiry')
+        if not token or not expiry:
+            return None
+        expira_em = datetime.fromisoformat(expiry.replace('Z', '+00:00'))
+        return token, _expiracao_epoch(expira_em)
+
+    def obter_token(self):
+        corpo = urllib.parse.urlencode({
+            'grant_type': 'refresh_token',
+            'refresh_token': self.dados['refresh_token'],
+            'client_id': self.dados.get('client_id', ''),
+            'client_secret': self.dados.get('client_secret', ''),
+        }).encode()
+        requisicao = urllib.request.Request(self.dados.get('token_uri', TOKEN_URI), data=corpo, method='POST')
+        try:
+            with urllib.request.urlopen(requisicao, timeout=self.timeout) as resposta:
+                resultado = json.load(resposta)
+        except urllib.error.HTTPError as erro:
+            raise CredencialIndisponivel(
+                f"Refresh token recusado (HTTP {erro.code}); gere um novo {self.token_file}") from erro
+
+        expira_em = time.time() + float(resultado.get('expires_in', 3600))
+        self.dados['token'] = resultado['access_token']
+        self.dados['expiry'] = datetime.fromtimestamp(expira_em, timezone.utc).isoformat().replace('+00:00', 'Z')
+        if self.persistir:
+            gravar_bytes_atomico(json.dumps(self.dados).encode('utf-8'), self.token_file)
+        return resultado['access_token'], expira_em
+
+
+class ProvedorGoogleAuth:
+    """Conta de serviço ou workload identity (``external_account``) via google-auth."""
+
+    def __init__(self, arquivo, scopes=SCOPES):
+        import google.auth
+
+        self.arquivo = arquivo
+        self.credenciais, _ = google.auth.load_credentials_from_file(arquivo, scopes=scopes)
+        with open(arquivo, encoding='utf-8') as f:
+            self.nome = json.load(f).get('type', 'google-auth')
+
+    def token_salvo(self):
+        return None
+
+    def obter_token(self):
+        from google.auth.transport.requests import Request
+
+        self.credenciais.refresh(Request())
+        return self.credenciais.token, _expiracao_epoch(self.credenciais.expiry)
+
+
+# ============================================================
+# 🤝 TOKEN COMPARTILHADO ENTRE THREADS
+# ============================================================
+class CredenciaisCompartilhadas:
+    """Token único para todas as threads, renovado antes de expirar.
+
+    Implementa a interface que o ``google_auth_httplib2.AuthorizedHttp`` usa
+    (``before_request``, ``refresh``, ``apply``, ``valid``), então pode ser
+    passado como ``credentials`` para a ``clientes_ga4.FabricaClientes``.
+    """
+
+    def __init__(self, provedor, margem_s=MARGEM_RENOVACAO_S, relogio=time.time):
+        self.provedor = provedor
+        self.margem_s = margem_s
+        self.relogio = relogio
+        self._lock = threading.Lock()
+        self._parar = threading.Event()
+        self._thread = None
+        self.renovacoes = 0
+        self.token, self.expira_em = provedor.token_salvo() or (None, None)
+
+    def _precisa_renovar(self):
+        return self.token is None or (self.expira_em is not None
+                                      and self.expira_em - self.relogio() <= self.margem_s)
+
+    @property
+    def valid(self):
+        return not self._precisa_renovar()
+
+    def token_atual(self):
+        """Token válido; a primeira thread que encontra o token perto do fim renova, as outras esperam."""
+        if self._precisa_renovar():
+            with self._lock:
+                if self._precisa_renovar():
+                    self._renovar()
+        return self.token
+
+    def _renovar(self):
+        self.token, self.expira_em = self.provedor.obter_token()
+        self.renovacoes += 1
+
+    # ---------- interface do google-auth ----------
+    def refresh(self, request=None):
+        """Renovação forçada (ex.: a API respondeu 401)."""
+        with self._lock:
+            self._renovar()
+
+    def apply(self, headers, token=None):
+        headers['authorization'] = f"Bearer {token or self.token_atual()}"
+
+    def before_request(self, request, method, url, headers):
+        self.apply(headers)
+
+    # ---------- renovação em segundo plano ----------
+    def iniciar_renovacao(self):
+        """Thread que renova o token ``margem_s`` antes de expirar, mesmo sem requisições."""
+        if self._thread is None:
+            self._parar.clear()
+            self._thread = threading.Thread(target=self._laco, name="renovacao-token", daemon=True)
+            self._thread.start()
+        return self
+
+    def parar_renovacao(self):
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _laco(self):
+        while not self._parar.is_set():
+            try:
+                self.token_atual()
+            except Exception as erro:
+                # Falha de rede aqui não derruba a coleta: a próxima requisição tenta de novo
+                print(f"⚠️ Renovação do token falhou: {erro}")
+                self._parar.wait(30.0)
+                continue
+            espera = 60.0 if self.expira_em is None else self.expira_em - self.margem_s - self.relogio()
+            self._parar.wait(max(1.0, espera))
+
+
+# ============================================================
+# 🏭 ESCOLHA DO PROVEDOR
+# ============================================================
+def fluxo_navegador(token_file=TOKEN_FILE, client_secrets=CLIENT_SECRETS_FILE):
+    """Fluxo OAuth no navegador; grava o ``token.json`` usado pelo ``ProvedorUsuarioOAuth``."""
+    from google_auth_oauthlib.flow import InstalledAppFlow
+
+    flow = InstalledAppFlow.from_client_secrets_file(client_secrets, SCOPES)
+    creds = flow.run_local_server(port=0)
+    gravar_bytes_atomico(creds.to_json().encode('utf-8'), token_file)
+
+
+def criar_provedor(environ=None, token_file=TOKEN_FILE, interativo=None):
+    """Provedor conforme variáveis de ambiente e arquivos disponíveis (ver docstring do módulo)."""
+    environ = os.environ if environ is None else environ
+    arquivo = environ.get('AGENGY_CREDENCIAIS') or environ.get('GOOGLE_APPLICATION_CREDENTIALS')
+    if arquivo:
+        with open(arquivo, encoding='utf-8') as f:
+            tipo = json.load(f).get('type')
+        if tipo == 'authorized_user':
+            # Arquivo de fora do projeto: só o token.json do projeto é regravado
+            return ProvedorUsuarioOAuth(arquivo, persistir=os.path.abspath(arquivo) == os.path.abspath(token_file))
+        return ProvedorGoogleAuth(arquivo)
+
+    if os.path.exists(token_file):
+        try:
+            return ProvedorUsuarioOAuth(token_file)
+        except (CredencialIndisponivel, ValueError):
+            pass
+
+    interativo = sys.stdin.isatty() if interativo is None else interativo
+    if not interativo:
+        raise CredencialIndisponivel(
+            f"Sem credenciais para execução não interativa: defina GOOGLE_APPLICATION_CREDENTIALS "
+            f"(conta de serviço/workload) ou gere o {token_file} rodando a coleta num terminal.")
+    fluxo_navegador(token_file)
+    return ProvedorUsuarioOAuth(token_file)
+
+
+def criar_credenciais(environ=None, token_file=TOKEN_FILE, interativo=None, margem_s=MARGEM_RENOVACAO_S):
+    """``CredenciaisCompartilhadas`` já com um token válido."""
+    credenciais = CredenciaisCompartilhadas(criar_provedor(environ, token_file, interativo), margem_s)
+    credenciais.token_atual()
+    return credenciais
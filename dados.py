@@ -0,0 +1,199 @@
+"""Carregamento da base do dashboard e observação do arquivo em disco.
+
+Este módulo não depende do Streamlit: o app liga o observador ao seu cache
+(`st.cache_resource`) e o mesmo código pode ser usado em scripts e benchmarks.
+"""
+import hashlib
+import io
+import sys
+import threading
+
+import pandas as pd
+
+from arquivos import hash_arquivo, versao_arquivo
+from metricas import METRICAS_DERIVADAS
+
+DADOS_PATH = "base_comparativa.csv"
+
+
+def ativar_copy_on_write():
+    """Liga o Copy-on-Write do pandas (já é o padrão a partir do pandas 3).
+
+    Com ele, filtros e seleções sobre o DataFrame compartilhado devolvem views
+    e qualquer escrita em um derivado copia apenas o que foi alterado, sem
+    nunca modificar a base de origem.
+    """
+    if int(pd.__version__.split(".")[0]) < 3:
+        pd.set_option("mode.copy_on_write", True)
+
+
+# ============================================================
+# 📐 SCHEMA DA BASE COMPARATIVA
+# ============================================================
+# Contagens cabem em int32. A receita fica em float64 porque float32 perde
+# centavos a partir de ~R$ 100 mil somados.
+COLUNAS_CATEGORICAS = ["account_display", "property_display"]
+COLUNAS_INTEIRAS = ["sessions", "transactions", "sessions_prev", "transactions_prev"]
+COLUNAS_FLOAT64 = ["purchaseRevenue", "purchaseRevenue_prev"]
+# Os links vivem no contas_config.csv; na tabela fato eram uma string repetida em toda linha.
+# Taxas gravadas por bases antigas são ignoradas: ``metricas`` as recalcula das contagens.
+COLUNAS_DESCARTADAS = ["links", *METRICAS_DERIVADAS, *(f"{m}_prev" for m in METRICAS_DERIVADAS)]
+
+
+def aplicar_schema(df):
+    """Converte a base para os tipos compactos do schema.
+
+    Colunas inteiras com lacunas (ex.: ``*_prev`` de dias sem período anterior)
+    ficam em float32, que representa contagens exatas até ~16 milhões.
+    """
+    df = df.drop(columns=[c for c in COLUNAS_DESCARTADAS if c in df.columns])
+    for c in COLUNAS_CATEGORICAS:
+        if c in df.columns:
+            df[c] = df[c].astype("category")
+    for c in COLUNAS_INTEIRAS:
+        if c in df.columns:
+            df[c] = df[c].astype("float32" if df[c].isna().any() else "int32")
+    for c in COLUNAS_FLOAT64:
+        if c in df.columns:
+            df[c] = df[c].astype("float64")
+    return df
+
+
+def ler_base(caminho=DADOS_PATH):
+    """Lê a base comparativa com o schema compacto.
+
+    Linhas sem data (sobras do período anterior sem par no atual) são
+    descartadas: nenhum filtro de período as alcança.
+    """
+    df = pd.read_csv(
+        caminho, sep=";",
+        usecols=lambda c: c.strip() not in COLUNAS_DESCARTADAS,
+        dtype={c: "string" for c in COLUNAS_CATEGORICAS},
+    )
+    df.columns = df.columns.str.strip()
+    df["date"] = pd.to_datetime(df["date"], errors="coerce")
+    df = df[df["date"].notna()].reset_index(drop=True)
+    return aplicar_schema(df)
+
+
+class VersaoAlterada(RuntimeError):
+    """O arquivo foi trocado depois do cálculo do hash: a versão pedida não está mais em disco."""
+
+
+def ler_base_versao(versao, caminho=DADOS_PATH):
+    """Lê a base exatamente na ``versao`` (hash do conteúdo) pedida.
+
+    Os bytes são lidos uma única vez e o mesmo buffer é conferido e
+    interpretado; se o arquivo já for outro, levanta ``VersaoAlterada`` em vez
+    de devolver um conteúdo novo sob a chave de cache da versão antiga.
+    """
+    with open(caminho, "rb") as f:
+        conteudo = f.read()
+    if hashlib.sha256(conteudo).hexdigest() != versao:
+        raise VersaoAlterada(f"{caminho} mudou depois da versão {versao[:12]}")
+    return ler_base(io.BytesIO(conteudo))
+
+
+def ler_base_legado(caminho=DADOS_PATH):
+    """Leitura antiga (tipos inferidos, com ``links``), mantida para comparação de memória."""
+    df = pd.read_csv(caminho, sep=";")
+    df.columns = df.columns.str.strip()
+    df["date"] = pd.to_datetime(df["date"], errors="coerce")
+    return df
+
+
+def memoria_por_100k_linhas(n_linhas=100_000):
+    """Compara a memória (bytes, deep) das leituras legada e compacta, normalizada a 100 mil linhas."""
+    from sinteticos import gerar_base_comparativa
+
+    buffer = io.StringIO()
+    gerar_base_comparativa(n_linhas).to_csv(buffer, sep=";", index=False)
+
+    resultado = {}
+    for nome, leitor in [("antes", ler_base_legado), ("depois", ler_base)]:
+        buffer.seek(0)
+        df = leitor(buffer)
+        resultado[nome] = int(df.memory_usage(deep=True).sum() * 100_000 / len(df))
+    resultado["reducao"] = 1 - resultado["depois"] / resultado["antes"]
+    return resultado
+
+
+# ============================================================
+# 👀 OBSERVADOR DO ARQUIVO DE DADOS
+# ============================================================
+class ObservadorArquivo:
+    """Acompanha um arquivo e publica a impressão digital (hash) da versão pronta para uso.
+
+    Uma thread em segundo plano faz um ``os.stat`` barato a cada ``intervalo``
+    segundos. Quando mtime/tamanho mudam, calcula o hash do conteúdo e, se ele
+    for novo, chama ``aquecer(hash)`` — tipicamente a função de carga cacheada,
+    que deixa o DataFrame novo pronto no cache. Só então o hash é publicado:
+    as sessões continuam usando a versão anterior enquanto a nova é lida.
+    """
+
+    def __init__(self, caminho, aquecer=None, intervalo=5.0):
+        self.caminho = caminho
+        self.aquecer = aquecer
+        self.intervalo = intervalo
+        self._lock = threading.Lock()
+        self._parar = threading.Event()
+        self._thread = None
+        self._versao_stat = None
+        self._hash = None
+
+    def versao(self):
+        """Hash da versão publicada (calculado na hora apenas na primeira chamada)."""
+        if self._hash is None:
+            with self._lock:
+                if self._hash is None:
+                    self._versao_stat = versao_arquivo(self.caminho)
+                    self._hash = hash_arquivo(self.caminho)
+        return self._hash
+
+    def verificar(self):
+        """Checa o arquivo uma vez; retorna True se uma nova versão foi publicada."""
+        versao_stat = versao_arquivo(self.caminho)
+        if versao_stat is None or versao_stat == self._versao_stat:
+            return False
+
+        novo_hash = hash_arquivo(self.caminho)
+        if novo_hash == self._hash:
+            # Reescrito com o mesmo conteúdo (ex.: touch): nada a recarregar
+            self._versao_stat = versao_stat
+            return False
+
+        if self.aquecer is not None:
+            self.aquecer(novo_hash)
+        with self._lock:
+            self._versao_stat = versao_stat
+            self._hash = novo_hash
+        return True
+
+    def _loop(self):
+        while not self._parar.wait(self.intervalo):
+            try:
+                self.verificar()
+            except Exception as e:
+                # Arquivo em troca ou ilegível: tenta de novo no próximo ciclo
+                print(f"⚠️ Falha ao verificar {self.caminho}: {e}")
+
+    def iniciar(self):
+        """Inicia a thread de observação (idempotente)."""
+        self.versao()
+        if self._thread is None or not self._thread.is_alive():
+            self._parar.clear()
+            self._thread = threading.Thread(target=self._loop, name="observador-dados", daemon=True)
+            self._thread.start()
+        return self
+
+    def parar(self):
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.intervalo + 1)
+
+
+if __name__ == "__main__":
+    if "--memoria" in sys.argv:
+        r = memoria_por_100k_linhas()
+        print(f"Memória por 100 mil linhas: antes {r['antes'] / 2**20:.1f} MiB, "
+              f"depois {r['depois'] / 2**20:.1f} MiB ({r['reducao']:.0%} menor)")
@@ -0,0 +1,243 @@
+"""Clientes falsos das APIs do GA4 para rodar coleta e benchmarks offline.
+
+Imitam a interface do ``googleapiclient`` usada em ``coletar_dados``:
+``cliente.properties().runReport(property=..., body=...).execute()``.
+"""
+import json
+import threading
+import time
+import zlib
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+from cota import BaldeTokens
+
+# Linhas por página do runReport: padrão sem ``limit`` e máximo aceito
+LIMITE_PADRAO = 10_000
+LIMITE_MAXIMO = 250_000
+
+
+class ErroHttpFalso(Exception):
+    """Imita ``googleapiclient.errors.HttpError`` (status em ``erro.resp.status``)."""
+
+    def __init__(self, status, mensagem=""):
+        super().__init__(f"HTTP {status} {mensagem}".strip())
+        self.resp = type("Resp", (), {"status": status})()
+
+
+class _Requisicao:
+    def __init__(self, funcao):
+        self._funcao = funcao
+
+    def execute(self):
+        return self._funcao()
+
+
+class _RecursoPropriedades:
+    def __init__(self, cliente):
+        self._cliente = cliente
+
+    def runReport(self, property, body):
+        return _Requisicao(lambda: self._cliente.responder(property, body))
+
+    def runRealtimeReport(self, property, body):
+        return _Requisicao(lambda: self._cliente.responder_tempo_real(property, body))
+
+
+class ClienteDataFalso:
+    """Gera respostas determinísticas de ``runReport`` (uma linha por dia do intervalo).
+
+    Com ``tokens_propriedade_hora``/``tokens_projeto_hora`` o cliente simula o
+    servidor de cotas do GA4: cada requisição custa ``1 + linhas // 20`` tokens,
+    a resposta traz ``propertyQuota`` e, sem saldo, a requisição falha com 429.
+
+    Como a API real, devolve no máximo ``limit`` linhas a partir de ``offset``
+    (10.000 sem ``limit``, teto de 250.000) e informa o total em ``rowCount``.
+    """
+
+    def __init__(self, latencia=0.0, tokens_propriedade_hora=None, tokens_projeto_hora=None,
+                 relogio=time.monotonic):
+        self.latencia = latencia
+        self.chamadas = 0
+        self.recusadas = 0
+        self.relogio = relogio
+        self.tokens_propriedade_hora = tokens_propriedade_hora
+        self.tokens_projeto_hora = tokens_projeto_hora
+        self._baldes = {}
+        self._baldes_projeto = {}
+        # Relatórios em tempo real têm uma cota própria, como no GA4
+        self._baldes_tempo_real = {}
+        self._lock = threading.Lock()
+
+    def properties(self):
+        return _RecursoPropriedades(self)
+
+    def _cobrar(self, property_id, custo, tempo_real=False):
+        """Debita a cota (se simulada) e devolve o ``propertyQuota`` da resposta."""
+        if not (self.tokens_propriedade_hora or self.tokens_projeto_hora):
+            return None
+        with self._lock:
+            balde = projeto = None
+            if self.tokens_propriedade_hora:
+                balde = (self._baldes_tempo_real if tempo_real else self._baldes).setdefault(
+                    property_id, BaldeTokens(self.tokens_propriedade_hora, relogio=self.relogio))
+            if self.tokens_projeto_hora and not tempo_real:
+                # Como no GA4, a cota do projeto é contada separadamente em cada propriedade
+                projeto = self._baldes_projeto.setdefault(
+                    property_id, BaldeTokens(self.tokens_projeto_hora, relogio=self.relogio))
+            if (balde and balde.disponivel() < custo) or (projeto and projeto.disponivel() < custo):
+                self.recusadas += 1
+                raise ErroHttpFalso(429, "RESOURCE_EXHAUSTED")
+
+            cota = {}
+            if balde:
+                balde.consumir(custo)
+                cota["tokensPerHour"] = {"consumed": custo, "remaining": int(balde.disponivel())}
+            if projeto:
+                projeto.consumir(custo)
+                cota["tokensPerProjectPerHour"] = {"consumed": custo, "remaining": int(projeto.disponivel())}
+            return cota
+
+    @staticmethod
+    def _metricas(semente, dia):
+        """Valores determinísticos de um dia, por nome de métrica."""
+        x = (semente + dia.toordinal() * 2654435761) % 1000
+        transactions = x % 17
+        return {"sessions": 50 + x, "transactions": transactions, "purchaseRevenue": transactions * 137.5}
+
+    @staticmethod
+    def _valor(nome, valor):
+        return f"{valor:.2f}" if nome == "purchaseRevenue" else str(int(valor))
+
+    def responder(self, property_id, body):
+        self.chamadas += 1
+        if self.latencia:
+            time.sleep(self.latencia)
+
+        intervalo = body["dateRanges"][0]
+        inicio = _data_relativa(intervalo["startDate"])
+        fim = _data_relativa(intervalo["endDate"])
+        semente = zlib.crc32(property_id.encode())
+        nomes = [m["name"] for m in body["metrics"]]
+
+        total = (fim - inicio).days + 1
+        offset = int(body.get("offset", 0))
+        limite = min(int(body.get("limit", LIMITE_PADRAO)), LIMITE_MAXIMO)
+
+        if not any(d.get("name") == "date" for d in body.get("dimensions", [])):
+            # Sem dimensão de data: uma linha com os totais do intervalo
+            dias = [self._metricas(semente, inicio + timedelta(days=i)) for i in range(total)]
+            rows = [{"metricValues": [{"value": self._valor(n, sum(d[n] for d in dias))} for n in nomes]}]
+            total, custo = 1, 1
+        else:
+            rows = []
+            dia = inicio + timedelta(days=offset)
+            ultimo = min(fim, inicio + timedelta(days=offset + limite - 1))
+            while dia <= ultimo:
+                metricas = self._metricas(semente, dia)
+                rows.append({
+                    "dimensionValues": [{"value": dia.strftime("%Y%m%d")}],
+                    "metricValues": [{"value": self._valor(n, metricas[n])} for n in nomes],
+                })
+                dia += timedelta(days=1)
+            custo = 1 + len(rows) // 20
+
+        resposta = {"rows": rows, "rowCount": total}
+        cota = self._cobrar(property_id, custo)
+        if cota is not None and body.get("returnPropertyQuota"):
+            resposta["propertyQuota"] = cota
+        return resposta
+
+    def responder_tempo_real(self, property_id, body):
+        """``runRealtimeReport``: usuários ativos nos últimos 30 minutos (muda a cada minuto)."""
+        self.chamadas += 1
+        cota = self._cobrar(property_id, 1, tempo_real=True)
+        minuto = int(time.time() // 60)
+        ativos = (zlib.crc32(property_id.encode()) + minuto) % 40
+        resposta = {"rows": [{"metricValues": [{"value": str(ativos)}]}], "rowCount": 1}
+        if cota is not None and body.get("returnPropertyQuota"):
+            resposta["propertyQuota"] = cota
+        return resposta
+
+
+def _data_relativa(valor, hoje=None):
+    """Datas do GA4: ``AAAA-MM-DD``, ``today``, ``yesterday`` ou ``NdaysAgo``."""
+    hoje = hoje or date.today()
+    if valor == "today":
+        return hoje
+    if valor == "yesterday":
+        return hoje - timedelta(days=1)
+    if valor.endswith("daysAgo"):
+        return hoje - timedelta(days=int(valor[:-len("daysAgo")]))
+    return date.fromisoformat(valor)
+
+
+def propriedades_falsas(n):
+    """Lista de propriedades no formato devolvido por ``listar_propriedades``."""
+    return [
+        {
+            "account_display": f"Conta {i // 3:05d}",
+            "property_display": f"Propriedade {i:05d} – GA4",
+            "property_id": f"properties/{100000 + i}",
+        }
+        for i in range(n)
+    ]
+
+
+class ServidorTokenFalso:
+    """Endpoint OAuth local (``grant_type=refresh_token``) para testar ``credenciais``.
+
+    Emite ``tok-1``, ``tok-2``... com ``expires_in`` configurável e recusa com
+    400 refresh tokens fora de ``refresh_tokens``. Use como context manager;
+    ``url`` vai no ``token_uri`` do ``token.json`` de teste.
+    """
+
+    def __init__(self, expires_in=3600, refresh_tokens=("refresh-valido",), latencia=0.0):
+        self.expires_in = expires_in
+        self.refresh_tokens = set(refresh_tokens)
+        self.latencia = latencia
+        self.emitidos = 0
+        self._lock = threading.Lock()
+        self._servidor = None
+
+    @property
+    def url(self):
+        host, porta = self._servidor.server_address[:2]
+        return f"http://{host}:{porta}/token"
+
+    def _emitir(self, corpo):
+        parametros = {k: v[0] for k, v in parse_qs(corpo).items()}
+        if parametros.get("grant_type") != "refresh_token" or parametros.get("refresh_token") not in self.refresh_tokens:
+            return 400, {"error": "invalid_grant"}
+        if self.latencia:
+            time.sleep(self.latencia)
+        with self._lock:
+            self.emitidos += 1
+            numero = self.emitidos
+        return 200, {"access_token": f"tok-{numero}", "expires_in": self.expires_in, "token_type": "Bearer"}
+
+    def __enter__(self):
+        falso = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                tamanho = int(self.headers.get("Content-Length", 0))
+                status, resposta = falso._emitir(self.rfile.read(tamanho).decode())
+                dados = json.dumps(resposta).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(dados)))
+                self.end_headers()
+                self.wfile.write(dados)
+
+            def log_message(self, formato, *args):
+                pass
+
+        self._servidor = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self._servidor.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self._servidor.shutdown()
+        self._servidor.server_close()
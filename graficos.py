@@ -0,0 +1,47 @@
+"""Gráficos da página de detalhes, montados sem o Streamlit (app e relatórios em lote usam os mesmos)."""
+import altair as alt
+import pandas as pd
+
+from metricas import METRICAS_DERIVADAS, avaliar
+
+# Métrica → título dos gráficos da página de detalhes, na ordem de exibição: as contagens
+# e, em seguida, cada métrica derivada do registro (um KPI novo ganha gráfico sem mudar aqui)
+GRAFICOS_DETALHES = [
+    ("purchaseRevenue", "Receita – Atual vs Anterior"),
+    ("transactions", "Transações – Atual vs Anterior"),
+    ("sessions", "Sessões – Atual vs Anterior"),
+    *((nome, f"{info['titulo']} – Atual vs Anterior") for nome, info in METRICAS_DERIVADAS.items()),
+]
+
+
+def montar_grafico_combinado(df, metric, titulo):
+    """Gráfico combinado de barras (período atual) e linha (anterior); ``None`` sem a coluna ``_prev``.
+
+    Métricas derivadas (``metricas.METRICAS_DERIVADAS``) são calculadas dia a dia a partir das contagens.
+    """
+    if metric in METRICAS_DERIVADAS:
+        df = avaliar(df, [metric])
+        df = avaliar(df, [metric], sufixo="_prev")
+    metric_prev = f"{metric}_prev"
+    if metric_prev not in df.columns:
+        return None
+
+    df_long = pd.DataFrame({
+        "dia_mes": pd.to_datetime(df["date"]).dt.strftime("%d/%m"),
+        "Atual": df[metric],
+        "Anterior": df[metric_prev]
+    }).melt(id_vars="dia_mes", var_name="Periodo", value_name="Valor")
+
+    bar = alt.Chart(df_long[df_long["Periodo"] == "Atual"]).mark_bar(color="#4C78A8").encode(
+        x=alt.X('dia_mes:N', title='Dia'),
+        y=alt.Y('Valor:Q', title=titulo),
+        tooltip=['dia_mes', 'Valor']
+    )
+
+    line = alt.Chart(df_long[df_long["Periodo"] == "Anterior"]).mark_line(color="#F2B701", point=True).encode(
+        x='dia_mes:N',
+        y='Valor:Q',
+        tooltip=['dia_mes', 'Valor']
+    )
+
+    return alt.layer(bar, line).properties(title=titulo)
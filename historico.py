@@ -0,0 +1,179 @@
+"""Histórico local da coleta, particionado por mês e propriedade.
+
+O ``ga4_100.csv`` só guarda a janela de 100 dias. A cada coleta as linhas novas
+são acumuladas em ``ga4_historico/mes=AAAA-MM/<property_id>.parquet``: cada
+partição (mês × propriedade) é relida, deduplicada em (property_id, data) — a
+coleta mais recente prevalece — e regravada atomicamente. A chave é o
+``property_id``: duas propriedades com o mesmo nome em contas diferentes não
+dividem a partição.
+
+As consultas abrem só os meses do período pedido (e, se informado, só os
+arquivos das propriedades pedidas), então o tempo de leitura depende do
+período e não do tamanho do histórico.
+"""
+import argparse
+import os
+import threading
+
+import pandas as pd
+
+from metricas import somente_base
+from particoes import PARTES_DIR, ArmazemParticionado, nome_unico
+
+HISTORICO_DIR = 'ga4_historico'
+PREFIXO_MES = 'mes='
+CHAVE = ['property_id', 'date']
+
+
+def _resolver_id(armazem, conta, nome):
+    """``property_id`` de linhas que chegaram sem ele (ex.: ``--importar`` de um CSV da coleta).
+
+    Usa o da partição que o mês já tem para a mesma conta e propriedade; sem
+    ela, um ``nome_unico`` de conta e propriedade, como ``ArmazemParticionado.salvar_frame``.
+    """
+    for _, prop in armazem.itens():
+        if prop['property_id'] and (prop['account_display'], prop['property_display']) == (conta, nome):
+            return prop['property_id']
+    return nome_unico(f"{conta}__{nome}")
+
+
+class Historico:
+    """Armazém de longo prazo: um ``ArmazemParticionado`` por mês."""
+
+    def __init__(self, raiz=HISTORICO_DIR, formato=None):
+        self.raiz = raiz
+        self.formato = formato
+        # Um armazém por mês, reaproveitado: o lock dele protege o índice quando
+        # várias threads gravam propriedades diferentes do mesmo mês
+        self._armazens = {}
+        self._lock = threading.Lock()
+
+    # ---------- partições ----------
+    def meses(self):
+        """Meses (``AAAA-MM``) com dados, em ordem."""
+        if not os.path.isdir(self.raiz):
+            return []
+        return sorted(nome[len(PREFIXO_MES):] for nome in os.listdir(self.raiz)
+                      if nome.startswith(PREFIXO_MES))
+
+    def mes(self, mes):
+        with self._lock:
+            if mes not in self._armazens:
+                self._armazens[mes] = ArmazemParticionado(os.path.join(self.raiz, f"{PREFIXO_MES}{mes}"),
+                                                          self.formato)
+            return self._armazens[mes]
+
+    def particoes(self, inicio, fim, propriedades=None):
+        """Caminhos das partições que cobrem [inicio, fim] — as demais nem são abertas."""
+        existentes = set(self.meses())
+        caminhos = []
+        for periodo in pd.period_range(pd.Timestamp(inicio), pd.Timestamp(fim), freq='M'):
+            mes = str(periodo)
+            if mes not in existentes:
+                continue
+            itens = self.mes(mes).itens()
+            if propriedades is None:
+                caminhos.extend(c for c, _ in itens)
+            else:
+                caminhos.extend(c for c, prop in itens if prop['property_display'] in propriedades)
+        return caminhos
+
+    # ---------- escrita ----------
+    def acumular(self, df):
+        """Mescla as linhas de ``df`` no histórico. Retorna o número de partições regravadas.
+
+        As linhas são endereçadas pela coluna ``property_id``; sem ela, por ``_resolver_id``.
+        """
+        if df.empty:
+            return 0
+        df = somente_base(df)
+        df['date'] = pd.to_datetime(df['date'])
+        ids = df['property_id'] if 'property_id' in df.columns else pd.Series(None, index=df.index, dtype=object)
+        regravadas = 0
+        for (mes, prop_id, conta, nome), novo in df.groupby(
+                [df['date'].dt.strftime('%Y-%m'), ids.fillna(''), 'account_display', 'property_display'],
+                sort=False):
+            armazem = self.mes(mes)
+            prop = {'property_id': prop_id or _resolver_id(armazem, conta, nome),
+                    'account_display': conta, 'property_display': nome}
+            novo = novo.assign(property_id=prop['property_id'])
+            if armazem.concluida(prop):
+                antigo = armazem.ler_parte(armazem.caminho(prop))
+                novo = pd.concat([antigo, novo], ignore_index=True)
+            novo = novo.drop_duplicates(subset=CHAVE, keep='last').sort_values('date')
+            armazem.salvar(prop, novo.reset_index(drop=True))
+            regravadas += 1
+        return regravadas
+
+    def acumular_armazem(self, armazem):
+        """Acumula um ``ArmazemParticionado`` (ex.: ``ga4_partes/``) uma propriedade por vez.
+
+        O ``property_id`` de cada parte vem do índice do armazém (as linhas não o carregam).
+        """
+        total = 0
+        for caminho, prop in armazem.itens():
+            parte = armazem.ler_parte(caminho)
+            if prop['property_id'] is not None:
+                parte = parte.assign(property_id=prop['property_id'])
+            total += self.acumular(parte)
+        return total
+
+    # ---------- leitura ----------
+    def consultar(self, inicio, fim, propriedades=None, colunas=None):
+        """Linhas de [inicio, fim] (opcionalmente só de ``propriedades``), ordenadas por conta, propriedade e data."""
+        inicio, fim = pd.Timestamp(inicio), pd.Timestamp(fim)
+        if colunas is not None and 'date' not in colunas:
+            colunas = ['date', *colunas]
+        # Com ``propriedades``, as linhas também são filtradas pelo nome, não só pelo arquivo
+        leitura = colunas
+        if propriedades is not None and colunas is not None and 'property_display' not in colunas:
+            leitura = [*colunas, 'property_display']
+        armazem = ArmazemParticionado(self.raiz, self.formato)
+        partes = []
+        for caminho in self.particoes(inicio, fim, propriedades):
+            df = armazem.ler_parte(caminho, leitura)
+            filtro = (df['date'] >= inicio) & (df['date'] <= fim)
+            if propriedades is not None:
+                filtro &= df['property_display'].isin(propriedades)
+            partes.append(df.loc[filtro, colunas] if colunas is not None else df[filtro])
+        partes = [p for p in partes if not p.empty]
+        if not partes:
+            return pd.DataFrame(columns=colunas)
+        df = pd.concat(partes, ignore_index=True)
+        ordem = [c for c in ('account_display', 'property_display', 'date') if c in df.columns]
+        return df.sort_values(ordem, ignore_index=True)
+
+    def intervalo(self):
+        """(primeira, última) data do histórico, ou (None, None) se vazio."""
+        meses = self.meses()
+        if not meses:
+            return None, None
+        primeiro = self.consultar(f"{meses[0]}-01", pd.Period(meses[0]).end_time, colunas=['date'])
+        ultimo = self.consultar(f"{meses[-1]}-01", pd.Period(meses[-1]).end_time, colunas=['date'])
+        return primeiro['date'].min(), ultimo['date'].max()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Histórico particionado da coleta GA4")
+    parser.add_argument('--importar', metavar='CSV', help="acumula um CSV da coleta (ex.: ga4_100.csv)")
+    parser.add_argument('--partes', action='store_true', help=f"acumula o {PARTES_DIR}/ da última coleta")
+    parser.add_argument('--raiz', default=HISTORICO_DIR)
+    args = parser.parse_args(argv)
+
+    historico = Historico(args.raiz)
+    if args.importar:
+        n = historico.acumular(pd.read_csv(args.importar, sep=';'))
+        print(f"📚 {n} partições atualizadas a partir de {args.importar}")
+    if args.partes:
+        n = historico.acumular_armazem(ArmazemParticionado(PARTES_DIR))
+        print(f"📚 {n} partições atualizadas a partir de {PARTES_DIR}/")
+
+    primeira, ultima = historico.intervalo()
+    if primeira is None:
+        print("📭 Histórico vazio")
+    else:
+        print(f"📚 Histórico: {len(historico.meses())} meses, de {primeira:%d/%m/%Y} a {ultima:%d/%m/%Y}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Registro das métricas do dashboard: contagens somáveis e métricas derivadas.
+
+A base guarda só contagens (``METRICAS_BASE``). Toda taxa é definida uma única
+vez em ``METRICAS_DERIVADAS`` como expressão sobre essas contagens e calculada,
+vetorizada, no nível em que for pedida — dia, propriedade, conta, portfólio —
+sempre como razão das somas (nunca média de razões). Um KPI novo é uma
+entrada a mais no dicionário; cards e gráficos passam a mostrá-lo.
+"""
+import ast
+
+import numpy as np
+import pandas as pd
+
+METRICAS_BASE = ["sessions", "transactions", "purchaseRevenue"]
+
+METRICAS_DERIVADAS = {
+    "conversion_rate": {
+        "expressao": "transactions / sessions * 100",
+        "titulo": "Taxa de conversão",
+        "formato": "{:.2f}%",
+    },
+    "ticket_medio": {
+        "expressao": "purchaseRevenue / transactions",
+        "titulo": "Ticket médio",
+        "formato": "R$ {:,.2f}",
+    },
+    "receita_por_sessao": {
+        "expressao": "purchaseRevenue / sessions",
+        "titulo": "Receita por sessão",
+        "formato": "R$ {:,.2f}",
+    },
+}
+
+
+def dependencias(nome):
+    """Contagens usadas pela expressão de ``nome`` (nomes extraídos da expressão, não busca de texto)."""
+    arvore = ast.parse(METRICAS_DERIVADAS[nome]["expressao"], mode="eval")
+    return sorted({no.id for no in ast.walk(arvore) if isinstance(no, ast.Name)})
+
+
+# Colunas das somas no resumo por card (``analise.resumo_contas``)
+COLUNAS_RESUMO = {"sessions": "total_sessions", "transactions": "total_transactions",
+                  "purchaseRevenue": "total_revenue"}
+
+
+def avaliar(df, nomes=None, colunas=None, sufixo=""):
+    """``df`` com as métricas derivadas ``nomes`` (todas por padrão) calculadas a partir das contagens.
+
+    ``colunas`` mapeia cada métrica base para a coluna de ``df`` que a contém
+    (ex.: ``COLUNAS_RESUMO``); ``sufixo`` vale para entrada e saída (``"_prev"``
+    calcula ``conversion_rate_prev`` a partir de ``sessions_prev``...).
+    Divisão por zero vira 0; contagem ausente (entre as que a expressão usa)
+    deixa a métrica ausente, e uma métrica cujas colunas base não existem em
+    ``df`` não é criada.
+    """
+    nomes = list(METRICAS_DERIVADAS) if nomes is None else nomes
+    colunas = colunas or {}
+    base = pd.DataFrame({m: df[f"{colunas.get(m, m)}{sufixo}"].astype("float64")
+                         for m in METRICAS_BASE if f"{colunas.get(m, m)}{sufixo}" in df.columns},
+                        index=df.index)
+    novas = {}
+    for nome in nomes:
+        usadas = dependencias(nome)
+        if any(m not in base.columns for m in usadas):
+            continue
+        completas = base[usadas].notna().all(axis=1).to_numpy()
+        with np.errstate(divide="ignore", invalid="ignore"):
+            valores = base.eval(METRICAS_DERIVADAS[nome]["expressao"]).to_numpy(dtype="float64", copy=True)
+        valores[~np.isfinite(valores) & completas] = 0.0
+        novas[f"{nome}{sufixo}"] = valores
+    return df.assign(**novas)
+
+
+def somente_base(df):
+    """Descarta métricas derivadas gravadas por versões antigas (elas são sempre recalculadas)."""
+    derivadas = [c for nome in METRICAS_DERIVADAS for c in (nome, f"{nome}_prev")]
+    return df.drop(columns=[c for c in derivadas if c in df.columns])
+
+
+def formatar(nome, valor):
+    """Valor de uma métrica derivada no formato do registro ("–" se ausente)."""
+    if valor is None or pd.isna(valor):
+        return "–"
+    return METRICAS_DERIVADAS[nome]["formato"].format(valor)
@@ -0,0 +1,196 @@
+"""Motor SQL opcional (DuckDB) para as agregações do dashboard.
+
+Com ``?motor=duckdb`` (ou ``AGENGY_MOTOR=duckdb``) o app não carrega a base no
+pandas: recorte do período, filtro de contas e totais por card rodam como SQL
+direto sobre ``base_comparativa.csv`` (ou um ``.parquet``), e só o resultado —
+uma linha por conta — chega ao pandas.
+
+Os resultados ficam em cache por (período, contas ativas, seleção, critério)
+e o cache é descartado quando o arquivo muda em disco. Sem o ``duckdb``
+instalado, ``criar_motor`` devolve ``None`` e o app segue no pandas.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from arquivos import versao_arquivo
+from metricas import COLUNAS_RESUMO, avaliar
+
+MAX_RESULTADOS = 64
+
+ORDENACAO_SQL = {
+    "Atingimento (%)": "atingimento DESC, property_display",
+    "Receita total (R$)": "total_revenue DESC, property_display",
+    "Sessões": "total_sessions DESC, property_display",
+    "Nome da conta (A-Z)": "property_display",
+}
+
+
+def duckdb_disponivel():
+    try:
+        import duckdb  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class MotorDuckDB:
+    """Consultas do dashboard sobre o arquivo da base, com cache de resultados."""
+
+    def __init__(self, caminho):
+        import duckdb
+
+        self.caminho = caminho
+        self._con = duckdb.connect()
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()
+        self._versao = None
+
+    # ---------- infraestrutura ----------
+    def _fonte(self):
+        caminho = os.path.abspath(self.caminho).replace("'", "''")
+        if caminho.endswith(".parquet"):
+            return f"read_parquet('{caminho}')"
+        return f"read_csv('{caminho}', delim=';', header=true)"
+
+    def _consultar(self, sql, parametros=()):
+        with self._lock:
+            return self._con.execute(sql, list(parametros)).df()
+
+    def _em_cache(self, chave, calcular):
+        """Devolve o resultado de ``chave``; um arquivo novo em disco invalida tudo."""
+        versao = versao_arquivo(self.caminho)
+        with self._lock:
+            if versao != self._versao:
+                self._cache.clear()
+                self._versao = versao
+            if chave in self._cache:
+                self._cache.move_to_end(chave)
+                return self._cache[chave]
+        resultado = calcular()
+        with self._lock:
+            self._cache[chave] = resultado
+            while len(self._cache) > MAX_RESULTADOS:
+                self._cache.popitem(last=False)
+        return resultado
+
+    @staticmethod
+    def _filtro_contas(contas, coluna="property_display"):
+        """Trecho ``AND`` e parâmetros para limitar a um conjunto de contas (``None`` = todas)."""
+        if contas is None:
+            return "", []
+        return f" AND list_contains(?, {coluna})", [list(contas)]
+
+    # ---------- consultas ----------
+    def data_maxima(self):
+        return self._em_cache(("data_maxima",), lambda: pd.Timestamp(
+            self._consultar(f"SELECT max(CAST(date AS DATE)) AS d FROM {self._fonte()}")["d"].iloc[0]))
+
+    def contas_disponiveis(self, periodo, contas_ativas=None):
+        """Contas com sessões no período atual, em ordem alfabética."""
+        filtro, params = self._filtro_contas(contas_ativas)
+        sql = f"""
+            SELECT DISTINCT CAST(property_display AS VARCHAR) AS property_display
+            FROM {self._fonte()}
+            WHERE CAST(date AS DATE) BETWEEN ? AND ? AND sessions > 0{filtro}
+            ORDER BY 1
+        """
+        chave = ("contas", periodo["inicio_atual"], periodo["fim_atual"], _tupla(contas_ativas))
+        return self._em_cache(chave, lambda: self._consultar(
+            sql, [periodo["inicio_atual"].date(), periodo["fim_atual"].date(), *params]
+        )["property_display"].tolist())
+
+    def resumo_contas(self, periodo, meta_geral, criterio_ordenacao="Atingimento (%)",
+                      contas_ativas=None, selecionadas=None):
+        """Mesmo resultado de ``analise.resumo_periodo`` sobre o período atual, calculado em SQL.
+
+        A variação é a média das variações diárias da receita (como o
+        ``pct_change`` do pandas: dia anterior zerado gera ±infinito, 0→0 é ignorado).
+        """
+        filtro_ativas, params_ativas = self._filtro_contas(contas_ativas)
+        filtro_sel, params_sel = self._filtro_contas(selecionadas or None)
+        ordem = ORDENACAO_SQL.get(criterio_ordenacao, "property_display")
+        sql = f"""
+            WITH atual AS (
+                SELECT CAST(property_display AS VARCHAR) AS property_display,
+                       CAST(account_display AS VARCHAR) AS account_display,
+                       CAST(date AS DATE) AS date, sessions, transactions, purchaseRevenue,
+                       coalesce(purchaseRevenue, 0) AS rev
+                FROM {self._fonte()}
+                WHERE CAST(date AS DATE) BETWEEN ? AND ? AND sessions > 0{filtro_ativas}{filtro_sel}
+            ),
+            diarias AS (
+                SELECT *, lag(rev) OVER (PARTITION BY account_display, property_display ORDER BY date) AS rev_ant
+                FROM atual
+            ),
+            variacoes AS (
+                SELECT *, CASE
+                    WHEN rev_ant IS NULL OR (rev_ant = 0 AND rev = 0) THEN NULL
+                    WHEN rev_ant = 0 THEN sign(rev) * 'inf'::DOUBLE
+                    ELSE (rev - rev_ant) / rev_ant
+                END AS pct
+                FROM diarias
+            ),
+            totais AS (
+                SELECT property_display, account_display,
+                       sum(sessions) AS total_sessions,
+                       coalesce(sum(transactions), 0) AS total_transactions,
+                       coalesce(sum(purchaseRevenue), 0) AS total_revenue,
+                       CASE WHEN count(*) > 1 THEN avg(pct) * 100 ELSE 0 END AS var_revenue
+                FROM variacoes
+                GROUP BY property_display, account_display
+            )
+            SELECT *, total_revenue / ? * 100 AS atingimento,
+                   least(total_revenue / ? * 100, 9999) AS progresso_meta
+            FROM totais
+            ORDER BY {ordem}
+        """
+        params = [periodo["inicio_atual"].date(), periodo["fim_atual"].date(),
+                  *params_ativas, *params_sel, float(meta_geral), float(meta_geral)]
+        chave = ("resumo", periodo["inicio_atual"], periodo["fim_atual"], meta_geral, criterio_ordenacao,
+                 _tupla(contas_ativas), _tupla(selecionadas or None))
+        # As métricas derivadas saem do mesmo registro que o pandas usa
+        return self._em_cache(chave, lambda: avaliar(self._consultar(sql, params), colunas=COLUNAS_RESUMO))
+
+    def totais_dia(self, dia, contas_ativas=None):
+        """Contagens de um dia por conta (dias com sessões), como ``analise.totais_do_dia``."""
+        filtro, params = self._filtro_contas(contas_ativas)
+        sql = f"""
+            SELECT CAST(account_display AS VARCHAR) AS account_display,
+                   CAST(property_display AS VARCHAR) AS property_display,
+                   sum(sessions) AS sessions, coalesce(sum(transactions), 0) AS transactions,
+                   coalesce(sum(purchaseRevenue), 0) AS purchaseRevenue
+            FROM {self._fonte()}
+            WHERE CAST(date AS DATE) = ? AND sessions > 0{filtro}
+            GROUP BY 1, 2
+        """
+        chave = ("dia", pd.Timestamp(dia), _tupla(contas_ativas))
+        return self._em_cache(chave, lambda: self._consultar(sql, [pd.Timestamp(dia).date(), *params]))
+
+    def linhas_conta(self, conta, inicio, fim):
+        """Linhas diárias de uma conta no intervalo (para os gráficos da página de detalhes)."""
+        sql = f"""
+            SELECT * REPLACE (CAST(date AS TIMESTAMP) AS date)
+            FROM {self._fonte()}
+            WHERE property_display = ? AND CAST(date AS DATE) BETWEEN ? AND ?
+            ORDER BY date
+        """
+        chave = ("conta", conta, inicio, fim)
+        return self._em_cache(chave, lambda: self._consultar(
+            sql, [conta, pd.Timestamp(inicio).date(), pd.Timestamp(fim).date()]))
+
+
+def _tupla(contas):
+    return None if contas is None else tuple(sorted(contas))
+
+
+def criar_motor(caminho, query_params=None, environ=None):
+    """``MotorDuckDB`` se pedido (``motor=duckdb``) e disponível; senão ``None`` (pandas)."""
+    query_params = query_params or {}
+    environ = os.environ if environ is None else environ
+    pedido = (str(query_params.get("motor", "")) or environ.get("AGENGY_MOTOR", "")).lower()
+    if pedido != "duckdb" or not duckdb_disponivel():
+        return None
+    return MotorDuckDB(caminho)
@@ -0,0 +1,233 @@
+"""Armazém colunar particionado por propriedade (um arquivo Parquet por propriedade).
+
+A coleta grava cada propriedade assim que ela chega, sem acumular tudo em
+memória. Um pequeno índice guarda a chave de ordenação (conta, propriedade)
+e o ``property_id`` de cada parte, então leitores percorrem as partes já na ordem final — cada
+parte está ordenada por data — sem ``sort_values`` global.
+
+Sem ``pyarrow`` instalado as partes são gravadas em CSV, com a mesma interface.
+"""
+import hashlib
+import importlib.util
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+
+import pandas as pd
+
+from arquivos import gravar_bytes_atomico, hash_arquivo
+
+PARTES_DIR = 'ga4_partes'
+INDICE_FILE = '_indice.json'
+FORMATO_PADRAO = 'parquet' if importlib.util.find_spec('pyarrow') else 'csv'
+
+
+def nome_seguro(texto):
+    """Nome de arquivo estável para um identificador (ex.: ``properties/123`` → ``properties_123``)."""
+    return re.sub(r'[^A-Za-z0-9._-]+', '_', texto).strip('_')
+
+
+def nome_unico(texto):
+    """``nome_seguro`` legível + hash curto do texto original.
+
+    Nomes que só diferem em acentos ou pontuação ("Loja São Paulo" e
+    "Loja Sao Paulo") dão o mesmo ``nome_seguro``, mas não o mesmo ``nome_unico``.
+    """
+    return f"{nome_seguro(texto)}-{hashlib.sha1(texto.encode('utf-8')).hexdigest()[:8]}"
+
+
+class ArmazemParticionado:
+    """Diretório com uma parte por propriedade e um índice ``arquivo → [conta, propriedade, property_id]``."""
+
+    def __init__(self, raiz=PARTES_DIR, formato=None):
+        self.raiz = raiz
+        self._lock = threading.Lock()
+        indice = self._ler_indice()
+        self.formato = formato or indice.get('formato') or FORMATO_PADRAO
+
+    # ---------- índice ----------
+    def _caminho_indice(self):
+        return os.path.join(self.raiz, INDICE_FILE)
+
+    def _ler_indice(self):
+        try:
+            with open(self._caminho_indice(), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _gravar_indice(self, indice):
+        gravar_bytes_atomico(json.dumps(indice, ensure_ascii=False, indent=1).encode('utf-8'),
+                             self._caminho_indice())
+
+    # ---------- escrita ----------
+    def caminho(self, prop):
+        return os.path.join(self.raiz, f"{nome_seguro(prop['property_id'])}.{self.formato}")
+
+    def concluida(self, prop):
+        return os.path.exists(self.caminho(prop))
+
+    def salvar(self, prop, df):
+        """Grava (atomicamente) a parte de uma propriedade e registra sua chave no índice."""
+        self._gravar_parte(prop, lambda tmp: self._escrever(tmp, df))
+
+    def salvar_paginas(self, prop, paginas):
+        """Como ``salvar``, mas recebe a parte em pedaços (páginas já em ordem de data).
+
+        Cada página é escrita e descartada antes da próxima; se o iterador
+        falhar no meio, nada é gravado e a propriedade continua pendente.
+        """
+        self._gravar_parte(prop, lambda tmp: self._escrever_paginas(tmp, paginas))
+
+    def _escrever(self, tmp, df):
+        if self.formato == 'parquet':
+            df.to_parquet(tmp, index=False)
+        else:
+            df.to_csv(tmp, index=False, sep=';')
+
+    def _escrever_paginas(self, tmp, paginas):
+        if self.formato != 'parquet':
+            with open(tmp, 'w', encoding='utf-8', newline='') as destino:
+                for i, pagina in enumerate(paginas):
+                    pagina.to_csv(destino, index=False, sep=';', header=i == 0)
+            return
+
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        escritor = None
+        try:
+            for pagina in paginas:
+                if escritor is None:
+                    tabela = pa.Table.from_pandas(pagina, preserve_index=False)
+                    escritor = pq.ParquetWriter(tmp, tabela.schema)
+                else:
+                    tabela = pa.Table.from_pandas(pagina, schema=escritor.schema, preserve_index=False)
+                escritor.write_table(tabela)
+        finally:
+            if escritor is not None:
+                escritor.close()
+
+    def _gravar_parte(self, prop, escrever):
+        os.makedirs(self.raiz, exist_ok=True)
+        destino = self.caminho(prop)
+        fd, tmp = tempfile.mkstemp(dir=self.raiz, prefix='.tmp_', suffix=os.path.basename(destino))
+        os.close(fd)
+        try:
+            escrever(tmp)
+            os.replace(tmp, destino)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+        with self._lock:
+            indice = self._ler_indice()
+            indice['formato'] = self.formato
+            indice.setdefault('partes', {})[os.path.basename(destino)] = [
+                prop['account_display'], prop['property_display'], prop['property_id']]
+            self._gravar_indice(indice)
+
+    def salvar_frame(self, df, ids=None):
+        """Particiona um DataFrame já montado (uma parte por propriedade).
+
+        A parte leva o ``property_id`` das linhas (a mesma chave da coleta
+        completa). Linhas sem ele usam ``ids`` — ``(conta, propriedade) →
+        property_id``, ex.: ``ids()`` do armazém anterior — e, por fim, um
+        ``nome_unico`` de conta e propriedade, que não colide entre nomes que só
+        diferem em acentos.
+        """
+        ids = ids or {}
+        for (conta, nome), grupo in df.groupby(['account_display', 'property_display'], sort=False):
+            conhecidos = grupo['property_id'].dropna() if 'property_id' in grupo else grupo.iloc[0:0]
+            prop_id = conhecidos.iloc[0] if len(conhecidos) else ids.get((conta, nome))
+            if prop_id is None or pd.isna(prop_id):
+                prop_id = nome_unico(f"{conta}__{nome}")
+            self.salvar({'account_display': conta, 'property_display': nome, 'property_id': prop_id},
+                        grupo.drop(columns=['property_id'], errors='ignore').sort_values('date'))
+
+    # ---------- leitura ----------
+    def itens(self):
+        """``(caminho, propriedade)`` das partes existentes, na ordem (conta, propriedade).
+
+        ``propriedade`` tem o formato de ``listar_propriedades``; em índices
+        antigos, sem o ``property_id``, ele vem ``None``.
+        """
+        partes = self._ler_indice().get('partes', {})
+        ordem = sorted(partes.items(), key=lambda item: (item[1][0], item[1][1]))
+        return [(os.path.join(self.raiz, arq),
+                 {'account_display': chave[0], 'property_display': chave[1],
+                  'property_id': chave[2] if len(chave) > 2 else None})
+                for arq, chave in ordem if os.path.exists(os.path.join(self.raiz, arq))]
+
+    def ids(self):
+        """``(conta, propriedade) → property_id`` das partes existentes (as de índices antigos ficam de fora)."""
+        return {(prop['account_display'], prop['property_display']): prop['property_id']
+                for _, prop in self.itens() if prop['property_id']}
+
+    def partes(self):
+        """Caminhos das partes existentes, na ordem (conta, propriedade)."""
+        return [caminho for caminho, _ in self.itens()]
+
+    def ler_parte(self, caminho, colunas=None):
+        if caminho.endswith('.parquet'):
+            return pd.read_parquet(caminho, columns=colunas)
+        df = pd.read_csv(caminho, sep=';', usecols=colunas)
+        if 'date' in df.columns:
+            df['date'] = pd.to_datetime(df['date'])
+        return df
+
+    def iterar(self, colunas=None):
+        """Gera as partes já ordenadas, uma por vez (memória de uma propriedade)."""
+        for caminho in self.partes():
+            yield self.ler_parte(caminho, colunas)
+
+    def ler(self, colunas=None):
+        """Base inteira em ordem (conta, propriedade, data), sem ordenação global."""
+        partes = [p for p in self.iterar(colunas) if not p.empty]
+        if not partes:
+            return pd.DataFrame(columns=colunas)
+        return pd.concat(partes, ignore_index=True)
+
+    def exportar_csv(self, saida):
+        """Escreve o CSV consolidado parte a parte (atômico). Retorna True se o arquivo mudou."""
+        if not self.partes():
+            return False
+        diretorio = os.path.dirname(os.path.abspath(saida))
+        fd, tmp = tempfile.mkstemp(dir=diretorio, prefix='.tmp_', suffix=os.path.basename(saida))
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8', newline='') as destino:
+                cabecalho = True
+                for df in self.iterar():
+                    df.to_csv(destino, sep=';', index=False, header=cabecalho)
+                    cabecalho = False
+            if hash_arquivo(saida) == hash_arquivo(tmp):
+                os.remove(tmp)
+                return False
+            os.replace(tmp, saida)
+            return True
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    # ---------- ciclo de vida ----------
+    def limpar(self):
+        shutil.rmtree(self.raiz, ignore_errors=True)
+
+    def promover(self, destino=PARTES_DIR):
+        """Troca ``destino`` por este armazém (renomeações de diretório, sem cópia)."""
+        antigo = None
+        if os.path.exists(destino):
+            antigo = f"{destino}.antigo"
+            shutil.rmtree(antigo, ignore_errors=True)
+            os.replace(destino, antigo)
+        os.makedirs(os.path.dirname(os.path.abspath(destino)), exist_ok=True)
+        os.replace(self.raiz, destino)
+        if antigo:
+            shutil.rmtree(antigo, ignore_errors=True)
+        self.raiz = destino
+        return self
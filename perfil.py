@@ -0,0 +1,86 @@
+"""Instrumentação opcional das seções do dashboard a cada rerun.
+
+Ativada por ``?perfil=1`` na URL ou pela variável de ambiente ``AGENGY_PERFIL=1``.
+Com ``AGENGY_PERFIL_LOG=<arquivo>`` os tempos de cada rerun também são
+anexados a um JSONL para análise posterior. A gravação em disco só é ligada
+pelo ambiente do servidor: pela URL um visitante vê, no máximo, a tabela na página.
+
+Um ``st.fragment`` reexecuta só a própria função, sem o resto do script: cada
+fragmento mede as suas seções num ``Perfilador.fragmento()`` e exibe/grava os
+tempos ao final, em vez de depender do perfilador do rerun completo.
+"""
+import json
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+
+class Perfilador:
+    """Acumula o tempo (ms) de seções nomeadas; inativo, não custa nada além de uma checagem."""
+
+    def __init__(self, ativo=False, log_path=None):
+        self.ativo = ativo
+        self.log_path = log_path
+        self.tempos = {}
+        self._abertas = {}
+        self._inicio = time.perf_counter()
+
+    @contextmanager
+    def secao(self, nome):
+        self.iniciar(nome)
+        try:
+            yield
+        finally:
+            self.encerrar(nome)
+
+    def iniciar(self, nome):
+        if self.ativo:
+            self._abertas[nome] = time.perf_counter()
+
+    def encerrar(self, nome):
+        if self.ativo and nome in self._abertas:
+            decorrido = (time.perf_counter() - self._abertas.pop(nome)) * 1000
+            # Seções repetidas no mesmo rerun (ex.: vários gráficos) são somadas
+            self.tempos[nome] = self.tempos.get(nome, 0.0) + decorrido
+
+    def fragmento(self):
+        """Perfilador vazio com a mesma configuração, para as seções de um fragmento."""
+        return Perfilador(ativo=self.ativo, log_path=self.log_path)
+
+    def total_ms(self):
+        return (time.perf_counter() - self._inicio) * 1000
+
+    def registro(self, **contexto):
+        """Dicionário de um rerun: horário, contexto informado, seções e total."""
+        return {
+            "ts": datetime.now().isoformat(timespec="seconds"),
+            **contexto,
+            "secoes_ms": {k: round(v, 2) for k, v in self.tempos.items()},
+            "total_ms": round(self.total_ms(), 2),
+        }
+
+    def gravar(self, **contexto):
+        """Anexa o registro do rerun ao JSONL (se houver arquivo configurado)."""
+        if not (self.ativo and self.log_path):
+            return None
+        reg = self.registro(**contexto)
+        with open(self.log_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(reg, ensure_ascii=False) + "\n")
+        return reg
+
+
+def criar_perfilador(query_params=None, environ=None):
+    """Cria o perfilador conforme o query param ``perfil`` e as variáveis de ambiente.
+
+    O log em disco vem só de ``AGENGY_PERFIL_LOG`` (nunca da URL).
+    """
+    query_params = query_params or {}
+    environ = os.environ if environ is None else environ
+
+    ligado = {"1", "true", "sim"}
+    ativo = (str(query_params.get("perfil", "")).lower() in ligado
+             or environ.get("AGENGY_PERFIL", "").lower() in ligado)
+
+    log_path = environ.get("AGENGY_PERFIL_LOG") or None
+    return Perfilador(ativo=ativo, log_path=log_path)
@@ -0,0 +1,191 @@
+"""Executa o pipeline de dados (coleta → montagem da base) pela linha de comando.
+
+Uso:
+    python pipeline.py collect   # coleta do GA4 → ga4_100.csv
+    python pipeline.py build     # ga4_100.csv → base_comparativa.csv + contas_config.csv
+    python pipeline.py all       # as duas etapas em sequência
+    python pipeline.py schedule --intervalo 60   # coleta incremental + montagem a cada 60 min
+
+Cada etapa só é executada quando a impressão digital das suas entradas mudou
+desde a última execução bem-sucedida (use --forcar para ignorar o cache).
+"""
+import argparse
+import hashlib
+import json
+import os
+import time
+
+import coletar_dados
+import montar_base
+from arquivos import hash_arquivo
+
+ESTADO_FILE = '.pipeline_estado.json'
+
+
+# ==========================
+# 🔏 Impressões digitais das entradas
+# ==========================
+def impressao_digital(partes):
+    """Combina as partes (já serializáveis) em uma única impressão digital."""
+    return hashlib.sha256(json.dumps(partes, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def ler_estado(caminho=ESTADO_FILE):
+    if not os.path.exists(caminho):
+        return {}
+    try:
+        with open(caminho, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def salvar_estado(estado, caminho=ESTADO_FILE):
+    tmp = f"{caminho}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(estado, f, indent=2, sort_keys=True)
+    os.replace(tmp, caminho)
+
+
+# ==========================
+# 🧱 Etapas
+# ==========================
+class Etapa:
+    """Uma etapa do pipeline: entradas → função → saídas."""
+
+    def __init__(self, nome, entradas, saidas, executar, sempre=False):
+        self.nome = nome
+        self.entradas = entradas  # callable → lista de partes da impressão digital
+        self.saidas = saidas
+        self.executar = executar
+        self.sempre = sempre  # executa mesmo com as entradas inalteradas
+
+    def impressao(self):
+        return impressao_digital(self.entradas())
+
+
+def etapa_coleta(config_path=coletar_dados.CONFIG_FILE, saida=coletar_dados.SAIDA_FILE, hoje=None,
+                 incremental=False, retomar=False, workers=coletar_dados.WORKERS_COLETA):
+    """A coleta depende das contas ativas no config e da janela de datas (muda a cada dia)."""
+    def entradas():
+        inicio, fim = coletar_dados.periodo_coleta(hoje)
+        return [hash_arquivo(config_path), inicio.isoformat(), fim.isoformat()]
+
+    # Uma retomada sempre executa a coleta, mesmo que a janela não tenha mudado
+    return Etapa('collect', entradas, [saida],
+                 lambda: coletar_dados.main(config_path=config_path, saida=saida, incremental=incremental,
+                                            retomar=retomar, workers=workers),
+                 sempre=retomar)
+
+
+def etapa_montagem(entrada=montar_base.ENTRADA_FILE, saida=montar_base.SAIDA_FILE,
+                   config_path=montar_base.CONFIG_FILE):
+    """A montagem depende apenas do conteúdo da base bruta que ela lê (partes ou CSV)."""
+    # ga4_partes/ é publicado junto com o CSV padrão da coleta; outras entradas são só CSV
+    partes = montar_base.PARTES_DIR if entrada == montar_base.ENTRADA_FILE else None
+    return Etapa('build', lambda: montar_base.impressao_entrada(entrada, partes), [saida],
+                 lambda: montar_base.main(entrada=entrada, saida=saida, config_path=config_path,
+                                          partes=partes))
+
+
+def executar_etapas(etapas, forcar=False, estado_path=ESTADO_FILE):
+    """Executa as etapas em ordem, pulando as que não mudaram. Retorna {nome: segundos | None}."""
+    estado = ler_estado(estado_path)
+    tempos = {}
+
+    for etapa in etapas:
+        inicio = time.perf_counter()
+        impressao = etapa.impressao()
+        saidas_ok = all(os.path.exists(s) for s in etapa.saidas)
+
+        if not (forcar or etapa.sempre) and saidas_ok and estado.get(etapa.nome) == impressao:
+            print(f"⏭️  [{etapa.nome}] entradas inalteradas, etapa ignorada")
+            tempos[etapa.nome] = None
+            continue
+
+        print(f"▶️  [{etapa.nome}] executando...")
+        etapa.executar()
+        decorrido = time.perf_counter() - inicio
+        tempos[etapa.nome] = decorrido
+
+        # A impressão é recalculada depois da execução: a etapa pode ter alterado as próprias entradas
+        estado[etapa.nome] = etapa.impressao()
+        salvar_estado(estado, estado_path)
+        print(f"⏱️  [{etapa.nome}] concluída em {decorrido:.2f}s")
+
+    return tempos
+
+
+# ==========================
+# ⏰ Agendador de atualização automática
+# ==========================
+def executar_ciclo(saida_base=montar_base.SAIDA_FILE, estado_path=ESTADO_FILE):
+    """Um ciclo do agendador: coleta incremental + montagem. Retorna True se a base mudou."""
+    antes = hash_arquivo(saida_base)
+    # Dados do dia mudam ao longo do dia: a coleta incremental roda sempre,
+    # a montagem continua condicionada à mudança da base bruta.
+    executar_etapas([etapa_coleta(incremental=True)], forcar=True, estado_path=estado_path)
+    executar_etapas([etapa_montagem(saida=saida_base)], estado_path=estado_path)
+    return hash_arquivo(saida_base) != antes
+
+
+def agendar(intervalo_min, max_ciclos=None, estado_path=ESTADO_FILE):
+    """Processo de longa duração que atualiza os dados a cada ``intervalo_min`` minutos.
+
+    Os arquivos são trocados atomicamente e só quando o conteúdo muda, então o
+    dashboard (cache chaveado pela versão do arquivo) só recarrega quando há dado novo.
+    """
+    ciclo = 0
+    while max_ciclos is None or ciclo < max_ciclos:
+        ciclo += 1
+        inicio = time.perf_counter()
+        print(f"🔄 Ciclo {ciclo} iniciado em {time.strftime('%d/%m/%Y %H:%M:%S')}")
+        try:
+            mudou = executar_ciclo(estado_path=estado_path)
+            print(f"{'🆕 Base atualizada' if mudou else '💤 Nenhum dado novo'} "
+                  f"({time.perf_counter() - inicio:.2f}s)")
+        except Exception as e:
+            # Uma falha pontual (rede, token) não deve derrubar o agendador
+            print(f"❌ Erro no ciclo {ciclo}: {e}")
+
+        if max_ciclos is not None and ciclo >= max_ciclos:
+            break
+        time.sleep(max(0.0, intervalo_min * 60 - (time.perf_counter() - inicio)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pipeline de dados do dashboard GA4")
+    parser.add_argument('comando', choices=['collect', 'build', 'all', 'schedule'])
+    parser.add_argument('--forcar', action='store_true', help="executa mesmo sem mudanças nas entradas")
+    parser.add_argument('--incremental', action='store_true',
+                        help="coleta apenas os dias novos, mesclando com o ga4_100.csv existente")
+    parser.add_argument('--retomar', action='store_true',
+                        help="reaproveita as propriedades já gravadas no staging por uma coleta interrompida")
+    parser.add_argument('--workers', type=int, default=coletar_dados.WORKERS_COLETA,
+                        help=f"propriedades coletadas em paralelo (padrão: {coletar_dados.WORKERS_COLETA})")
+    parser.add_argument('--intervalo', type=float, default=60,
+                        help="minutos entre ciclos do comando schedule (padrão: 60)")
+    args = parser.parse_args(argv)
+
+    if args.comando == 'schedule':
+        agendar(args.intervalo)
+        return
+
+    etapas = {
+        'collect': [etapa_coleta(incremental=args.incremental, retomar=args.retomar, workers=args.workers)],
+        'build': [etapa_montagem()],
+        'all': [etapa_coleta(incremental=args.incremental, retomar=args.retomar, workers=args.workers),
+                etapa_montagem()],
+    }[args.comando]
+
+    inicio = time.perf_counter()
+    try:
+        executar_etapas(etapas, forcar=args.forcar)
+    except coletar_dados.ColetaIncompleta as e:
+        print(f"⚠️ {e}")
+        raise SystemExit(1)
+    print(f"✅ Pipeline '{args.comando}' finalizado em {time.perf_counter() - inicio:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""Relatórios estáticos por conta (HTML e, opcionalmente, PDF) sem o runtime do Streamlit.
+
+Reproduz a página de detalhes — KPIs do card, os gráficos de
+``graficos.GRAFICOS_DETALHES`` e o card de links — para todas as contas ativas:
+
+    python relatorios.py --periodo "Mês atual" --saida relatorios --formatos html pdf
+
+A base é lida e agregada uma única vez (totais de todas as contas num só
+``resumo_periodo`` e um único ``groupby`` das linhas do período); só a
+renderização, que é o trabalho caro, é distribuída entre processos.
+O PDF depende do ``vl-convert-python`` (o mesmo que o ``altair`` usa em ``chart.save``).
+"""
+import argparse
+import html
+import importlib.util
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import altair as alt
+import pandas as pd
+
+from analise import META_GERAL, PERIODOS, calcular_periodo, links_conta, listar_contas_ativas, resumo_periodo
+from arquivos import gravar_bytes_atomico
+from dados import DADOS_PATH, ler_base
+from graficos import GRAFICOS_DETALHES, montar_grafico_combinado
+from particoes import nome_unico
+
+CONFIG_PATH = 'contas_config.csv'
+RELATORIOS_DIR = 'relatorios'
+FORMATOS = ('html', 'pdf')
+
+MODELO_HTML = """<!DOCTYPE html>
+<html lang="pt-BR">
+<head>
+<meta charset="utf-8">
+<title>{titulo}</title>
+<script src="https://cdn.jsdelivr.net/npm/vega@{vega}"></script>
+<script src="https://cdn.jsdelivr.net/npm/vega-lite@{vegalite}"></script>
+<script src="https://cdn.jsdelivr.net/npm/vega-embed@{vegaembed}"></script>
+<style>
+body {{ font-family: sans-serif; margin: 32px; color: #1f2937; }}
+.kpis {{ display: flex; gap: 32px; margin: 16px 0 24px; }}
+.kpis div {{ border: 1px solid #e5e7eb; border-radius: 8px; padding: 12px 20px; }}
+.graficos {{ display: grid; grid-template-columns: 1fr 1fr; gap: 16px; }}
+.positivo {{ color: #16a34a; }} .negativo {{ color: #dc2626; }}
+</style>
+</head>
+<body>
+<h1>📊 {conta}</h1>
+<p>📆 {inicio} até {fim} ({periodo})</p>
+<div class="kpis">
+<div><b>Receita</b><br>R$ {receita:,.2f}<br><span class="{classe_var}">{variacao:+.1f}%</span></div>
+<div><b>Sessões</b><br>{sessoes:,.0f}</div>
+<div><b>Atingimento previsto</b><br>{atingimento:.2f}% de R$ {meta:,.0f}</div>
+</div>
+<div class="graficos">{graficos}</div>
+{links}
+<script>{embeds}</script>
+</body>
+</html>
+"""
+
+
+# ============================================================
+# 🧮 AGREGAÇÃO (uma passada para todas as contas)
+# ============================================================
+def preparar_relatorios(df, df_config, tipo_periodo, meta_geral=META_GERAL, hoje=None, contas=None):
+    """Um item por conta com KPIs, linhas do período e links — tudo que a renderização precisa."""
+    ativas = listar_contas_ativas(df_config) if df_config is not None else None
+    if contas:
+        pedidas = set(contas)
+        ativas = list(contas) if ativas is None else [c for c in ativas if c in pedidas]
+
+    periodo = calcular_periodo(tipo_periodo, hoje)
+    resumo = resumo_periodo(df, tipo_periodo, meta_geral, "Nome da conta (A-Z)", ativas=ativas, hoje=hoje)
+
+    recorte = df[(df["date"] >= periodo["inicio_atual"]) & (df["date"] <= periodo["fim_atual"])]
+    recorte = recorte[recorte["property_display"].isin(resumo["property_display"])]
+    linhas = {str(conta): grupo for conta, grupo in recorte.groupby("property_display", observed=True)}
+
+    config = {}
+    if df_config is not None and "property_display" in df_config.columns:
+        config = {r["property_display"]: r for r in df_config.to_dict(orient="records")}
+
+    return [
+        {
+            "conta": r.property_display,
+            "periodo": tipo_periodo,
+            "inicio": periodo["inicio_atual"],
+            "fim": periodo["fim_atual"],
+            "meta": meta_geral,
+            "sessoes": r.total_sessions,
+            "receita": r.total_revenue,
+            "variacao": r.var_revenue,
+            "atingimento": r.progresso_meta,
+            "linhas": linhas.get(r.property_display, df.iloc[0:0]),
+            "links": links_conta(config[r.property_display]) if r.property_display in config else [],
+        }
+        for r in resumo.itertuples(index=False)
+    ]
+
+
+# ============================================================
+# 🖨️ RENDERIZAÇÃO (roda nos processos)
+# ============================================================
+def _graficos(item):
+    return [(f"g{i}", grafico) for i, (metrica, titulo) in enumerate(GRAFICOS_DETALHES)
+            if (grafico := montar_grafico_combinado(item["linhas"], metrica, titulo)) is not None]
+
+
+def renderizar_html(item):
+    graficos = _graficos(item)
+    links = ""
+    if item["links"]:
+        itens = "".join(f"<li><a href='{html.escape(str(link['url']))}'>{html.escape(str(link['titulo']))}</a></li>"
+                        for link in item["links"])
+        links = f"<h3>🔗 Links da conta</h3><ul>{itens}</ul>"
+    variacao = item["variacao"] if pd.notna(item["variacao"]) else 0.0
+    return MODELO_HTML.format(
+        titulo=html.escape(item["conta"]),
+        conta=html.escape(item["conta"]),
+        vega=alt.VEGA_VERSION, vegalite=alt.VEGALITE_VERSION, vegaembed=alt.VEGAEMBED_VERSION,
+        periodo=html.escape(item["periodo"]),
+        inicio=item["inicio"].strftime("%d/%m/%Y"),
+        fim=item["fim"].strftime("%d/%m/%Y"),
+        receita=item["receita"], variacao=variacao, classe_var="positivo" if variacao >= 0 else "negativo",
+        sessoes=item["sessoes"], atingimento=item["atingimento"], meta=item["meta"],
+        graficos="".join(f'<div id="{id_}"></div>' for id_, _ in graficos),
+        links=links,
+        embeds="".join(f'vegaEmbed("#{id_}", {grafico.to_json(indent=None, validate=False)});' for id_, grafico in graficos),
+    )
+
+
+def renderizar_pdf(item, caminho):
+    """Os gráficos em grade (dois por linha), com os KPIs no título, salvos em PDF (via ``vl-convert``)."""
+    graficos = [g for _, g in _graficos(item)]
+    pares = [alt.hconcat(*graficos[i:i + 2]) for i in range(0, len(graficos), 2)]
+    variacao = item["variacao"] if pd.notna(item["variacao"]) else 0.0
+    subtitulo = [
+        f"{item['inicio']:%d/%m/%Y} até {item['fim']:%d/%m/%Y} ({item['periodo']})",
+        f"Receita R$ {item['receita']:,.2f} ({variacao:+.1f}%) · Sessões {item['sessoes']:,.0f} · "
+        f"Atingimento {item['atingimento']:.2f}% de R$ {item['meta']:,.0f}",
+        *(f"{link['titulo']}: {link['url']}" for link in item["links"]),
+    ]
+    pagina = alt.vconcat(*pares).properties(title=alt.TitleParams(item["conta"], subtitle=subtitulo))
+    pagina.save(caminho, format="pdf")
+
+
+def renderizar(item, destino, formatos=("html",)):
+    """Gera os arquivos de uma conta; devolve os caminhos gravados.
+
+    O nome do arquivo leva um hash do nome da conta, então contas que só
+    diferem em acentos ou pontuação não sobrescrevem o relatório uma da outra.
+    """
+    base = os.path.join(destino, nome_unico(item["conta"]))
+    gravados = []
+    if "html" in formatos:
+        gravar_bytes_atomico(renderizar_html(item).encode("utf-8"), f"{base}.html")
+        gravados.append(f"{base}.html")
+    if "pdf" in formatos:
+        renderizar_pdf(item, f"{base}.pdf")
+        gravados.append(f"{base}.pdf")
+    return gravados
+
+
+def _renderizar_lote(args):
+    return renderizar(*args)
+
+
+def gerar_relatorios(itens, destino=RELATORIOS_DIR, formatos=("html",), workers=None):
+    """Renderiza todos os itens em paralelo (``workers=1`` roda no próprio processo)."""
+    if "pdf" in formatos and not importlib.util.find_spec("vl_convert"):
+        raise RuntimeError("Relatórios em PDF precisam do pacote vl-convert-python")
+    contas = [item["conta"] for item in itens]
+    repetidas = sorted({c for c in contas if contas.count(c) > 1})
+    if repetidas:
+        raise ValueError(f"Contas repetidas no lote (o relatório de uma sobrescreveria o da outra): {repetidas}")
+    os.makedirs(destino, exist_ok=True)
+    tarefas = [(item, destino, tuple(formatos)) for item in itens]
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(tarefas) <= 1:
+        return [_renderizar_lote(t) for t in tarefas]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_renderizar_lote, tarefas, chunksize=max(1, len(tarefas) // (workers * 4))))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Relatórios estáticos por conta (HTML/PDF)")
+    parser.add_argument('--periodo', default="Mês atual", choices=PERIODOS)
+    parser.add_argument('--saida', default=RELATORIOS_DIR)
+    parser.add_argument('--formatos', nargs='+', default=['html'], choices=FORMATOS)
+    parser.add_argument('--contas', nargs='+', help="limita a estas contas (property_display)")
+    parser.add_argument('--workers', type=int, default=None, help="processos de renderização (padrão: CPUs)")
+    parser.add_argument('--dados', default=DADOS_PATH)
+    parser.add_argument('--config', default=CONFIG_PATH)
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    df = ler_base(args.dados)
+    df_config = pd.read_csv(args.config, sep=';') if os.path.exists(args.config) else None
+    itens = preparar_relatorios(df, df_config, args.periodo, contas=args.contas)
+    agregacao = time.perf_counter() - inicio
+
+    arquivos = gerar_relatorios(itens, args.saida, args.formatos, args.workers)
+    total = time.perf_counter() - inicio
+    print(f"🖨️ {len(itens)} relatórios ({sum(map(len, arquivos))} arquivos) em {args.saida}/ — "
+          f"agregação {agregacao:.1f}s, total {total:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""Geradores de dados sintéticos no formato das bases reais.
+
+Usados para medir memória e tempo do pipeline sem depender da API do GA4.
+"""
+import numpy as np
+import pandas as pd
+
+
+def gerar_base_bruta(n_propriedades, n_dias, fim=None, seed=0):
+    """Gera um DataFrame com o formato do ``ga4_100.csv`` (N propriedades × D dias)."""
+    rng = np.random.default_rng(seed)
+    fim = pd.Timestamp(fim or pd.Timestamp.today().normalize())
+    datas = pd.date_range(end=fim, periods=n_dias, freq="D")
+
+    n = n_propriedades * n_dias
+    sessions = rng.poisson(rng.integers(5, 2000, n_propriedades).repeat(n_dias)).astype("int64")
+    transactions = rng.binomial(sessions, 0.02)
+    revenue = np.round(transactions * rng.gamma(2.0, 150.0, n), 2)
+
+    contas = np.array([f"Conta {i // 3:05d}" for i in range(n_propriedades)])
+    propriedades = np.array([f"Propriedade {i:05d} – GA4" for i in range(n_propriedades)])
+
+    df = pd.DataFrame({
+        "date": np.tile(datas.values, n_propriedades),
+        "sessions": sessions,
+        "transactions": transactions,
+        "purchaseRevenue": revenue,
+        "account_display": contas.repeat(n_dias),
+        "property_display": propriedades.repeat(n_dias),
+    })
+    return df
+
+
+def gerar_base_comparativa(n_linhas, seed=0, com_links=True):
+    """Gera uma base com o formato do ``base_comparativa.csv`` com ~``n_linhas`` linhas."""
+    from montar_base import LINKS_PADRAO, metrics
+
+    n_dias = 50
+    n_propriedades = max(1, n_linhas // n_dias)
+    atual = gerar_base_bruta(n_propriedades, n_dias, seed=seed)
+    anterior = gerar_base_bruta(n_propriedades, n_dias, seed=seed + 1)
+
+    df = atual[["date", "account_display", "property_display"] + metrics].copy()
+    for m in metrics:
+        df[f"{m}_prev"] = anterior[m].to_numpy()
+    if com_links:
+        df["links"] = LINKS_PADRAO
+    return df.head(n_linhas)
@@ -0,0 +1,47 @@
+"""Área de staging da coleta: um arquivo por propriedade, gravado assim que a propriedade termina.
+
+Se a coleta cair no meio (token expirado, rede), ``--retomar`` reaproveita o que
+já foi gravado e busca só as propriedades que faltam. O staging é um
+``ArmazemParticionado``: ao fim da coleta ele é publicado como ``ga4_partes/``
+e o CSV consolidado é escrito parte a parte, sem ordenação global.
+"""
+import os
+import shutil
+import tempfile
+
+from particoes import ArmazemParticionado, nome_seguro
+
+STAGING_DIR = '.coleta_staging'
+
+
+class AreaStaging(ArmazemParticionado):
+    """Partes por propriedade de uma execução (identificada pela janela de coleta)."""
+
+    def __init__(self, execucao, raiz=STAGING_DIR, formato=None):
+        self.execucao = execucao
+        self.raiz_staging = raiz
+        super().__init__(os.path.join(raiz, nome_seguro(execucao)), formato)
+
+    def publicar(self, destino, manter=False):
+        """Publica as partes em ``destino``. Com ``manter`` publica uma cópia e o staging continua retomável."""
+        if not manter:
+            return ArmazemParticionado(self.raiz, self.formato).promover(destino)
+        copia = tempfile.mkdtemp(dir=self.raiz_staging, prefix='.copia_')
+        shutil.rmtree(copia)
+        shutil.copytree(self.raiz, copia)
+        return ArmazemParticionado(copia, self.formato).promover(destino)
+
+    def limpar(self):
+        super().limpar()
+        if os.path.isdir(self.raiz_staging) and not os.listdir(self.raiz_staging):
+            os.rmdir(self.raiz_staging)
+
+
+def limpar_execucoes_antigas(execucao_atual, raiz=STAGING_DIR):
+    """Remove partes de execuções de outras janelas (não podem mais ser retomadas)."""
+    if not os.path.isdir(raiz):
+        return
+    atual = nome_seguro(execucao_atual)
+    for nome in os.listdir(raiz):
+        if nome != atual:
+            shutil.rmtree(os.path.join(raiz, nome), ignore_errors=True)
@@ -0,0 +1,104 @@
+"""Telemetria das execuções de coleta: latência, tentativas, linhas, bytes e cota por propriedade.
+
+O relatório é gravado em JSON ao fim de cada coleta (``relatorio_coleta.json``)
+para identificar propriedades lentas ou perto do limite de cota do GA4.
+"""
+import json
+import threading
+import time
+from datetime import datetime
+
+from arquivos import gravar_bytes_atomico
+from cota import TOKENS_PROJETO_HORA, TOKENS_PROPRIEDADE_HORA
+
+RELATORIO_FILE = 'relatorio_coleta.json'
+# Acima desta fração consumida uma cota é sinalizada como "perto do limite"
+LIMIAR_COTA = 0.8
+# Limites de uma propriedade GA4 padrão para as cotas acumuladas no período.
+# ``concurrentRequests`` fica de fora: é instantânea, não um saldo que se esgota.
+LIMITES_COTA = {
+    'tokensPerDay': 200000,
+    'tokensPerHour': TOKENS_PROPRIEDADE_HORA,
+    'tokensPerProjectPerHour': TOKENS_PROJETO_HORA,
+    'serverErrorsPerProjectPerHour': 10,
+    'potentiallyThresholdedRequestsPerHour': 120,
+}
+
+
+def fracao_consumida(cota, limites=None):
+    """Maior fração consumida entre as cotas de um ``propertyQuota`` (0 a 1, ou None).
+
+    O ``consumed`` da resposta é o custo só daquela requisição; o acumulado do
+    período é ``limite - remaining``, então a fração é ``1 - remaining / limite``.
+    """
+    limites = LIMITES_COTA if limites is None else limites
+    fracoes = []
+    for chave, valores in (cota or {}).items():
+        limite = limites.get(chave)
+        if not isinstance(valores, dict) or not limite or valores.get('remaining') is None:
+            continue
+        fracoes.append(min(1.0, max(0.0, 1 - valores['remaining'] / limite)))
+    return max(fracoes) if fracoes else None
+
+
+class RelatorioColeta:
+    """Acumula as métricas de cada requisição de uma execução (seguro entre threads)."""
+
+    def __init__(self, limites_cota=None):
+        self.inicio = time.time()
+        # Limites de cota das propriedades (padrão: ``LIMITES_COTA``; propriedades 360 têm outros)
+        self.limites_cota = limites_cota
+        self.propriedades = {}
+        # Tempos de autenticação/discovery/build dos clientes (preenchido pela coleta)
+        self.inicializacao = {}
+        self._lock = threading.Lock()
+
+    def registrar(self, property_id, **campos):
+        """Soma/atualiza as métricas de uma propriedade (várias requisições por propriedade somam)."""
+        with self._lock:
+            reg = self.propriedades.setdefault(property_id, {
+                'property_id': property_id,
+                'requisicoes': 0,
+                'tentativas': 0,
+                'latencia_s': 0.0,
+                'linhas': 0,
+                'bytes': 0,
+                'erro': None,
+                'cota': None,
+            })
+            reg['requisicoes'] += 1
+            for chave in ('tentativas', 'latencia_s', 'linhas', 'bytes'):
+                reg[chave] += campos.pop(chave, 0)
+            if campos.get('cota') is None:
+                campos.pop('cota', None)
+            reg.update(campos)
+
+    def resumo(self, top=10):
+        """Totais da execução e as propriedades mais lentas / mais perto da cota."""
+        with self._lock:
+            registros = [dict(r) for r in self.propriedades.values()]
+
+        for r in registros:
+            r['fracao_cota'] = fracao_consumida(r.get('cota'), self.limites_cota)
+
+        return {
+            'inicio': datetime.fromtimestamp(self.inicio).isoformat(timespec='seconds'),
+            'duracao_s': round(time.time() - self.inicio, 3),
+            'inicializacao': dict(self.inicializacao),
+            'propriedades': len(registros),
+            'requisicoes': sum(r['requisicoes'] for r in registros),
+            'retentativas': sum(r['tentativas'] - r['requisicoes'] for r in registros),
+            'erros': sum(1 for r in registros if r['erro']),
+            'linhas': sum(r['linhas'] for r in registros),
+            'bytes': sum(r['bytes'] for r in registros),
+            'mais_lentas': [r['property_id'] for r in
+                            sorted(registros, key=lambda r: r['latencia_s'], reverse=True)[:top]],
+            'perto_da_cota': [r['property_id'] for r in registros
+                              if r['fracao_cota'] is not None and r['fracao_cota'] >= LIMIAR_COTA],
+            'detalhes': sorted(registros, key=lambda r: r['property_id']),
+        }
+
+    def salvar(self, caminho=RELATORIO_FILE):
+        resumo = self.resumo()
+        gravar_bytes_atomico(json.dumps(resumo, indent=2, ensure_ascii=False).encode('utf-8'), caminho)
+        return resumo
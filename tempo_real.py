@@ -0,0 +1,201 @@
+"""Números de hoje (intraday) por propriedade, fora da coleta em lote.
+
+A base só tem o dia de hoje como estava na hora da coleta. Com
+``AGENGY_TEMPO_REAL=1`` o app mantém uma ``CamadaTempoReal`` por processo: uma
+thread busca, a cada ``TTL_S`` segundos, sessões, transações e receita de hoje de cada
+propriedade ativa (``runReport`` com ``today``, em paralelo e no ritmo do
+``cota.AgendadorCota``) e os usuários ativos agora (``runRealtimeReport``).
+As sessões só leem o último retrato — nenhum clique dispara chamada à API.
+
+O GA4 cobra os relatórios em tempo real de uma cota separada (Realtime), então
+o ``runRealtimeReport`` passa por um ``AgendadorCota`` próprio: o laço da
+camada fica no ritmo dessa cota sem consumir a da coleta agendada.
+
+O ``runRealtimeReport`` cobre só os últimos 30 minutos e não tem sessões nem
+receita, por isso os totais do dia vêm do ``runReport``; dele fica apenas
+``usuarios_ativos``.
+"""
+import os
+import threading
+import time
+from datetime import date, datetime
+
+import pandas as pd
+
+import coletar_dados
+
+TTL_S = 300
+# A lista de propriedades (Admin API) é refeita a cada hora, a mesma janela das cotas do GA4
+TTL_PROPRIEDADES_S = 3600
+WORKERS = 8
+COLUNAS_HOJE = ["account_display", "property_display", "sessions", "transactions", "purchaseRevenue", "usuarios_ativos"]
+
+
+def ativada(environ=None):
+    environ = os.environ if environ is None else environ
+    return environ.get("AGENGY_TEMPO_REAL", "").lower() in ("1", "true", "sim")
+
+
+# ============================================================
+# 📡 CONSULTAS AO GA4
+# ============================================================
+def _total(resposta, indice):
+    linhas = resposta.get("rows", [])
+    return sum(float(r["metricValues"][indice]["value"]) for r in linhas)
+
+
+def _executar(requisicao, property_id, agendador=None):
+    """Executa a requisição dentro da cota do ``agendador`` (se houver) e a reconcilia com a resposta."""
+    reservado = agendador.reservar(property_id) if agendador else 0
+    try:
+        resposta = requisicao.execute()
+    except Exception as erro:
+        if agendador:
+            agendador.falhou(property_id, coletar_dados.status_http(erro))
+        raise
+    if agendador:
+        agendador.concluir(property_id, reservado, resposta.get("propertyQuota"))
+    return resposta
+
+
+def buscar_hoje(analytics_data, prop, agendador=None, agendador_tempo_real=None):
+    """Contagens de hoje (até agora) e usuários ativos nos últimos 30 minutos de uma propriedade.
+
+    ``agendador`` cadencia o ``runReport`` (cota Core) e ``agendador_tempo_real``
+    o ``runRealtimeReport`` (cota Realtime).
+    """
+    property_id = prop["property_id"]
+    dia = _executar(analytics_data.properties().runReport(property=property_id, body={
+        "dateRanges": [{"startDate": "today", "endDate": "today"}],
+        "metrics": [{"name": "sessions"}, {"name": "transactions"}, {"name": "purchaseRevenue"}],
+        "returnPropertyQuota": True,
+    }), property_id, agendador)
+    agora = _executar(analytics_data.properties().runRealtimeReport(property=property_id, body={
+        "metrics": [{"name": "activeUsers"}],
+        "returnPropertyQuota": True,
+    }), property_id, agendador_tempo_real)
+    return {
+        "account_display": prop["account_display"],
+        "property_display": prop["property_display"],
+        "sessions": int(_total(dia, 0)),
+        "transactions": int(_total(dia, 1)),
+        "purchaseRevenue": _total(dia, 2),
+        "usuarios_ativos": int(_total(agora, 0)),
+    }
+
+
+def buscar_todas(analytics_data, props, agendador=None, workers=WORKERS, agendador_tempo_real=None):
+    """Uma linha por propriedade; propriedades com erro ficam de fora (aparecem só com a base)."""
+    def tarefa(prop):
+        try:
+            return buscar_hoje(analytics_data, prop, agendador, agendador_tempo_real)
+        except Exception as erro:
+            print(f"⚠️ Tempo real indisponível para {prop['property_display']}: {erro}")
+            return None
+
+    if agendador is not None:
+        linhas = agendador.executar(props, tarefa, workers=workers)
+    else:
+        linhas = [tarefa(p) for p in props]
+    return pd.DataFrame([l for l in linhas if l is not None], columns=COLUNAS_HOJE)
+
+
+def clientes_ga4():
+    """Clientes Data (por thread) e Admin com credenciais não interativas (sem navegador)."""
+    from clientes_ga4 import ClientePorThread, FabricaClientes
+    from credenciais import criar_credenciais
+
+    fabrica = FabricaClientes(criar_credenciais(interativo=False).iniciar_renovacao())
+    return ClientePorThread(fabrica), fabrica.admin()
+
+
+def buscador_ga4(config_path=None, workers=WORKERS, criar_clientes=clientes_ga4,
+                 ttl_propriedades_s=TTL_PROPRIEDADES_S, relogio=time.monotonic):
+    """Função sem argumentos que busca o retrato de hoje das propriedades ativas.
+
+    Os clientes (``criar_clientes``) são criados na primeira chamada, já na
+    thread da camada. A lista de propriedades é refeita a cada
+    ``ttl_propriedades_s``: propriedades criadas depois entram e as removidas
+    deixam de ser consultadas sem reiniciar o processo.
+    """
+    from cota import AgendadorCota
+
+    config_path = config_path or coletar_dados.CONFIG_FILE
+    estado = {}
+
+    def buscar():
+        if not estado:
+            estado["data"], estado["admin"] = criar_clientes()
+            estado["agendador"] = AgendadorCota()
+            estado["agendador_tempo_real"] = AgendadorCota()
+        if "propriedades" not in estado or relogio() - estado["listadas_em"] >= ttl_propriedades_s:
+            estado["propriedades"] = coletar_dados.listar_propriedades(estado["admin"])
+            estado["listadas_em"] = relogio()
+        props = coletar_dados.filtrar_propriedades_ativas(estado["propriedades"], config_path)
+        return buscar_todas(estado["data"], props, estado["agendador"], workers, estado["agendador_tempo_real"])
+
+    return buscar
+
+
+# ============================================================
+# ⏱️ RETRATO COMPARTILHADO COM TTL
+# ============================================================
+class CamadaTempoReal:
+    """Último retrato de hoje, renovado por uma thread a cada ``ttl_s`` segundos.
+
+    ``retrato()`` nunca chama a API: devolve o último resultado (ou ``None``
+    enquanto não houver um, ou se ele for de outro dia).
+    """
+
+    def __init__(self, buscar, ttl_s=TTL_S, hoje=date.today):
+        self.buscar = buscar
+        self.ttl_s = ttl_s
+        self.hoje = hoje
+        self._lock = threading.Lock()
+        self._parar = threading.Event()
+        self._thread = None
+        self._retrato = None
+        self._dia = None
+        self.atualizado_em = None
+
+    def atualizar(self):
+        """Busca um retrato novo e o publica (chamado pela thread)."""
+        dia = self.hoje()
+        retrato = self.buscar()
+        with self._lock:
+            self._retrato, self._dia, self.atualizado_em = retrato, dia, datetime.now()
+
+    def retrato(self):
+        with self._lock:
+            if self._retrato is None or self._dia != self.hoje():
+                return None
+            return self._retrato
+
+    def _loop(self):
+        while not self._parar.is_set():
+            try:
+                self.atualizar()
+            except Exception as e:
+                # Sem credencial ou rede: o dashboard segue só com a base
+                print(f"⚠️ Falha ao atualizar o tempo real: {e}")
+            self._parar.wait(self.ttl_s)
+
+    def iniciar(self):
+        """Inicia a thread de atualização (idempotente)."""
+        if self._thread is None or not self._thread.is_alive():
+            self._parar.clear()
+            self._thread = threading.Thread(target=self._loop, name="tempo-real", daemon=True)
+            self._thread.start()
+        return self
+
+    def parar(self):
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+
+def criar_camada(environ=None, config_path=None):
+    """``CamadaTempoReal`` já iniciada se ``AGENGY_TEMPO_REAL`` estiver ligado; senão ``None``."""
+    if not ativada(environ):
+        return None
+    return CamadaTempoReal(buscador_ga4(config_path)).iniciar()
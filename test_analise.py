@@ -0,0 +1,117 @@
+"""Períodos pré-calculados e resumos do dashboard (``analise``)."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from analise import (PERIODOS, agregar_nivel, calcular_periodo, mesclar_hoje, precalcular_series,
+                     resumo_hierarquico, resumo_periodo, totais_do_dia)
+from graficos import GRAFICOS_DETALHES, montar_grafico_combinado
+from metricas import METRICAS_DERIVADAS
+from sinteticos import gerar_base_bruta
+
+HOJE = pd.Timestamp(2026, 10, 19)
+
+
+def test_series_de_cada_periodo_recortam_a_conta_uma_vez():
+    df = gerar_base_bruta(2, 60, fim=HOJE)
+    serie = df[df["property_display"] == df["property_display"].iloc[0]].reset_index(drop=True)
+
+    series = precalcular_series(serie, hoje=HOJE)
+
+    assert list(series) == PERIODOS
+    for tipo_periodo, recorte in series.items():
+        periodo = calcular_periodo(tipo_periodo, HOJE)
+        esperado = serie[(serie["date"] >= periodo["inicio_atual"]) & (serie["date"] <= periodo["fim_atual"])]
+        assert recorte["date"].tolist() == esperado["date"].tolist()
+        assert recorte["sessions"].tolist() == esperado["sessions"].tolist()
+    assert len(series["Últimos 7 dias"]) == 7 and len(series["Mês atual"]) == 19
+    # Sem período anterior na série, os gráficos recebem as colunas _prev vazias
+    assert series["Últimos 7 dias"]["sessions_prev"].isna().all()
+
+
+
+def test_cada_metrica_derivada_tem_grafico():
+    assert set(METRICAS_DERIVADAS) <= {metrica for metrica, _ in GRAFICOS_DETALHES}
+    df = gerar_base_bruta(1, 30, fim=HOJE)
+    serie = precalcular_series(df, hoje=HOJE)["Últimos 7 dias"]
+    for metrica, titulo in GRAFICOS_DETALHES:
+        assert montar_grafico_combinado(serie, metrica, titulo) is not None
+
+
+def test_contas_e_portfolio_somam_o_nivel_de_baixo():
+    df = gerar_base_bruta(7, 30, fim=HOJE)
+    resumo = resumo_periodo(df, "Últimos 15 dias", hoje=HOJE)
+
+    niveis = resumo_hierarquico(resumo, criterio_ordenacao="Receita total (R$)")
+    contas = niveis["account_display"].set_index("account_display")
+
+    # 7 propriedades em contas de 3: duas contas cheias e uma com uma propriedade
+    assert contas["n_itens"].to_dict() == {"Conta 00000": 3, "Conta 00001": 3, "Conta 00002": 1}
+    por_linhas = resumo_periodo(df.assign(property_display=df["account_display"]), "Últimos 15 dias", hoje=HOJE)
+    por_linhas = por_linhas.set_index("property_display")
+    for coluna in ["total_sessions", "total_transactions", "total_revenue", "atingimento", *METRICAS_DERIVADAS]:
+        np.testing.assert_allclose(contas[coluna], por_linhas.loc[contas.index, coluna])
+    assert niveis["account_display"]["total_revenue"].is_monotonic_decreasing
+
+    portfolio = niveis["portfolio"].iloc[0]
+    assert portfolio["n_itens"] == 3
+    assert portfolio["total_sessions"] == resumo["total_sessions"].sum()
+    assert portfolio["conversion_rate"] == pytest.approx(
+        resumo["total_transactions"].sum() / resumo["total_sessions"].sum() * 100)
+
+
+def test_mesmo_nome_em_contas_diferentes_nao_se_mistura():
+    df = gerar_base_bruta(6, 30, fim=HOJE)
+    separadas = resumo_periodo(df, "Últimos 15 dias", hoje=HOJE)
+    # A propriedade 3 (Conta 00001) passa a ter o mesmo nome da 0 (Conta 00000)
+    nomes = df["property_display"].astype(str)
+    df = df.assign(property_display=nomes.replace(nomes.unique()[3], nomes.unique()[0]))
+
+    resumo = resumo_periodo(df, "Últimos 15 dias", hoje=HOJE)
+
+    assert len(resumo) == 6
+    contas = resumo_hierarquico(resumo)["account_display"].set_index("account_display")
+    esperado = separadas.groupby("account_display")["total_revenue"].sum()
+    np.testing.assert_allclose(contas.loc[esperado.index, "total_revenue"], esperado)
+    assert contas["n_itens"].to_dict() == {"Conta 00000": 3, "Conta 00001": 3}
+
+
+def test_variacao_da_conta_pondera_pela_receita():
+    resumo = pd.DataFrame({
+        "property_display": ["A", "B", "C"], "account_display": ["X", "X", "X"],
+        "total_sessions": [10, 10, 10], "total_transactions": [1, 1, 0],
+        "total_revenue": [300.0, 100.0, 0.0], "var_revenue": [10.0, -10.0, np.inf],
+    })
+
+    conta = agregar_nivel(resumo).iloc[0]
+
+    # A variação infinita (receita partindo de zero) fica de fora; as demais pesam pela receita
+    assert conta["var_revenue"] == pytest.approx((10 * 300 - 10 * 100) / 400)
+    assert conta["total_revenue"] == 400.0
+
+
+def test_hoje_em_tempo_real_troca_so_o_dia_da_propriedade_certa():
+    df = gerar_base_bruta(6, 30, fim=HOJE)
+    nomes = df["property_display"].astype(str)
+    repetido = nomes.unique()[0]
+    df = df.assign(property_display=nomes.replace(nomes.unique()[3], repetido))
+    resumo = resumo_periodo(df, "Últimos 7 dias", hoje=HOJE)
+    base_hoje = totais_do_dia(df, HOJE)
+    # Retrato só da "Propriedade 00000" da Conta 00001, com o mesmo nome da de Conta 00000
+    hoje = pd.DataFrame({"account_display": ["Conta 00001"], "property_display": [repetido],
+                         "sessions": [1000], "transactions": [10], "purchaseRevenue": [5000.0],
+                         "usuarios_ativos": [42]})
+
+    mesclado = mesclar_hoje(resumo, hoje, base_hoje).set_index(["account_display", "property_display"])
+    antes = resumo.set_index(["account_display", "property_display"])
+
+    chave = ("Conta 00001", repetido)
+    dia = base_hoje.set_index(["account_display", "property_display"]).loc[chave]
+    assert mesclado.loc[chave, "total_revenue"] == pytest.approx(
+        antes.loc[chave, "total_revenue"] - dia["purchaseRevenue"] + 5000.0)
+    assert mesclado.loc[chave, "total_sessions"] == antes.loc[chave, "total_sessions"] - dia["sessions"] + 1000
+    assert mesclado.loc[chave, "usuarios_ativos"] == 42
+    outras = mesclado.index != chave
+    pd.testing.assert_series_equal(mesclado.loc[outras, "total_revenue"],
+                                   antes.loc[mesclado.index[outras], "total_revenue"])
+    assert mesclado.loc[outras, "usuarios_ativos"].isna().all()
@@ -0,0 +1,36 @@
+"""Endpoint ``/resumo`` do ``api_resumo`` com a data fixada."""
+import json
+import threading
+from urllib.parse import quote
+from urllib.request import urlopen
+
+import pandas as pd
+import pytest
+
+from api_resumo import ServicoResumo, criar_servidor
+from sinteticos import gerar_base_bruta
+
+HOJE = pd.Timestamp(2026, 3, 10)
+
+
+@pytest.fixture
+def servidor(tmp_path):
+    dados = tmp_path / 'base_comparativa.csv'
+    gerar_base_bruta(4, 60, fim=HOJE).to_csv(dados, sep=';', index=False)
+    servico = ServicoResumo(str(dados), str(tmp_path / 'sem_config.csv'))
+    srv = criar_servidor(servico, porta=0, hoje=lambda: HOJE)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    yield servico, f"http://127.0.0.1:{srv.server_address[1]}"
+    srv.shutdown()
+    srv.server_close()
+
+
+def test_documento_e_totais_usam_o_mesmo_dia(servidor):
+    servico, url = servidor
+    with urlopen(f"{url}/resumo?periodo={quote('Últimos 7 dias')}&ordenacao={quote('Nome da conta (A-Z)')}") as r:
+        documento = json.load(r)
+
+    assert (documento['inicio'], documento['fim']) == ('2026-03-04', '2026-03-10')
+    esperado = servico.resumo('Últimos 7 dias', 'Nome da conta (A-Z)', hoje=HOJE)
+    assert [c['total_sessions'] for c in documento['contas']] == esperado['total_sessions'].tolist()
+    assert len(documento['contas']) == 4
@@ -0,0 +1,60 @@
+"""Retomada do ``backfill`` entre execuções em dias diferentes."""
+from datetime import date
+
+import backfill
+from fake_ga4 import ClienteDataFalso, propriedades_falsas
+from historico import Historico
+
+
+def _executar(cliente, props, inicio, fim, tmp_path):
+    return backfill.executar_backfill(cliente, props, inicio, fim, Historico(str(tmp_path / 'historico')),
+                                      backfill.EstadoBackfill(str(tmp_path / 'estado')))
+
+
+def test_rodar_de_novo_no_dia_seguinte_busca_so_o_que_falta(tmp_path):
+    props = propriedades_falsas(2)
+    cliente = ClienteDataFalso()
+    assert _executar(cliente, props, date(2025, 10, 19), date(2026, 10, 18), tmp_path) == []
+    assert cliente.chamadas == 2 * 13
+
+    # Um dia depois o intervalo padrão (--meses) já é outro: só o mês corrente cresceu
+    assert _executar(cliente, props, date(2025, 10, 20), date(2026, 10, 19), tmp_path) == []
+    assert cliente.chamadas == 2 * 13 + 2
+
+    historico = Historico(str(tmp_path / 'historico'))
+    assert len(historico.consultar('2025-10-19', '2026-10-19')) == 2 * 366
+
+
+def test_bloco_com_falha_fica_pendente(tmp_path):
+    props = propriedades_falsas(1)
+
+    class Falha:
+        def properties(self):
+            raise RuntimeError("rede")
+
+    falhas = _executar(Falha(), props, date(2026, 1, 1), date(2026, 2, 28), tmp_path)
+    assert [f['mes'] for f in falhas] == ['2026-01', '2026-02']
+
+    cliente = ClienteDataFalso()
+    assert _executar(cliente, props, date(2026, 1, 1), date(2026, 2, 28), tmp_path) == []
+    assert cliente.chamadas == 2
+
+
+def test_estado_acompanha_a_raiz_do_historico(tmp_path, monkeypatch):
+    cliente = ClienteDataFalso()
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(backfill.coletar_dados, 'autenticar', lambda: None)
+    monkeypatch.setattr(backfill.coletar_dados, 'criar_clientes', lambda fabrica: (cliente, None))
+    monkeypatch.setattr(backfill.coletar_dados, 'listar_propriedades', lambda admin: propriedades_falsas(1))
+    monkeypatch.setattr(backfill.coletar_dados, 'filtrar_propriedades_ativas', lambda props, config: props)
+    argv = ['--inicio', '2026-01-01', '--fim', '2026-02-28']
+
+    backfill.main(argv + ['--raiz', 'hist_a'])
+    assert (tmp_path / 'hist_a' / backfill.ESTADO_DIR / backfill.ESTADO_FILE).exists()
+    assert not (tmp_path / backfill.ESTADO_DIR).exists()
+    assert cliente.chamadas == 2
+
+    # Outra raiz começa do zero em vez de herdar o estado de ``hist_a``
+    backfill.main(argv + ['--raiz', 'hist_b'])
+    assert cliente.chamadas == 4
+    assert len(Historico('hist_b').consultar('2026-01-01', '2026-02-28')) == 59
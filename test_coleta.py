@@ -0,0 +1,161 @@
+"""Coleta completa com checkpoint: publicação parcial e paginação do ``runReport``."""
+from datetime import date
+
+import pandas as pd
+import pytest
+
+import coletar_dados
+from fake_ga4 import ClienteDataFalso, ErroHttpFalso, propriedades_falsas
+from historico import Historico
+from particoes import ArmazemParticionado
+from staging import AreaStaging
+from telemetria import RelatorioColeta
+
+
+class ClienteComFalha(ClienteDataFalso):
+    """Falha (403, sem retentativa) nas propriedades de ``falhar``."""
+
+    def __init__(self, falhar=()):
+        super().__init__()
+        self.falhar = set(falhar)
+
+    def responder(self, property_id, body):
+        if property_id in self.falhar:
+            self.chamadas += 1
+            raise ErroHttpFalso(403, "PERMISSION_DENIED")
+        return super().responder(property_id, body)
+
+
+def _coletar(cliente, props, inicio, fim, tmp_path):
+    staging = AreaStaging(f"{inicio}_{fim}", raiz=str(tmp_path / 'staging'))
+    falhas = coletar_dados.coletar_com_checkpoint(cliente, props, inicio, fim, staging)
+    saida = str(tmp_path / 'ga4_100.csv')
+    coletar_dados.publicar_coleta(staging, falhas, saida, str(tmp_path / 'partes'))
+    return staging, falhas, pd.read_csv(saida, sep=';', parse_dates=['date'])
+
+
+def test_coleta_parcial_mantem_as_linhas_anteriores_das_propriedades_com_falha(tmp_path):
+    props = propriedades_falsas(3)
+    _, falhas, antes = _coletar(ClienteDataFalso(), props, date(2026, 1, 1), date(2026, 1, 31), tmp_path)
+    assert falhas == [] and len(antes) == 3 * 31
+
+    staging, falhas, depois = _coletar(ClienteComFalha({props[1]['property_id']}), props,
+                                       date(2026, 1, 2), date(2026, 2, 1), tmp_path)
+
+    assert falhas == [props[1]]
+    # A propriedade com falha continua com as 31 linhas da coleta anterior
+    nome = props[1]['property_display']
+    pd.testing.assert_frame_equal(depois[depois['property_display'] == nome].reset_index(drop=True),
+                                  antes[antes['property_display'] == nome].reset_index(drop=True))
+    # As demais vêm da coleta nova
+    assert depois.loc[depois['property_display'] != nome, 'date'].max() == pd.Timestamp(2026, 2, 1)
+    assert len(ArmazemParticionado(str(tmp_path / 'partes')).partes()) == 3
+    # O staging segue retomável: só a propriedade com falha fica pendente
+    assert [p for p in props if not staging.concluida(p)] == [props[1]]
+
+
+def test_coleta_parcial_sem_partes_anteriores_usa_o_csv_antigo(tmp_path):
+    props = propriedades_falsas(2)
+    _, _, antes = _coletar(ClienteDataFalso(), props, date(2026, 1, 1), date(2026, 1, 31), tmp_path)
+    ArmazemParticionado(str(tmp_path / 'partes')).limpar()
+
+    _, _, depois = _coletar(ClienteComFalha({props[0]['property_id']}), props,
+                            date(2026, 1, 2), date(2026, 2, 1), tmp_path)
+
+    nome = props[0]['property_display']
+    assert len(depois[depois['property_display'] == nome]) == 31
+    assert (depois.loc[depois['property_display'] == nome, 'sessions'].to_numpy()
+            == antes.loc[antes['property_display'] == nome, 'sessions'].to_numpy()).all()
+
+
+def test_paginas_cobrem_o_periodo_inteiro():
+    cliente = ClienteDataFalso()
+    relatorio = RelatorioColeta()
+
+    df = coletar_dados.run_ga_daily(cliente, 'properties/1', date(2026, 1, 1), date(2026, 4, 11), relatorio,
+                                    levantar_erros=True, limite=7)
+
+    # 101 dias em páginas de 7 linhas: 15 chamadas, nenhuma linha repetida ou perdida
+    assert cliente.chamadas == 15
+    assert len(df) == 101 and df['date'].is_unique
+    assert df['date'].tolist() == list(pd.date_range('2026-01-01', '2026-04-11'))
+    assert relatorio.resumo()['requisicoes'] == 15
+    assert relatorio.resumo()['linhas'] == 101
+
+
+def test_falha_no_meio_da_paginacao_nao_grava_parte(tmp_path):
+    class FalhaNaSegundaPagina(ClienteDataFalso):
+        def responder(self, property_id, body):
+            if body.get('offset'):
+                self.chamadas += 1
+                raise ErroHttpFalso(400, "INVALID_ARGUMENT")
+            return super().responder(property_id, body)
+
+    props = propriedades_falsas(1)
+    staging = AreaStaging('janela', raiz=str(tmp_path / 'staging'))
+    paginas = (p.assign(account_display='c', property_display='p')
+               for p in coletar_dados.paginas_ga_daily(FalhaNaSegundaPagina(), props[0]['property_id'],
+                                                       date(2026, 1, 1), date(2026, 4, 11), limite=7))
+
+    with pytest.raises(ErroHttpFalso):
+        staging.salvar_paginas(props[0], paginas)
+    assert not staging.concluida(props[0])
+    assert staging.partes() == []
+    assert not [f for f in (tmp_path / 'staging').rglob('*') if f.is_file()]
+
+
+def _incremental(cliente, props, inicio, fim, tmp_path):
+    saida = str(tmp_path / 'ga4_100.csv')
+    df = coletar_dados.coletar_incremental(cliente, props, pd.read_csv(saida, sep=';'), inicio, fim)
+    coletar_dados.publicar_incremental(df, saida, str(tmp_path / 'partes'))
+    return ArmazemParticionado(str(tmp_path / 'partes'))
+
+
+def test_incremental_separa_propriedades_de_mesmo_nome_em_contas_diferentes(tmp_path):
+    props = [{'account_display': conta, 'property_display': 'Loja – GA4', 'property_id': prop_id}
+             for conta, prop_id in [('Cliente A', 'properties/1'), ('Cliente B', 'properties/2')]]
+    _coletar(ClienteDataFalso(), props, date(2026, 1, 1), date(2026, 1, 31), tmp_path)
+
+    armazem = _incremental(ClienteDataFalso(), props, date(2026, 1, 2), date(2026, 2, 1), tmp_path)
+
+    assert armazem.ids() == {('Cliente A', 'Loja – GA4'): 'properties/1',
+                             ('Cliente B', 'Loja – GA4'): 'properties/2'}
+    lido = armazem.ler()
+    for prop in props:
+        linhas = lido[lido['account_display'] == prop['account_display']]
+        esperado = coletar_dados.run_ga_daily(ClienteDataFalso(), prop['property_id'],
+                                              date(2026, 1, 2), date(2026, 2, 1))
+        assert linhas['sessions'].tolist() == esperado['sessions'].tolist()
+
+
+def test_incremental_mantem_o_property_id_de_propriedade_que_saiu_da_coleta(tmp_path):
+    props = propriedades_falsas(3)
+    _coletar(ClienteDataFalso(), props, date(2026, 1, 1), date(2026, 1, 31), tmp_path)
+    historico = Historico(str(tmp_path / 'historico'))
+    historico.acumular_armazem(ArmazemParticionado(str(tmp_path / 'partes')))
+
+    # A terceira propriedade foi inativada: continua no CSV, mas não é mais coletada
+    armazem = _incremental(ClienteDataFalso(), props[:2], date(2026, 1, 2), date(2026, 2, 1), tmp_path)
+    historico.acumular_armazem(armazem)
+
+    saiu = props[2]
+    assert armazem.ids()[(saiu['account_display'], saiu['property_display'])] == saiu['property_id']
+    df = historico.consultar('2026-01-01', '2026-02-28')
+    assert sorted(df['property_id'].unique()) == [p['property_id'] for p in props]
+    assert not df.duplicated(['account_display', 'property_display', 'date']).any()
+
+
+def test_incremental_usa_a_ultima_data_de_cada_conta(tmp_path):
+    props = [{'account_display': conta, 'property_display': 'Loja – GA4', 'property_id': prop_id}
+             for conta, prop_id in [('Cliente A', 'properties/1'), ('Cliente B', 'properties/2')]]
+    _coletar(ClienteDataFalso(), props, date(2026, 1, 1), date(2026, 1, 31), tmp_path)
+    # A coleta anterior de B parou no dia 20; a de A foi até o dia 31
+    saida = tmp_path / 'ga4_100.csv'
+    csv = pd.read_csv(saida, sep=';', parse_dates=['date'])
+    csv[(csv['account_display'] == 'Cliente A') | (csv['date'] <= '2026-01-20')].to_csv(saida, sep=';', index=False)
+
+    lido = _incremental(ClienteDataFalso(), props, date(2026, 1, 2), date(2026, 2, 1), tmp_path).ler()
+
+    for conta in ('Cliente A', 'Cliente B'):
+        datas = lido.loc[lido['account_display'] == conta, 'date']
+        assert datas.tolist() == list(pd.date_range('2026-01-02', '2026-02-01'))
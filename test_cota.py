@@ -0,0 +1,145 @@
+"""Cadência do ``AgendadorCota`` com tempo simulado e o servidor de cotas do ``fake_ga4``."""
+from datetime import date
+
+import pandas as pd
+import pytest
+
+import coletar_dados
+import tempo_real
+from cota import AgendadorCota, BaldeTokens
+from fake_ga4 import ClienteDataFalso, ErroHttpFalso, propriedades_falsas
+from telemetria import RelatorioColeta
+
+# 100 dias = 100 linhas: o servidor falso cobra 1 + 100 // 20 = 6 tokens por consulta
+INICIO, FIM = date(2026, 1, 1), date(2026, 4, 10)
+CUSTO = 6
+
+
+class Relogio:
+    """Relógio simulado: ``dormir`` só avança o tempo."""
+
+    def __init__(self):
+        self.agora = 0.0
+
+    def __call__(self):
+        return self.agora
+
+    def dormir(self, segundos):
+        self.agora += segundos
+
+
+def test_balde_repoe_linearmente():
+    relogio = Relogio()
+    balde = BaldeTokens(3600, relogio=relogio)  # 1 token por segundo
+    balde.consumir(3600)
+
+    assert balde.tempo_ate(10) == pytest.approx(10)
+    relogio.dormir(4)
+    assert balde.disponivel() == pytest.approx(4)
+    relogio.dormir(10_000)
+    assert balde.disponivel() == pytest.approx(3600)  # nunca passa da capacidade
+
+
+def test_reservas_esperam_a_reposicao_do_balde():
+    relogio = Relogio()
+    agendador = AgendadorCota(tokens_propriedade_hora=36, relogio=relogio, dormir=relogio.dormir)
+
+    for _ in range(3):  # custo inicial estimado de 10 tokens: três cabem no balde de 36
+        agendador.concluir('properties/1', agendador.reservar('properties/1'))
+    assert relogio.agora == 0
+
+    agendador.reservar('properties/1')  # faltam 4 tokens, a 36 tokens/hora
+    assert relogio.agora == pytest.approx(400)
+    assert agendador.espera_total_s == pytest.approx(400)
+
+
+def test_coleta_cadenciada_nao_recebe_429():
+    relogio = Relogio()
+    # 3600/256 tokens/hora = 1/256 token/s, exato em ponto flutuante: o agendador
+    # e o servidor falso chegam ao mesmo saldo no mesmo instante
+    capacidade = 3600 / 256
+    cliente = ClienteDataFalso(tokens_propriedade_hora=capacidade, relogio=relogio)
+    agendador = AgendadorCota(tokens_propriedade_hora=capacidade, relogio=relogio, dormir=relogio.dormir)
+
+    for _ in range(4):
+        df = coletar_dados.run_ga_daily(cliente, 'properties/1', INICIO, FIM, agendador=agendador,
+                                        levantar_erros=True)
+        assert len(df) == 100
+
+    assert cliente.recusadas == 0
+    # Duas consultas cabem no balde; as outras duas esperam a reposição
+    assert relogio.agora >= 2 * CUSTO * 256 - capacidade * 256
+
+
+def test_429_esvazia_o_balde_e_a_retentativa_espera_a_reposicao():
+    relogio = Relogio()
+    cliente = ClienteDataFalso(tokens_propriedade_hora=2 * CUSTO, relogio=relogio)
+    # Outro consumidor da mesma propriedade já gastou a cota que o agendador não conhece
+    for _ in range(2):
+        coletar_dados.run_ga_daily(cliente, 'properties/1', INICIO, FIM, levantar_erros=True)
+    agendador = AgendadorCota(tokens_propriedade_hora=2 * CUSTO, relogio=relogio, dormir=relogio.dormir)
+    relatorio = RelatorioColeta()
+
+    df = coletar_dados.run_ga_daily(cliente, 'properties/1', INICIO, FIM, relatorio, agendador,
+                                    levantar_erros=True)
+
+    assert len(df) == 100
+    assert cliente.recusadas == 1
+    assert relatorio.propriedades['properties/1']['tentativas'] == 2
+    # Sem sleep fixo: a retentativa saiu quando o balde esvaziado repôs o custo estimado
+    assert relogio.agora >= CUSTO / (2 * CUSTO / 3600)
+
+
+def test_cota_do_projeto_e_separada_por_propriedade():
+    relogio = Relogio()
+    agendador = AgendadorCota(relogio=relogio, dormir=relogio.dormir)
+    reservado = agendador.reservar('properties/1')
+    agendador.concluir('properties/1', reservado, {
+        'tokensPerHour': {'consumed': 10, 'remaining': 30000},
+        'tokensPerProjectPerHour': {'consumed': 10, 'remaining': 0},
+    })
+
+    agendador.reservar('properties/2')
+    assert relogio.agora == 0  # a propriedade esgotada não segura as outras
+
+    agendador.reservar('properties/1')
+    assert relogio.agora > 0
+
+
+def test_tempo_real_usa_agendador_proprio():
+    relogio = Relogio()
+    cliente = ClienteDataFalso(tokens_propriedade_hora=36, relogio=relogio)
+    # Outro consumidor esgotou a cota Realtime; a cota Core segue intacta
+    for _ in range(36):
+        cliente.properties().runRealtimeReport(property='properties/1', body={}).execute()
+    agendador = AgendadorCota(tokens_propriedade_hora=36, relogio=relogio, dormir=relogio.dormir)
+    agendador_tempo_real = AgendadorCota(tokens_propriedade_hora=36, relogio=relogio, dormir=relogio.dormir)
+    prop = {'property_id': 'properties/1', 'property_display': 'Loja', 'account_display': 'Conta'}
+
+    with pytest.raises(ErroHttpFalso):
+        tempo_real.buscar_hoje(cliente, prop, agendador, agendador_tempo_real)
+    assert agendador.espera_total_s == 0
+
+    # O 429 esvaziou só o balde Realtime: a próxima chamada espera a reposição dele
+    tempo_real.buscar_hoje(cliente, prop, agendador, agendador_tempo_real)
+    assert cliente.recusadas == 1
+    assert agendador_tempo_real.espera_total_s > 0
+
+
+def test_tempo_real_relista_as_propriedades_a_cada_ttl(tmp_path, monkeypatch):
+    relogio = Relogio()
+    props = propriedades_falsas(3)
+    listadas = [props[:2]]
+    monkeypatch.setattr(coletar_dados, 'listar_propriedades', lambda admin: list(listadas[-1]))
+    config = tmp_path / 'contas_config.csv'
+    pd.DataFrame([{**p, 'ativa': True} for p in props]).to_csv(config, sep=';', index=False)
+    buscar = tempo_real.buscador_ga4(str(config), workers=1, criar_clientes=lambda: (ClienteDataFalso(), None),
+                                     ttl_propriedades_s=3600, relogio=relogio)
+
+    assert len(buscar()) == 2
+    # Uma propriedade nova e uma removida: só aparecem depois do TTL da lista
+    listadas.append(props[1:])
+    relogio.agora += 3599
+    assert sorted(buscar()['property_display']) == [p['property_display'] for p in props[:2]]
+    relogio.agora += 1
+    assert sorted(buscar()['property_display']) == [p['property_display'] for p in props[1:]]
@@ -0,0 +1,88 @@
+"""Token compartilhado e renovação das ``credenciais`` contra o ``fake_ga4.ServidorTokenFalso``."""
+import json
+import threading
+
+import pytest
+
+from credenciais import (CredenciaisCompartilhadas, CredencialIndisponivel, ProvedorUsuarioOAuth,
+                         criar_credenciais)
+from fake_ga4 import ServidorTokenFalso
+
+
+@pytest.fixture
+def servidor():
+    with ServidorTokenFalso(latencia=0.05) as srv:
+        yield srv
+
+
+def _authorized_user(caminho, servidor, refresh_token="refresh-valido"):
+    dados = {"type": "authorized_user", "refresh_token": refresh_token, "client_id": "id",
+             "client_secret": "segredo", "token_uri": servidor.url}
+    caminho.write_text(json.dumps(dados), encoding="utf-8")
+    return caminho
+
+
+def test_threads_compartilham_uma_unica_renovacao(servidor, tmp_path):
+    credenciais = CredenciaisCompartilhadas(ProvedorUsuarioOAuth(_authorized_user(tmp_path / "token.json", servidor)))
+    barreira = threading.Barrier(8)
+    tokens = []
+
+    def pedir():
+        barreira.wait()
+        tokens.append(credenciais.token_atual())
+
+    threads = [threading.Thread(target=pedir) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert tokens == ["tok-1"] * 8
+    assert servidor.emitidos == 1
+    assert credenciais.renovacoes == 1
+
+
+def test_renova_antes_de_expirar(servidor, tmp_path):
+    agora = [1_000_000.0]
+    credenciais = CredenciaisCompartilhadas(
+        ProvedorUsuarioOAuth(_authorized_user(tmp_path / "token.json", servidor)), margem_s=300,
+        relogio=lambda: agora[0])
+    credenciais.token_atual()
+    credenciais.expira_em = agora[0] + 3600
+
+    agora[0] += 3600 - 301
+    assert credenciais.token_atual() == "tok-1"
+    agora[0] += 2  # dentro da margem: renova antes de a API recusar o token
+    assert credenciais.token_atual() == "tok-2"
+    assert servidor.emitidos == 2
+
+
+def test_token_do_projeto_e_regravado(servidor, tmp_path):
+    token_file = _authorized_user(tmp_path / "token.json", servidor)
+
+    criar_credenciais({}, token_file=str(token_file), interativo=False)
+
+    salvo = json.loads(token_file.read_text(encoding="utf-8"))
+    assert salvo["token"] == "tok-1" and salvo["expiry"]
+
+
+def test_authorized_user_externo_nunca_e_regravado(servidor, tmp_path):
+    externo = _authorized_user(tmp_path / "adc.json", servidor)
+    original = externo.read_bytes()
+    token_file = tmp_path / "token.json"
+
+    credenciais = criar_credenciais({"GOOGLE_APPLICATION_CREDENTIALS": str(externo)},
+                                    token_file=str(token_file), interativo=False)
+    credenciais.refresh()
+
+    assert credenciais.token == "tok-2"
+    assert externo.read_bytes() == original
+    assert not token_file.exists()
+
+
+def test_refresh_token_recusado(servidor, tmp_path):
+    credenciais = CredenciaisCompartilhadas(
+        ProvedorUsuarioOAuth(_authorized_user(tmp_path / "token.json", servidor, "revogado")))
+
+    with pytest.raises(CredencialIndisponivel):
+        credenciais.token_atual()
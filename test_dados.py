@@ -0,0 +1,57 @@
+"""Memória, tipos e versão da base comparativa carregada por ``dados``."""
+import hashlib
+import io
+
+import pytest
+
+from dados import (COLUNAS_CATEGORICAS, COLUNAS_DESCARTADAS, VersaoAlterada, ler_base, ler_base_legado,
+                   ler_base_versao, memoria_por_100k_linhas)
+from sinteticos import gerar_base_comparativa
+
+
+@pytest.fixture(scope="module")
+def csv_sintetico():
+    buffer = io.StringIO()
+    gerar_base_comparativa(20_000).to_csv(buffer, sep=";", index=False)
+    return buffer.getvalue()
+
+
+def test_schema_compacto(csv_sintetico):
+    df = ler_base(io.StringIO(csv_sintetico))
+
+    for c in COLUNAS_CATEGORICAS:
+        assert df[c].dtype == "category"
+    assert df["sessions"].dtype == "int32"
+    assert df["transactions"].dtype == "int32"
+    assert df["sessions_prev"].dtype in ("int32", "float32")
+    assert df["purchaseRevenue"].dtype == "float64"
+    assert not set(COLUNAS_DESCARTADAS) & set(df.columns)
+
+
+def test_mesmos_valores_que_a_leitura_legada(csv_sintetico):
+    antes = ler_base_legado(io.StringIO(csv_sintetico))
+    depois = ler_base(io.StringIO(csv_sintetico))
+    antes = antes[antes["date"].notna()].reset_index(drop=True)
+
+    assert len(antes) == len(depois)
+    assert (antes["sessions"] == depois["sessions"]).all()
+    assert antes["purchaseRevenue"].sum() == pytest.approx(depois["purchaseRevenue"].sum())
+    assert (antes["property_display"] == depois["property_display"].astype(str)).all()
+
+
+def test_memoria_por_100k_linhas():
+    r = memoria_por_100k_linhas(20_000)
+
+    assert r["depois"] < r["antes"]
+    assert r["reducao"] >= 0.5
+
+
+def test_ler_base_versao_recusa_arquivo_trocado(csv_sintetico, tmp_path):
+    caminho = tmp_path / "base.csv"
+    caminho.write_text(csv_sintetico, encoding="utf-8")
+    versao = hashlib.sha256(caminho.read_bytes()).hexdigest()
+    assert len(ler_base_versao(versao, caminho)) == len(ler_base(io.StringIO(csv_sintetico)))
+
+    caminho.write_text(csv_sintetico + "\n", encoding="utf-8")
+    with pytest.raises(VersaoAlterada):
+        ler_base_versao(versao, caminho)
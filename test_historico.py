@@ -0,0 +1,48 @@
+"""Partições do ``historico`` por mês e ``property_id``."""
+import pandas as pd
+
+from historico import Historico
+from particoes import ArmazemParticionado
+
+
+def _linhas(conta, nome, prop_id, sessions, dias=('2026-01-30', '2026-01-31', '2026-02-01')):
+    df = pd.DataFrame({'date': pd.to_datetime(list(dias)), 'sessions': sessions, 'transactions': 1,
+                       'purchaseRevenue': 10.0, 'account_display': conta, 'property_display': nome})
+    return df if prop_id is None else df.assign(property_id=prop_id)
+
+
+def test_mesmo_nome_em_contas_diferentes_nao_divide_particao(tmp_path):
+    historico = Historico(str(tmp_path / 'historico'))
+    historico.acumular(_linhas('Cliente A', 'Loja – GA4', 'properties/1', 100))
+    historico.acumular(_linhas('Cliente B', 'Loja – GA4', 'properties/2', 200))
+
+    df = historico.consultar('2026-01-01', '2026-02-28')
+
+    assert len(df) == 6
+    assert df.groupby('property_id')['sessions'].sum().to_dict() == {'properties/1': 300, 'properties/2': 600}
+    assert len(historico.consultar('2026-01-01', '2026-02-28', propriedades=['Loja – GA4'])) == 6
+
+
+def test_coleta_mais_recente_prevalece_na_mesma_propriedade(tmp_path):
+    historico = Historico(str(tmp_path / 'historico'))
+    historico.acumular(_linhas('Cliente A', 'Loja – GA4', 'properties/1', 100))
+    historico.acumular(_linhas('Cliente A', 'Loja – GA4', 'properties/1', 150, dias=('2026-01-31',)))
+
+    df = historico.consultar('2026-01-01', '2026-02-28')
+    assert df['sessions'].tolist() == [100, 150, 100]
+
+
+def test_partes_da_coleta_levam_o_property_id_do_indice(tmp_path):
+    partes = ArmazemParticionado(str(tmp_path / 'partes'))
+    for conta, prop_id in [('Cliente A', 'properties/1'), ('Cliente B', 'properties/2')]:
+        prop = {'account_display': conta, 'property_display': 'Loja – GA4', 'property_id': prop_id}
+        partes.salvar(prop, _linhas(conta, 'Loja – GA4', None, 100))
+    historico = Historico(str(tmp_path / 'historico'))
+    historico.acumular_armazem(partes)
+
+    # Um CSV sem property_id (``--importar``) cai na partição que já existe para a conta e propriedade
+    historico.acumular(_linhas('Cliente B', 'Loja – GA4', None, 500, dias=('2026-02-01',)))
+
+    df = historico.consultar('2026-01-01', '2026-02-28')
+    assert sorted(df['property_id'].unique()) == ['properties/1', 'properties/2']
+    assert df.groupby('property_id')['sessions'].sum().to_dict() == {'properties/1': 300, 'properties/2': 700}
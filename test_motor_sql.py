@@ -0,0 +1,90 @@
+"""Motor DuckDB do dashboard: mesmo resultado do pandas e cache por consulta."""
+import os
+
+import numpy as np
+import pytest
+
+from analise import META_GERAL, calcular_periodo, resumo_periodo
+from dados import ler_base
+from metricas import METRICAS_DERIVADAS
+from motor_sql import criar_motor
+from sinteticos import gerar_base_bruta
+
+HOJE = '2026-10-19'
+
+
+def exigir_duckdb():
+    """Pula sem duckdb, exceto no CI ou com ``AGENGY_MOTOR=duckdb``: aí o motor tem de ser testado."""
+    exigido = os.environ.get('CI') or os.environ.get('AGENGY_MOTOR', '').lower() == 'duckdb'
+    if exigido:
+        import duckdb  # noqa: F401  (ImportError aqui falha o teste em vez de pulá-lo)
+    else:
+        pytest.importorskip('duckdb')
+
+
+@pytest.fixture
+def base(tmp_path):
+    caminho = tmp_path / 'base_comparativa.csv'
+    gerar_base_bruta(9, 40, fim=HOJE).to_csv(caminho, sep=';', index=False)
+    return caminho
+
+
+def test_sem_pedido_o_app_segue_no_pandas(base):
+    assert criar_motor(str(base), {}, environ={}) is None
+    assert criar_motor(str(base), {'motor': 'pandas'}, environ={}) is None
+
+
+def test_resumo_em_sql_igual_ao_do_pandas(base):
+    exigir_duckdb()
+    motor = criar_motor(str(base), {'motor': 'duckdb'})
+    df = ler_base(base)
+    ativas = sorted(df['property_display'].unique())[:6]
+
+    for tipo_periodo in ('Mês atual', 'Últimos 7 dias'):
+        sql = motor.resumo_contas(calcular_periodo(tipo_periodo, HOJE), META_GERAL, 'Receita total (R$)', ativas)
+        pandas = resumo_periodo(df, tipo_periodo, META_GERAL, 'Receita total (R$)', ativas=ativas, hoje=HOJE)
+
+        assert sql['property_display'].tolist() == pandas['property_display'].tolist()
+        for coluna in ['total_sessions', 'total_transactions', 'total_revenue', 'var_revenue', 'atingimento',
+                       *METRICAS_DERIVADAS]:
+            np.testing.assert_allclose(sql[coluna].astype(float), pandas[coluna].astype(float), rtol=1e-9)
+
+
+def test_resultados_em_cache_ate_o_arquivo_mudar(base):
+    exigir_duckdb()
+    motor = criar_motor(str(base), {'motor': 'duckdb'})
+    consultas = []
+    consultar = motor._consultar
+    motor._consultar = lambda sql, parametros=(): consultas.append(sql) or consultar(sql, parametros)
+    periodo = calcular_periodo('Últimos 15 dias', HOJE)
+    selecionadas = ['Propriedade 00001 – GA4', 'Propriedade 00002 – GA4']
+
+    primeiro = motor.resumo_contas(periodo, META_GERAL, 'Sessões', selecionadas=selecionadas)
+    assert motor.resumo_contas(periodo, META_GERAL, 'Sessões', selecionadas=selecionadas[::-1]) is primeiro
+    assert len(consultas) == 1
+    assert sorted(primeiro['property_display']) == selecionadas
+
+    # Outro critério é outra chave; um arquivo novo em disco descarta o cache
+    motor.resumo_contas(periodo, META_GERAL, 'Atingimento (%)', selecionadas=selecionadas)
+    assert len(consultas) == 2
+    gerar_base_bruta(9, 41, fim=HOJE).to_csv(base, sep=';', index=False)
+    motor.resumo_contas(periodo, META_GERAL, 'Sessões', selecionadas=selecionadas)
+    assert len(consultas) == 3
+
+
+def test_mesmo_nome_em_contas_diferentes_fica_separado(tmp_path):
+    exigir_duckdb()
+    df = gerar_base_bruta(6, 40, fim=HOJE)
+    nomes = df['property_display'].astype(str)
+    df = df.assign(property_display=nomes.replace(nomes.unique()[3], nomes.unique()[0]))
+    caminho = tmp_path / 'base_comparativa.csv'
+    df.to_csv(caminho, sep=';', index=False)
+    motor = criar_motor(str(caminho), {'motor': 'duckdb'})
+
+    sql = motor.resumo_contas(calcular_periodo('Mês atual', HOJE), META_GERAL, 'Receita total (R$)')
+    pandas = resumo_periodo(ler_base(caminho), 'Mês atual', META_GERAL, 'Receita total (R$)', hoje=HOJE)
+
+    assert len(sql) == 6
+    chave = ['account_display', 'property_display']
+    np.testing.assert_allclose(sql.set_index(chave).loc[pandas.set_index(chave).index, 'total_revenue'],
+                               pandas['total_revenue'])
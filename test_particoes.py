@@ -0,0 +1,53 @@
+"""Escrita por propriedade e leitura em ordem do ``ArmazemParticionado``."""
+import pandas as pd
+
+from particoes import ArmazemParticionado
+from sinteticos import gerar_base_bruta
+
+
+def _props_e_paginas(df, tamanho=4):
+    """Propriedades fora de ordem, cada uma entregue em páginas de ``tamanho`` dias."""
+    grupos = list(enumerate(df.groupby('property_display', sort=True)))
+    for i, (nome, linhas) in reversed(grupos):
+        prop = {'account_display': linhas['account_display'].iloc[0], 'property_display': nome,
+                'property_id': f"properties/{100 + i}"}
+        yield prop, (linhas.iloc[i:i + tamanho] for i in range(0, len(linhas), tamanho))
+
+
+def test_partes_gravadas_fora_de_ordem_sao_lidas_em_ordem(tmp_path):
+    df = gerar_base_bruta(7, 10, fim='2026-10-19')
+    armazem = ArmazemParticionado(str(tmp_path / 'partes'))
+    for prop, paginas in _props_e_paginas(df):
+        armazem.salvar_paginas(prop, paginas)
+
+    lido = armazem.ler()
+
+    esperado = df.sort_values(['account_display', 'property_display', 'date'], ignore_index=True)
+    assert len(armazem.partes()) == 7
+    pd.testing.assert_frame_equal(lido, esperado, check_dtype=False)
+
+
+def test_iterar_entrega_uma_propriedade_por_vez(tmp_path):
+    df = gerar_base_bruta(5, 6, fim='2026-10-19')
+    armazem = ArmazemParticionado(str(tmp_path / 'partes'))
+    for prop, paginas in _props_e_paginas(df, tamanho=2):
+        armazem.salvar_paginas(prop, paginas)
+
+    partes = list(armazem.iterar(['date', 'property_display']))
+
+    assert [p['property_display'].nunique() for p in partes] == [1] * 5
+    assert [p['property_display'].iloc[0] for p in partes] == sorted(df['property_display'].unique())
+    assert all(p['date'].is_monotonic_increasing for p in partes)
+
+
+def test_exportar_csv_escreve_na_ordem_final_e_so_quando_muda(tmp_path):
+    df = gerar_base_bruta(4, 5, fim='2026-10-19')
+    armazem = ArmazemParticionado(str(tmp_path / 'partes'), formato='csv')
+    for prop, paginas in _props_e_paginas(df):
+        armazem.salvar_paginas(prop, paginas)
+    saida = tmp_path / 'ga4_100.csv'
+
+    assert armazem.exportar_csv(str(saida))
+    csv = pd.read_csv(saida, sep=';', parse_dates=['date'])
+    assert csv['property_display'].tolist() == sorted(df['property_display'])
+    assert not armazem.exportar_csv(str(saida))
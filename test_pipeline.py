@@ -0,0 +1,29 @@
+"""Impressões digitais das etapas do ``pipeline``."""
+import pipeline
+from particoes import PARTES_DIR, ArmazemParticionado
+from sinteticos import gerar_base_bruta
+
+
+def test_montagem_muda_com_as_partes_mesmo_com_o_csv_igual(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    df = gerar_base_bruta(2, 10, fim='2026-10-19')
+    df.to_csv('ga4_100.csv', sep=';', index=False)
+    etapa = pipeline.etapa_montagem()
+    so_csv = etapa.impressao()
+
+    armazem = ArmazemParticionado(PARTES_DIR)
+    armazem.salvar_frame(df)
+    com_partes = etapa.impressao()
+    assert com_partes != so_csv
+
+    # Uma parte muda e o CSV fica igual: a montagem precisa rodar de novo
+    armazem.salvar_frame(df.assign(sessions=df['sessions'] + 1).head(10))
+    assert etapa.impressao() != com_partes
+
+
+def test_sem_partes_a_montagem_depende_so_do_csv(tmp_path):
+    entrada = tmp_path / 'bruta.csv'
+    gerar_base_bruta(1, 5, fim='2026-10-19').to_csv(entrada, sep=';', index=False)
+    etapa = pipeline.etapa_montagem(entrada=str(entrada), saida=str(tmp_path / 'base.csv'))
+
+    assert etapa.impressao() == pipeline.impressao_digital([pipeline.hash_arquivo(str(entrada))])
@@ -0,0 +1,48 @@
+"""Fração de cota consumida e alerta de "perto da cota" do relatório da coleta."""
+from datetime import date
+
+import pytest
+
+import coletar_dados
+from fake_ga4 import ClienteDataFalso
+from telemetria import LIMIAR_COTA, RelatorioColeta, fracao_consumida
+
+
+def test_fracao_usa_o_saldo_e_nao_o_custo_da_requisicao():
+    # 90% da cota horária já usada; esta requisição custou só 12 tokens
+    cota = {'tokensPerHour': {'consumed': 12, 'remaining': 4000},
+            'tokensPerDay': {'consumed': 12, 'remaining': 150000}}
+
+    assert fracao_consumida(cota) == pytest.approx(0.9)
+
+
+def test_cota_desconhecida_ou_sem_saldo_e_ignorada():
+    assert fracao_consumida(None) is None
+    assert fracao_consumida({'concurrentRequests': {'consumed': 1, 'remaining': 9}}) is None
+    assert fracao_consumida({'tokensPerHour': {'consumed': 5}}) is None
+
+
+def test_resposta_perto_do_limite_entra_em_perto_da_cota():
+    relatorio = RelatorioColeta()
+    relatorio.registrar('properties/1', cota={'tokensPerHour': {'consumed': 10, 'remaining': 3000}})
+    relatorio.registrar('properties/2', cota={'tokensPerHour': {'consumed': 10, 'remaining': 39000}})
+
+    resumo = relatorio.resumo()
+
+    assert resumo['perto_da_cota'] == ['properties/1']
+
+
+def test_coleta_no_servidor_falso_quase_esgotado():
+    limite = 60
+    agora = [0.0]
+    cliente = ClienteDataFalso(tokens_propriedade_hora=limite, relogio=lambda: agora[0])
+    relatorio = RelatorioColeta(limites_cota={'tokensPerHour': limite})
+
+    # Cada consulta de 100 dias custa 6 tokens: 9 delas deixam 6 de 60 (90% usados)
+    for _ in range(9):
+        coletar_dados.run_ga_daily(cliente, 'properties/1', date(2026, 1, 1), date(2026, 4, 10), relatorio)
+
+    resumo = relatorio.resumo()
+    fracao = resumo['detalhes'][0]['fracao_cota']
+    assert fracao >= LIMIAR_COTA
+    assert resumo['perto_da_cota'] == ['properties/1']